@@ -1,17 +1,30 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
 import json
-import uuid
+import orjson
+import secrets
 import os
 import logging
+from cachetools import TTLCache
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, status, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, FastAPI, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
+
+from app.core.pool import LeasedPool, PreparingConnection, execute_prepared, run_concurrently
+from app.core.responses import DecimalORJSONResponse, orjson_default
+from sessions import detect_vehicle_sessions
+
 # Load environment variables
 load_dotenv()
 
@@ -29,392 +42,485 @@ PG_PORT = int(os.getenv("PG_PORT", 5432))
 PG_USER = os.getenv("PG_USER", "core")
 PG_PASSWORD = os.getenv("PG_PASSWORD", "1234")
 PG_DATABASE = os.getenv("PG_DATABASE", "coredb")
+PG_POOL_MIN = int(os.getenv("PG_POOL_MIN", 5))
+PG_POOL_MAX = int(os.getenv("PG_POOL_MAX", 20))
+PG_POOL_TIMEOUT = float(os.getenv("PG_POOL_TIMEOUT", 2.0))
+GUNNY_STREAM_ITERSIZE = int(os.getenv("GUNNY_STREAM_ITERSIZE", 2000))
+CAMERA_MAP_REFRESH = int(os.getenv("CAMERA_MAP_REFRESH", 300))
+STATUS_CACHE_TTL = int(os.getenv("STATUS_CACHE_TTL", 60))
+STATUS_HISTORY_CACHE_TTL = int(os.getenv("STATUS_HISTORY_CACHE_TTL", 3600))
+DETAILS_CACHE_TTL = int(os.getenv("DETAILS_CACHE_TTL", 60))
+DETAILS_MAX_AGE = int(os.getenv("DETAILS_MAX_AGE", 30))
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()]
+VIDEOS_STREAM_ITERSIZE = int(os.getenv("VIDEOS_STREAM_ITERSIZE", 1000))
+DB_FANOUT_WORKERS = int(os.getenv("DB_FANOUT_WORKERS", 6))
+
 
 # FastAPI Application
-app = FastAPI(title="Warehouse Sessions API", version="1.0")
+app = FastAPI(
+    title="Warehouse Sessions API",
+    version="1.0",
+    default_response_class=DecimalORJSONResponse
+)
 
-# CORS Configuration - Allow all origins
+# CORS Configuration - comma-separated CORS_ORIGINS; a concrete list lets proxies share cached GETs
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Allows all origins
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"],  # Allows all headers
 )
+
+# Staff, worker-log and video endpoints; included into the app once, below the handlers
+records_router = APIRouter(tags=["records"])
 # ==========================================
 # Helper Functions
 # ==========================================
 
+# Opened at startup (or on first use if Postgres is not reachable yet); leases
+# wait up to PG_POOL_TIMEOUT seconds for a free connection once all are in use
+_db_pool = LeasedPool(
+    PG_POOL_MIN,
+    PG_POOL_MAX,
+    PG_POOL_TIMEOUT,
+    host=PG_HOST,
+    port=PG_PORT,
+    user=PG_USER,
+    password=PG_PASSWORD,
+    database=PG_DATABASE
+)
+
+
 def get_connection():
-    """Create and return a PostgreSQL connection"""
-    return psycopg2.connect(
-        host=PG_HOST,
-        port=PG_PORT,
-        user=PG_USER,
-        password=PG_PASSWORD,
-        database=PG_DATABASE
-    )
+    """Lease a PostgreSQL connection from the pool"""
+    return _db_pool.getconn()
 
 
-def detect_vehicle_sessions(gunny_logs, vehicle_logs):
-    if not gunny_logs and not vehicle_logs:
-        return []
-    
-    sessions = {}  # Dictionary to store sessions by vehicle number
-    current_vehicle = None
+def release_connection(conn):
+    """Return a leased connection to the pool"""
+    _db_pool.putconn(conn)
+
+
+@contextmanager
+def db_connection():
+    """Lease a pooled connection for a with-block, returning it to the pool even on errors"""
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        release_connection(conn)
+
+
+_fanout_executor = ThreadPoolExecutor(max_workers=DB_FANOUT_WORKERS, thread_name_prefix="db-fanout")
+
+
+def _fetch_rows(name, query, params=()):
+    """Run one prepared read query on its own pooled connection and return its rows as dicts"""
+    with db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            execute_prepared(cur, name, query, params)
+            return cur.fetchall()
+
+
+def fetch_concurrently(*queries):
+    """Run independent (name, query, params) prepared statements in parallel so their round trips overlap"""
+    return run_concurrently(_fanout_executor, _fetch_rows, queries)
+
+
+@app.on_event("startup")
+def open_db_pool():
+    """Open the connection pool before the first request arrives"""
+    try:
+        _db_pool.open()
+    except Exception:
+        # The pool is created lazily on the first request if the database is not reachable yet
+        logger.warning("Database pool could not be opened at startup")
+
+
+@app.on_event("shutdown")
+def close_db_pool():
+    """Close every pooled connection on shutdown"""
+    _db_pool.close()
+
+
+def parse_query_date(date_str):
+    """Parse a request date given as YYYY-MM-DD or DD-MM-YYYY"""
+    try:
+        return datetime.fromisoformat(date_str)
+    except ValueError:
+        return datetime.strptime(date_str, '%d-%m-%Y')
+
+
+class _RowTail:
+    """Iterate rows once while counting them and keeping the last few"""
     
-    # Combine and sort logs by timestamp
-    all_events = []
+    def __init__(self, rows, size=2):
+        self.rows = rows
+        self.count = 0
+        self.last = deque(maxlen=size)
     
-    # Add gunny bag events
-    for glog in gunny_logs:
-        if glog['start_time']:
-            timestamp = glog['start_time']
-            if isinstance(timestamp, str):
-                try:
-                    timestamp = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
-                except:
-                    continue
-            
-            all_events.append({
-                'type': 'gunny',
-                'timestamp': timestamp,
-                'data': glog
-            })
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            self.last.append(row)
+            yield row
+
+
+# Camera -> warehouse assignments barely change, so they are loaded once and
+# refreshed in the background instead of being re-read on each request
+_cameras_by_warehouse = None
+_camera_map_task = None
+
+
+def load_camera_map(cur):
+    """Read camera assignments as {warehouse_id: [camera_id, ...]}"""
+    cur.execute("""
+        SELECT DISTINCT warehouse_id, camera_id
+        FROM warehouse."wh-cameras"
+        WHERE warehouse_id IS NOT NULL
+    """)
+    cams_by_wh = defaultdict(list)
+    for row in cur.fetchall():
+        cams_by_wh[row['warehouse_id']].append(row['camera_id'])
+    return dict(cams_by_wh)
+
+
+def _reload_camera_map():
+    global _cameras_by_warehouse
+    with db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        _cameras_by_warehouse = load_camera_map(cur)
+        cur.close()
+
+
+def get_cameras_by_warehouse(cur):
+    """Return the in-memory camera map, loading it on the given cursor if it is not ready yet"""
+    global _cameras_by_warehouse
+    if _cameras_by_warehouse is None:
+        _cameras_by_warehouse = load_camera_map(cur)
+    return _cameras_by_warehouse
+
+
+async def refresh_camera_map():
+    """Reload the camera map every CAMERA_MAP_REFRESH seconds"""
+    while True:
+        await asyncio.sleep(CAMERA_MAP_REFRESH)
+        try:
+            await run_in_threadpool(_reload_camera_map)
+        except Exception:
+            logger.exception("Failed to refresh camera map")
+
+
+@app.on_event("startup")
+async def start_camera_map_refresh():
+    """Load the camera map and keep it fresh for the lifetime of the app"""
+    global _camera_map_task
+    try:
+        await run_in_threadpool(_reload_camera_map)
+    except Exception:
+        logger.exception("Failed to load camera map at startup; it will be loaded on first use")
+    _camera_map_task = asyncio.create_task(refresh_camera_map())
+
+
+@app.on_event("shutdown")
+async def stop_camera_map_refresh():
+    global _camera_map_task
+    if _camera_map_task is not None:
+        _camera_map_task.cancel()
+        _camera_map_task = None
+
+
+# Past days no longer change, so they can stay cached much longer than today
+_recent_status_cache = TTLCache(maxsize=256, ttl=STATUS_CACHE_TTL)
+_history_status_cache = TTLCache(maxsize=256, ttl=STATUS_HISTORY_CACHE_TTL)
+_status_cache_lock = threading.Lock()
+
+
+# Serialized response bodies for the rarely-changing details endpoints
+_details_cache = TTLCache(maxsize=256, ttl=DETAILS_CACHE_TTL)
+_response_cache_lock = threading.Lock()
+
+# Lets browsers and shared proxies reuse details responses without reaching the app
+DETAILS_HEADERS = {"Cache-Control": f"public, max-age={DETAILS_MAX_AGE}"}
+
+
+def _cached_response(cache, key, headers=None):
+    """Return a cached JSON body as a Response, or None on a miss"""
+    with _response_cache_lock:
+        body = cache.get(key)
+    if body is None:
+        return None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _cache_response(cache, key, content, headers=None):
+    """Serialize content once, remember the bytes and return the response"""
+    response = DecimalORJSONResponse(content=content, headers=headers)
+    with _response_cache_lock:
+        cache[key] = response.body
+    return response
+
+
+def _status_cache_for(day):
+    if day < datetime.now().date():
+        return _history_status_cache
+    return _recent_status_cache
+
+
+def _sql_formatted(log, key, timestamp, fmt):
+    """Return the to_char column from a log row, formatting the timestamp only if it is missing"""
+    value = log.get(key) if log else None
+    return value if value is not None else timestamp.strftime(fmt)
+
+
+# Camera info, vehicle logs, bag totals and whether there are any gunny-bag
+# rows at all for one camera-day, used as a prepared statement:
+# $1 = camera_id, $2 = warehouse_id, $3 = date
+SESSION_DATA_SQL = """
+    WITH cam AS (
+        SELECT camera_id, camera_name, warehouse_id, status,
+               COALESCE(NULLIF(stream_arn, ''), s3_bucket_url) AS stream_url
+        FROM warehouse."wh-cameras"
+        WHERE camera_id = $1 AND warehouse_id = $2
+    ),
+    v AS (
+        SELECT vl.vehicle_number, vl.start_time, vl.status,
+               CASE WHEN v.bags_capacity::text ~ '^[0-9]+$'
+                    THEN v.bags_capacity::text::int ELSE 0
+               END AS bags_capacity,
+               v.vehicle_access,
+               to_char(vl.start_time, 'HH24:MI') AS t_hm,
+               to_char(vl.start_time, 'DD-MM-YYYY') AS d_dmy,
+               row_number() OVER (ORDER BY vl.start_time) AS ord
+        FROM warehouse."wh-vehicle-logs" vl
+        LEFT JOIN warehouse."wh-vehicles" v ON vl.vehicle_number = v.number_plates
+        WHERE vl.camera_id = $1 
+            AND vl.date = $3
+    ),
+    h AS (
+        SELECT GROUPING(date_trunc('hour', start_time)) AS is_total,
+               to_char(date_trunc('hour', start_time), 'HH24:00') AS hour, status,
+               SUM(COALESCE(count, 0))::int AS bags,
+               row_number() OVER (
+                   ORDER BY GROUPING(date_trunc('hour', start_time)),
+                            date_trunc('hour', start_time), status
+               ) AS ord
+        FROM warehouse."wh-gunny-bag-logs"
+        WHERE camera_id = $1 
+            AND date = $3
+            AND start_time IS NOT NULL
+            AND status IN ('LOADING', 'UNLOADING')
+        GROUP BY GROUPING SETS ((date_trunc('hour', start_time), status), (status))
+    ),
+    g AS (
+        SELECT EXISTS (
+            SELECT 1 FROM warehouse."wh-gunny-bag-logs"
+            WHERE camera_id = $1 
+                AND date = $3
+        ) AS has_gunny
+    )
+    SELECT 'cam' AS kind, 0 AS ord, row_to_json(cam) AS data FROM cam
+    UNION ALL
+    SELECT 'g', 0, row_to_json(g) FROM g
+    UNION ALL
+    SELECT 'v', ord, row_to_json(v) FROM v
+    UNION ALL
+    SELECT 'h', ord, row_to_json(h) FROM h
+    ORDER BY kind, ord
+"""
+
+
+def _sessions_output(camera_info, query_date, hourly_list, total_loading, total_unloading,
+                     total_chunks, latest_chunks, logs):
+    """Assemble the sessions response for one camera-day"""
+    display_date = query_date.strftime('%d-%m-%Y')
+    end_date = query_date
+    start_date = end_date - timedelta(days=4)
     
-    # Add vehicle events
-    for vlog in vehicle_logs:
-        if vlog['start_time']:
-            timestamp = vlog['start_time']
-            if isinstance(timestamp, str):
-                try:
-                    timestamp = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
-                except:
-                    continue
-            
-            all_events.append({
-                'type': 'vehicle',
-                'timestamp': timestamp,
-                'vehicle_number': vlog['vehicle_number'],
-                'data': vlog
-            })
+    # Mismatch is now null (not calculated)
+    mismatch = None
+    mismatch_trend = "stable"
     
-    # Sort by timestamp
-    all_events.sort(key=lambda x: x['timestamp'])
+    # Trends
+    loading_trend = "positive" if total_loading > 0 else "stable"
+    unloading_trend = "positive" if total_unloading > 0 else "stable"
     
-    # FALLBACK: If no vehicle logs, create a default session with "XXXX"
-    if not vehicle_logs and gunny_logs:
-        fallback_vehicle = "XXXX"
-        
-        first_timestamp = all_events[0]['timestamp'] if all_events else datetime.now()
-        
-        sessions[fallback_vehicle] = {
-            'session_id': str(uuid.uuid4()),
-            'vehicle_number': fallback_vehicle,
-            'start_time': first_timestamp,
-            'end_time': first_timestamp,
-            'chunks': [],
-            'total_bags_loaded': 0,
-            'total_bags_unloaded': 0,
-            'vehicle_data': None,
-            'authorized_bags': 0,
-            'status': 'Unknown',
-            'authorization': 'Unknown'
+    return {
+        "camera": {
+            "stream_url": camera_info['stream_url'],
+            "camera_data": {
+                "camera_name": camera_info['camera_name'],
+                "camera_id": str(camera_info['camera_id']),
+                "warehouse_id": camera_info['warehouse_id'],
+                "status": camera_info['status'] or "N/A"
+            },
+            "total_chunks": total_chunks,
+            "latest_chunks": latest_chunks
+        },
+        "date_range": {
+            "start_date": start_date.strftime('%d-%m-%Y'),
+            "end_date": end_date.strftime('%d-%m-%Y'),
+            "selected_date": display_date
+        },
+        "summary": {
+            "bags": {
+                "paddy": 0,
+                "wheat": 0
+            },
+            "Hourly_Summary": hourly_list,
+            f"Total_Bags_Loaded_on_{display_date}": {
+                "number": total_loading,
+                "trend": loading_trend
+            },
+            f"Total_Bags_UnLoaded_on_{display_date}": {
+                "number": total_unloading,
+                "trend": unloading_trend
+            },
+            "Mismatch": {
+                "number": mismatch,
+                "trend": mismatch_trend
+            },
+            "Total_Vehicle_Sessions": len(logs),
+            "Logs": logs
         }
-        current_vehicle = fallback_vehicle
-    
-    for idx, event in enumerate(all_events):
-        if event['type'] == 'vehicle':
-            vehicle_num = event['vehicle_number']
-            
-            # Check if this is a new vehicle
-            if vehicle_num != current_vehicle:
-                current_vehicle = vehicle_num
-                
-                # Check if we already have a session for this vehicle
-                if vehicle_num not in sessions:
-                    # Convert bags_capacity to int, handling None and string values
-                    bags_capacity = event['data'].get('bags_capacity', 0)
-                    if bags_capacity is None:
-                        bags_capacity = 0
-                    try:
-                        bags_capacity = int(bags_capacity)
-                    except (ValueError, TypeError):
-                        bags_capacity = 0
-                    
-                    # Create new session for this vehicle
-                    sessions[vehicle_num] = {
-                        'session_id': str(uuid.uuid4()),
-                        'vehicle_number': vehicle_num,
-                        'start_time': event['timestamp'],
-                        'end_time': event['timestamp'],
-                        'chunks': [],
-                        'total_bags_loaded': 0,
-                        'total_bags_unloaded': 0,
-                        'vehicle_data': event['data'],
-                        'authorized_bags': bags_capacity,
-                        'status': event['data'].get('status', 'Unknown'),
-                        'authorization': event['data'].get('vehicle_access', 'Unknown')
-                    }
-                else:
-                    # Update end time
-                    sessions[vehicle_num]['end_time'] = event['timestamp']
-            else:
-                # Same vehicle continuing, just update end time
-                if current_vehicle in sessions:
-                    sessions[current_vehicle]['end_time'] = event['timestamp']
-        
-        elif event['type'] == 'gunny' and current_vehicle and current_vehicle in sessions:
-            # Add gunny bag data to current vehicle's session
-            glog = event['data']
-            count = glog.get('count', 0) or 0
-            status = glog.get('status', '')
-            
-            chunk_info = {
-                'chunk_id': str(glog['id']),
-                'video_url': glog.get('video_s3_url', ''),
-                'timestamp': event['timestamp'],
-                'status': status,
-                'bags_count': count
-            }
-            
-            sessions[current_vehicle]['chunks'].append(chunk_info)
-            sessions[current_vehicle]['end_time'] = event['timestamp']
-            
-            if status == 'LOADING':
-                sessions[current_vehicle]['total_bags_loaded'] += count
-            elif status == 'UNLOADING':
-                sessions[current_vehicle]['total_bags_unloaded'] += count
-    
-    # Convert sessions dictionary to list
-    session_list = []
-    for vehicle_num, session in sessions.items():
-        session_list.append(session)
-    
-    # Sort by start time
-    session_list.sort(key=lambda x: x['start_time'])
-    
-    return session_list
+    }
 
 
 def get_warehouse_data_with_sessions(warehouse_id, camera_id, date_str):
     try:
         # Parse date - handle both formats
-        try:
-            query_date = datetime.strptime(date_str, '%Y-%m-%d')
-        except ValueError:
-            query_date = datetime.strptime(date_str, '%d-%m-%Y')
-        
-        display_date = query_date.strftime('%d-%m-%Y')
-        end_date = query_date
-        start_date = end_date - timedelta(days=4)
-        
-        conn = psycopg2.connect(
-            host=PG_HOST,
-            port=PG_PORT,
-            user=PG_USER,
-            password=PG_PASSWORD,
-            database=PG_DATABASE
-        )
-        
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
-        # 1. Get Camera Information
-        cur.execute("""
-            SELECT camera_id, camera_name, warehouse_id, status, 
-                   s3_bucket_url, stream_arn, region_name
-            FROM warehouse."wh-cameras"
-            WHERE camera_id::text = %s AND warehouse_id = %s
-        """, (str(camera_id), warehouse_id))
-        
-        camera_info = cur.fetchone()
-        
-        if not camera_info:
-            return {"error": f"Camera {camera_id} not found in warehouse {warehouse_id}"}
-        
-        # 2. Get Gunny Bag Logs
-        cur.execute("""
-            SELECT id, count, date, start_time, end_time, status, 
-                   video_s3_url, video_name
-            FROM warehouse."wh-gunny-bag-logs"
-            WHERE camera_id::text = %s 
-                AND date::date = %s
-            ORDER BY start_time
-        """, (str(camera_id), query_date.date()))
-        
-        gunny_logs = cur.fetchall()
-        
-        # 3. Get Vehicle Logs
-        cur.execute("""
-            SELECT vl.id, vl.vehicle_number, vl.date, vl.start_time, 
-                   vl.end_time, vl.status, vl.video_s3_url,
-                   v.bags_capacity, v.commodity, v.vehicle_access
-            FROM warehouse."wh-vehicle-logs" vl
-            LEFT JOIN warehouse."wh-vehicles" v ON vl.vehicle_number = v.number_plates
-            WHERE vl.camera_id::text = %s 
-                AND vl.date::date = %s
-            ORDER BY vl.start_time
-        """, (str(camera_id), query_date.date()))
-        
-        vehicle_logs = cur.fetchall()
-        
-        # 4. DETECT VEHICLE SESSIONS
-        sessions = detect_vehicle_sessions(gunny_logs, vehicle_logs)
+        query_date = parse_query_date(date_str)
+        
+        with db_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+        
+            # 1-3. Camera info, vehicle logs, bag totals and whether any gunny-bag
+            # rows exist, in a single round trip.
+            # Each CTE is tagged with a kind and an ordinal so rows can be dispatched
+            # back into their own lists in order.
+            execute_prepared(cur, 'session_data', SESSION_DATA_SQL,
+                             (camera_id, warehouse_id, query_date.date()))
+        
+            camera_info = None
+            vehicle_logs = []
+            has_gunny = False
+            totals = {'LOADING': 0, 'UNLOADING': 0}
+            hourly_list = []
+            for row in cur.fetchall():
+                kind, data = row['kind'], row['data']
+                if kind == 'v':
+                    vehicle_logs.append(data)
+                elif kind == 'g':
+                    has_gunny = data['has_gunny']
+                elif kind == 'h':
+                    if data['is_total']:
+                        totals[data['status']] = data['bags']
+                    elif data['bags'] > 0:
+                        hourly_list.append({
+                            "start_time": data['hour'],
+                            "status": data['status'].title(),
+                            "count": data['bags']
+                        })
+                else:
+                    camera_info = data
+            total_loading = totals['LOADING']
+            total_unloading = totals['UNLOADING']
+        
+            if not camera_info:
+                cur.close()
+                return {"error": f"Camera {camera_id} not found in warehouse {warehouse_id}"}
+        
+            # Idle or uninstrumented camera-days skip the stream, session
+            # detection and log building entirely
+            if not has_gunny and not vehicle_logs:
+                cur.close()
+                return _sessions_output(camera_info, query_date, [], 0, 0, 0, [], [])
+        
+            # 4. Stream Gunny Bag Logs through a server-side cursor; busy camera-days
+            # can return far more rows than we want to hold in memory at once
+            gunny_cur = conn.cursor(name='gunny_stream', cursor_factory=RealDictCursor)
+            gunny_cur.itersize = GUNNY_STREAM_ITERSIZE
+            gunny_cur.execute("""
+                SELECT id, COALESCE(count, 0)::int AS count, start_time, status,
+                       video_s3_url,
+                       to_char(start_time, 'HH24:MI:SS') AS t_hms,
+                       to_char(start_time, 'HH24:MI') AS t_hm,
+                       to_char(start_time, 'DD-MM-YYYY') AS d_dmy
+                FROM warehouse."wh-gunny-bag-logs"
+                WHERE camera_id = %s 
+                    AND date = %s
+                ORDER BY start_time
+            """, (camera_id, query_date.date()))
         
-        # 5. Calculate totals and hourly summary from sessions
-        total_loading = 0
-        total_unloading = 0
-        hourly_summary = defaultdict(lambda: {'LOADING': 0, 'UNLOADING': 0})
+            gunny_logs = _RowTail(gunny_cur)
         
-        for session in sessions:
-            total_loading += session['total_bags_loaded']
-            total_unloading += session['total_bags_unloaded']
-            
-            for chunk in session['chunks']:
-                hour = chunk['timestamp'].strftime('%H:00')
-                if chunk['status'] == 'LOADING':
-                    hourly_summary[hour]['LOADING'] += chunk['bags_count']
-                elif chunk['status'] == 'UNLOADING':
-                    hourly_summary[hour]['UNLOADING'] += chunk['bags_count']
+            # 5. DETECT VEHICLE SESSIONS
+            sessions = detect_vehicle_sessions(gunny_logs, vehicle_logs)
+            gunny_cur.close()
         
-        # Convert hourly summary to list
-        hourly_list = []
-        for hour in sorted(hourly_summary.keys()):
-            counts = hourly_summary[hour]
-            if counts['LOADING'] > 0:
-                hourly_list.append({
-                    "start_time": hour,
-                    "status": "Loading",
-                    "count": counts['LOADING']
-                })
-            if counts['UNLOADING'] > 0:
-                hourly_list.append({
-                    "start_time": hour,
-                    "status": "Unloading",
-                    "count": counts['UNLOADING']
-                })
-        
-        # 6. Get total chunks
-        total_chunks = len(gunny_logs)
+            # 6. Get total chunks
+            total_chunks = gunny_logs.count
         
-        # 7. Latest chunks
-        latest_chunks = []
-        for log in gunny_logs[-2:]:
-            if log['start_time']:
+            # 7. Latest chunks
+            latest_chunks = []
+            for log in gunny_logs.last:
+                # start_time is already a datetime from the cursor; no re-parsing needed
                 timestamp = log['start_time']
-                if isinstance(timestamp, str):
-                    try:
-                        timestamp = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
-                    except:
-                        pass
-                
-                chunk_id = f"CAM{camera_id:03d}-{timestamp.strftime('%Y-%m-%d-%H-%M-%S')}"
-                ts_iso = timestamp.isoformat()
-            else:
-                chunk_id = str(log['id'])
-                ts_iso = None
+                if timestamp:
+                    chunk_id = f"CAM{camera_id:03d}-{timestamp.strftime('%Y-%m-%d-%H-%M-%S')}"
+                else:
+                    chunk_id = str(log['id'])
             
-            latest_chunks.append({
-                "chunk_id": chunk_id,
-                "presigned_url": log['video_s3_url'],
-                "transcript": f"{log['status']} - {log['count']} bags",
-                "timestamp": ts_iso
-            })
-        
-        # 8. Mismatch is now null (not calculated)
-        mismatch = None
-        mismatch_trend = "stable"
-        
-        # 9. Trends
-        loading_trend = "positive" if total_loading > 0 else "stable"
-        unloading_trend = "positive" if total_unloading > 0 else "stable"
+                latest_chunks.append({
+                    "chunk_id": chunk_id,
+                    "presigned_url": log['video_s3_url'],
+                    "transcript": f"{log['status']} - {log['count']} bags",
+                    "timestamp": timestamp  # orjson emits naive datetimes as ISO 8601
+                })
         
-        # 10. Build Session-based Logs
-        logs = []
-        for i, session in enumerate(sessions, 1):
-            start_time_str = session['start_time'].strftime('%H:%M')
-            end_time_str = session['end_time'].strftime('%H:%M')
-            log_date = session['start_time'].strftime('%d-%m-%Y')
-            
-            net_bags = session['total_bags_loaded'] - session['total_bags_unloaded']
+            # 8. Build Session-based Logs
+            logs = []
+            for i, session in enumerate(sessions, 1):
+                # Times come pre-formatted by to_char; only a session with no
+                # events at all has to be formatted here
+                start_log = session['start_log']
+                end_log = session['end_log']
+                start_time_str = _sql_formatted(start_log, 't_hm', session['start_time'], '%H:%M')
+                end_time_str = _sql_formatted(end_log, 't_hm', session['end_time'], '%H:%M')
+                log_date = _sql_formatted(start_log, 'd_dmy', session['start_time'], '%d-%m-%Y')
             
-            # Ensure authorized_bags is an integer
-            authorized_bags = session['authorized_bags']
-            if not isinstance(authorized_bags, int):
-                try:
-                    authorized_bags = int(authorized_bags) if authorized_bags else 0
-                except (ValueError, TypeError):
-                    authorized_bags = 0
+                net_bags = session['total_bags_loaded'] - session['total_bags_unloaded']
             
-            logs.append({
-                "session_id": session['session_id'],
-                "vehicle_number": session['vehicle_number'],
-                "status": session['status'],
-                "authorization_status": session['authorization'],
-                "date": log_date,
-                "start_time": start_time_str,
-                "end_time": end_time_str,
-                "duration_minutes": int((session['end_time'] - session['start_time']).total_seconds() / 60),
-                "authorized_bags": authorized_bags,
-                "actual_bags_loaded": session['total_bags_loaded'],
-                "actual_bags_unloaded": session['total_bags_unloaded'],
-                "net_bags": net_bags,
-                "total_chunks": len(session['chunks']),
-                "chunks_detail": [
-                    {
-                        "chunk_id": c['chunk_id'],
-                        "timestamp": c['timestamp'].strftime('%H:%M:%S'),
-                        "operation": c['status'],
-                        "bags_count": c['bags_count']
-                    } for c in session['chunks']
-                ]
-            })
-        
-        cur.close()
-        conn.close()
+                logs.append({
+                    "session_id": session['session_id'] or secrets.token_hex(16),
+                    "vehicle_number": session['vehicle_number'],
+                    "status": session['status'],
+                    "authorization_status": session['authorization'],
+                    "date": log_date,
+                    "start_time": start_time_str,
+                    "end_time": end_time_str,
+                    "duration_minutes": int((session['end_time'] - session['start_time']).total_seconds() / 60),
+                    "authorized_bags": session['authorized_bags'],
+                    "actual_bags_loaded": session['total_bags_loaded'],
+                    "actual_bags_unloaded": session['total_bags_unloaded'],
+                    "net_bags": net_bags,
+                    "total_chunks": len(session['chunks']),
+                    "chunks_detail": [
+                        {
+                            "chunk_id": c['chunk_id'],
+                            "timestamp": c['time'] or c['timestamp'].strftime('%H:%M:%S'),
+                            "operation": c['status'],
+                            "bags_count": c['bags_count']
+                        } for c in session['chunks']
+                    ]
+                })
         
-        # 11. Build final output
-        output = {
-            "camera": {
-                "stream_url": camera_info['stream_arn'] or camera_info['s3_bucket_url'],
-                "camera_data": {
-                    "camera_name": camera_info['camera_name'],
-                    "camera_id": str(camera_info['camera_id']),
-                    "warehouse_id": camera_info['warehouse_id'],
-                    "status": camera_info['status'] or "N/A"
-                },
-                "total_chunks": total_chunks,
-                "latest_chunks": latest_chunks
-            },
-            "date_range": {
-                "start_date": start_date.strftime('%d-%m-%Y'),
-                "end_date": end_date.strftime('%d-%m-%Y'),
-                "selected_date": display_date
-            },
-            "summary": {
-                "bags": {
-                    "paddy": 0,
-                    "wheat": 0
-                },
-                "Hourly_Summary": hourly_list,
-                f"Total_Bags_Loaded_on_{display_date}": {
-                    "number": total_loading,
-                    "trend": loading_trend
-                },
-                f"Total_Bags_UnLoaded_on_{display_date}": {
-                    "number": total_unloading,
-                    "trend": unloading_trend
-                },
-                "Mismatch": {
-                    "number": mismatch,
-                    "trend": mismatch_trend
-                },
-                "Total_Vehicle_Sessions": len(sessions),
-                "Logs": logs
-            }
-        }
+            cur.close()
         
-        return output
+        # 9. Build final output
+        return _sessions_output(camera_info, query_date, hourly_list, total_loading, total_unloading,
+                                total_chunks, latest_chunks, logs)
         
     except Exception as e:
         import traceback
@@ -431,116 +537,122 @@ def print_summary_stats(result):
     pass
 
 
+# Warehouse-status aggregates over the cached camera map, passed in as parallel
+# (warehouse_id, camera_id) arrays; camera ids keep the integer type of the
+# log tables' camera_id columns so the joins compare like with like
+STATUS_VEHICLES_SQL = """
+    SELECT c.warehouse_id,
+           COUNT(vl.id) AS vehicle_log_count,
+           COUNT(DISTINCT NULLIF(vl.vehicle_number, '')) AS vehicles_entered,
+           COUNT(vl.id) FILTER (
+               WHERE lower(v.vehicle_access) = 'authorized'
+           ) AS authorized_vehicles,
+           COUNT(vl.id) FILTER (
+               WHERE lower(v.vehicle_access) = 'unauthorized'
+           ) AS unauthorized_vehicles
+    FROM unnest($1::text[], $2::int[]) AS c(warehouse_id, camera_id)
+    LEFT JOIN warehouse."wh-vehicle-logs" vl
+        ON vl.camera_id = c.camera_id AND vl.date = $3
+    LEFT JOIN warehouse."wh-vehicles" v ON vl.vehicle_number = v.number_plates
+    GROUP BY c.warehouse_id
+    ORDER BY c.warehouse_id
+"""
+
+STATUS_BAGS_SQL = """
+    SELECT c.warehouse_id,
+           COALESCE(SUM(g.count::int) FILTER (WHERE g.status = 'LOADING'), 0) AS bags_loaded,
+           COALESCE(SUM(g.count::int) FILTER (WHERE g.status = 'UNLOADING'), 0) AS bags_unloaded
+    FROM unnest($1::text[], $2::int[]) AS c(warehouse_id, camera_id)
+    LEFT JOIN warehouse."wh-gunny-bag-logs" g
+        ON g.camera_id = c.camera_id AND g.date = $3
+    GROUP BY c.warehouse_id
+"""
+
+
 def get_warehouse_status_summary(date_str: str) -> Dict[str, Any]:
     try:
         # Parse date - handle both formats
-        try:
-            query_date = datetime.strptime(date_str, '%Y-%m-%d')
-        except ValueError:
-            query_date = datetime.strptime(date_str, '%d-%m-%Y')
+        query_date = parse_query_date(date_str)
         
         display_date = query_date.strftime('%d-%m-%Y')
         
-        conn = psycopg2.connect(
-            host=PG_HOST,
-            port=PG_PORT,
-            user=PG_USER,
-            password=PG_PASSWORD,
-            database=PG_DATABASE
-        )
-        
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
-        # 1. Get all warehouses
-        cur.execute("""
-            SELECT DISTINCT warehouse_id
-            FROM warehouse."wh-cameras"
-            WHERE warehouse_id IS NOT NULL
-            ORDER BY warehouse_id
-        """)
-        
-        warehouses = [row['warehouse_id'] for row in cur.fetchall()]
-        
-        # Initialize aggregated data
-        total_vehicles_entered = 0
-        total_authorized_vehicles = 0
-        total_unauthorized_vehicles = 0
-        total_bags_loaded = 0
-        total_bags_unloaded = 0
-        total_hamalis = 0
-        total_supervisors = 0
-        warehouse_insights = {}
-        
-        # 2. Process each warehouse
-        for warehouse_id in warehouses:
-            
-            # Get vehicle logs for this warehouse
-            cur.execute("""
-                SELECT vl.id, vl.vehicle_number, vl.start_time, vl.end_time, 
-                       vl.status, v.vehicle_access
-                FROM warehouse."wh-vehicle-logs" vl
-                LEFT JOIN warehouse."wh-vehicles" v ON vl.vehicle_number = v.number_plates
-                WHERE vl.camera_id IN (
-                    SELECT camera_id FROM warehouse."wh-cameras" 
-                    WHERE warehouse_id = %s
-                )
-                AND vl.date::date = %s
-            """, (warehouse_id, query_date.date()))
-            
-            vehicle_logs = cur.fetchall() or []
-            
-            # Get gunny bag logs for this warehouse
-            cur.execute("""
-                SELECT id, count, status
-                FROM warehouse."wh-gunny-bag-logs"
-                WHERE camera_id IN (
-                    SELECT camera_id FROM warehouse."wh-cameras" 
-                    WHERE warehouse_id = %s
-                )
-                AND date::date = %s
-            """, (warehouse_id, query_date.date()))
-            
-            gunny_logs = cur.fetchall() or []
-            
-            # Calculate warehouse-specific metrics
-            vehicles_entered = len(set(v['vehicle_number'] for v in vehicle_logs if v['vehicle_number']))
+        day = query_date.date()
+        status_cache = _status_cache_for(day)
+        with _status_cache_lock:
+            cached_response = status_cache.get(day)
+        if cached_response is not None:
+            return cached_response
+        
+        with db_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+        
+            # Flatten the cached camera map into parallel arrays for unnest()
+            cams_by_wh = get_cameras_by_warehouse(cur)
+            wh_ids = [wh for wh, cams in cams_by_wh.items() for _ in cams]
+            cam_ids = [cam for cams in cams_by_wh.values() for cam in cams]
+        
+            vehicle_stats = []
+            bag_stats = {}
+            if cam_ids:
+                # 1. Vehicle activity per warehouse (one aggregate instead of a query per warehouse)
+                execute_prepared(cur, 'status_vehicles', STATUS_VEHICLES_SQL,
+                                 (wh_ids, cam_ids, query_date.date()))
+        
+                vehicle_stats = cur.fetchall()
+        
+                # 2. Gunny bag totals per warehouse
+                execute_prepared(cur, 'status_bags', STATUS_BAGS_SQL,
+                                 (wh_ids, cam_ids, query_date.date()))
+        
+                bag_stats = {row['warehouse_id']: row for row in cur.fetchall()}
+        
+            # Initialize aggregated data
+            total_vehicles_entered = 0
+            total_authorized_vehicles = 0
+            total_unauthorized_vehicles = 0
+            total_bags_loaded = 0
+            total_bags_unloaded = 0
+            total_hamalis = 0
+            total_supervisors = 0
+            warehouse_insights = {}
+        
+            # 3. Build per-warehouse insights
+            for row in vehicle_stats:
+                warehouse_id = row['warehouse_id']
+                bags = bag_stats.get(warehouse_id)
             
-            authorized_vehicles = len([v for v in vehicle_logs 
-                                     if v.get('vehicle_access') in ['Authorized', 'authorized', 'AUTHORIZED']])
-            unauthorized_vehicles = len([v for v in vehicle_logs 
-                                        if v.get('vehicle_access') in ['Unauthorized', 'unauthorized', 'UNAUTHORIZED']])
+                vehicle_log_count = row['vehicle_log_count']
+                vehicles_entered = row['vehicles_entered']
+                authorized_vehicles = row['authorized_vehicles']
+                unauthorized_vehicles = row['unauthorized_vehicles']
+                bags_loaded = bags['bags_loaded'] if bags else 0
+                bags_unloaded = bags['bags_unloaded'] if bags else 0
             
-            bags_loaded = sum(int(g.get('count', 0) or 0) for g in gunny_logs 
-                            if g.get('status') == 'LOADING')
-            bags_unloaded = sum(int(g.get('count', 0) or 0) for g in gunny_logs 
-                               if g.get('status') == 'UNLOADING')
+                # Get personnel counts (hamalis and supervisors)
+                # This would need separate tables - estimating based on activity
+                hamalis_count = max(1, vehicle_log_count // 5) if vehicle_log_count else 0
+                supervisors_count = max(1, vehicle_log_count // 20) if vehicle_log_count else 0
             
-            # Get personnel counts (hamalis and supervisors)
-            # This would need separate tables - estimating based on activity
-            hamalis_count = max(1, len(vehicle_logs) // 5) if vehicle_logs else 0
-            supervisors_count = max(1, len(vehicle_logs) // 20) if vehicle_logs else 0
+                # Update totals
+                total_vehicles_entered += vehicles_entered
+                total_authorized_vehicles += authorized_vehicles
+                total_unauthorized_vehicles += unauthorized_vehicles
+                total_bags_loaded += bags_loaded
+                total_bags_unloaded += bags_unloaded
+                total_hamalis += hamalis_count
+                total_supervisors += supervisors_count
             
-            # Update totals
-            total_vehicles_entered += vehicles_entered
-            total_authorized_vehicles += authorized_vehicles
-            total_unauthorized_vehicles += unauthorized_vehicles
-            total_bags_loaded += bags_loaded
-            total_bags_unloaded += bags_unloaded
-            total_hamalis += hamalis_count
-            total_supervisors += supervisors_count
-            
-            # Build warehouse insight
-            warehouse_insights[warehouse_id] = {
-                "vehicles_entered": vehicles_entered,
-                "vehicles_exited": max(0, vehicles_entered - 1),  # Assume most vehicles exit
-                "hamalis": hamalis_count,
-                "supervisors": supervisors_count,
-                "bags_loaded": bags_loaded,
-                "bags_unloaded": bags_unloaded
-            }
+                # Build warehouse insight
+                warehouse_insights[warehouse_id] = {
+                    "vehicles_entered": vehicles_entered,
+                    "vehicles_exited": max(0, vehicles_entered - 1),  # Assume most vehicles exit
+                    "hamalis": hamalis_count,
+                    "supervisors": supervisors_count,
+                    "bags_loaded": bags_loaded,
+                    "bags_unloaded": bags_unloaded
+                }
         
-        cur.close()
-        conn.close()
+            cur.close()
         
         # Build response
         response = {
@@ -555,6 +667,9 @@ def get_warehouse_status_summary(date_str: str) -> Dict[str, Any]:
             "warehouse_insights": warehouse_insights
         }
         
+        with _status_cache_lock:
+            status_cache[day] = response
+        
         return response
         
     except Exception as e:
@@ -575,8 +690,8 @@ async def health_check():
 async def api_get_warehouse_status(date: str):
     logger.info(f"Fetching warehouse status summary for date: {date}")
     try:
-        result = get_warehouse_status_summary(date)
-        return JSONResponse(status_code=status.HTTP_200_OK, content=result)
+        result = await run_in_threadpool(get_warehouse_status_summary, date)
+        return ORJSONResponse(status_code=status.HTTP_200_OK, content=result)
         
     except HTTPException:
         raise
@@ -589,14 +704,14 @@ async def api_get_warehouse_sessions(warehouse_id: str, camera_id: int, date_str
     logger.info(f"Processing request: warehouse={warehouse_id}, camera={camera_id}, date={date_str}")
     
     try:
-        result = get_warehouse_data_with_sessions(warehouse_id, camera_id, date_str)
+        result = await run_in_threadpool(get_warehouse_data_with_sessions, warehouse_id, camera_id, date_str)
         
         if "error" in result:
             logger.error(f"Error in get_warehouse_data_with_sessions: {result['error']}")
             raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
         
         logger.info(f"Successfully processed request for warehouse={warehouse_id}")
-        return JSONResponse(status_code=status.HTTP_200_OK, content=result)
+        return ORJSONResponse(status_code=status.HTTP_200_OK, content=result)
         
     except HTTPException:
         raise
@@ -609,7 +724,12 @@ async def api_get_warehouse_sessions(warehouse_id: str, camera_id: int, date_str
 # NEW ENDPOINTS: Hamali, Warehouses, and Camera Chunks
 # ==========================================
 
-@app.get("/hamali-logs")
+# Worker roles reported under each /hamali-logs bucket
+HAMALI_ROLES = frozenset({"hamali", "worker", "labour"})
+SUPERVISOR_ROLES = frozenset({"supervisor", "incharge"})
+
+
+@records_router.get("/hamali-logs")
 def get_hamali_logs(
     date: str = Query(..., description="Date in YYYY-MM-DD format"),
     warehouse_id: str = Query(..., description="Warehouse ID (e.g., WH001)")
@@ -626,143 +746,95 @@ def get_hamali_logs(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
         
-        conn = get_connection()
-        cur = conn.cursor()
-        
-        # Step 1: Get all workers from the warehouse with their roles
-        workers_query = """
-            SELECT id, name, mobile, role, epf_id, warehouse_id
-            FROM warehouse."wh-workers"
-            WHERE warehouse_id = %s
-        """
-        cur.execute(workers_query, (warehouse_id,))
-        workers_rows = cur.fetchall()
+        with db_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+        
+            # Postgres builds every log entry and groups them by role bucket and hour,
+            # so Python only sees one row per (bucket, hour) with its entries as JSON.
+            # Times are read from their text form rather than cast, so one malformed
+            # value can't fail the whole query: a log without a readable hour is
+            # skipped and an unrecognised time is passed through as stored.
+            logs_query = """
+                WITH e AS (
+                    SELECT CASE WHEN lower(w.role) = ANY($3::text[]) THEN 'h'
+                                ELSE 's'
+                           END AS bucket,
+                           substring(l.start_time::text FROM '[ T]([0-9]{1,2}):')::int AS hr,
+                           w.id AS worker_id,
+                           l.start_time,
+                           l.id AS log_id, w.name, w.mobile, w.epf_id, w.warehouse_id, w.role,
+                           COALESCE(substring(l.start_time::text FROM '^[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}'),
+                                    l.start_time::text) AS st,
+                           COALESCE(substring(l.end_time::text FROM '^[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}'),
+                                    NULLIF(l.end_time::text, '')) AS et,
+                           l.camera_id, NULLIF(l.crop_s3_url, '') AS crop_s3_url
+                    FROM warehouse."wh-workers" w
+                    JOIN warehouse."wh-worker-logs" l ON l.worker_id = w.id AND l.date = $1
+                    WHERE w.warehouse_id = $2
+                        AND l.start_time IS NOT NULL
+                        AND lower(w.role) = ANY($3::text[] || $4::text[])
+                )
+                SELECT bucket, hr,
+                       json_agg(
+                           CASE WHEN crop_s3_url IS NULL THEN
+                               json_build_object(
+                                   'log_id', log_id, 'worker_id', worker_id, 'name', name,
+                                   'mobile', mobile, 'epf_id', epf_id, 'warehouse_id', warehouse_id,
+                                   'role', role, 'start_time', st, 'end_time', et,
+                                   'camera_id', camera_id
+                               )
+                           ELSE
+                               json_build_object(
+                                   'log_id', log_id, 'worker_id', worker_id, 'name', name,
+                                   'mobile', mobile, 'epf_id', epf_id, 'warehouse_id', warehouse_id,
+                                   'role', role, 'start_time', st, 'end_time', et,
+                                   'camera_id', camera_id, 'presigned_url', crop_s3_url
+                               )
+                           END
+                           ORDER BY worker_id, start_time
+                       )::text AS entries
+                FROM e
+                WHERE hr IS NOT NULL
+                GROUP BY bucket, hr
+                ORDER BY bucket, hr
+            """
+            execute_prepared(cur, 'hamali_log_groups', logs_query,
+                             (date, warehouse_id, sorted(HAMALI_ROLES), sorted(SUPERVISOR_ROLES)))
+        
+            # Group logs by role and hour
+            hamali_hourly_dict = {}
+            supervisor_hourly_dict = {}
+            for group_row in cur.fetchall():
+                hourly_dict = hamali_hourly_dict if group_row['bucket'] == 'h' else supervisor_hourly_dict
+                hourly_dict[group_row['hr']] = orjson.loads(group_row['entries'])
+        
+            # Hours are int keys, so walk the fixed 0-23 range instead of sorting
+            hamali_logs = []
+            supervisor_logs = []
+            for hour in range(24):
+                hour_entries = hamali_hourly_dict.get(hour)
+                if hour_entries:
+                    hamali_logs.append({
+                        "start_time": f"{hour:02d}:00",
+                        "end_time": f"{hour:02d}:59",
+                        "hourly_summery": hour_entries
+                    })
+                hour_entries = supervisor_hourly_dict.get(hour)
+                if hour_entries:
+                    supervisor_logs.append({
+                        "start_time": f"{hour:02d}:00",
+                        "end_time": f"{hour:02d}:59",
+                        "hourly_summery": hour_entries
+                    })
         
-        if not workers_rows:
             cur.close()
-            conn.close()
-            return {
-                "date": date,
-                "warehouse_id": warehouse_id,
-                "hamali_logs": [],
-                "supervisor_logs": []
-            }
-        
-        # Create a dictionary of workers for quick lookup
-        workers_dict = {}
-        for worker_row in workers_rows:
-            workers_dict[worker_row[0]] = {
-                "id": worker_row[0],
-                "name": worker_row[1],
-                "mobile": worker_row[2],
-                "role": worker_row[3],
-                "epf_id": worker_row[4],
-                "warehouse_id": worker_row[5]
-            }
-        
-        # Get worker IDs for this warehouse
-        worker_ids = list(workers_dict.keys())
-        
-        # Step 2: Fetch worker logs for the given date
-        logs_query = """
-            SELECT id, worker_id, date, start_time, end_time, camera_id, 
-                   crop_s3_url, video_s3_url, created_at
-            FROM warehouse."wh-worker-logs"
-            WHERE worker_id = ANY(%s) AND date = %s
-            ORDER BY worker_id, start_time
-        """
-        cur.execute(logs_query, (worker_ids, date))
-        logs_rows = cur.fetchall()
         
-        # Group logs by role and hour
-        hamali_hourly_dict = defaultdict(list)
-        supervisor_hourly_dict = defaultdict(list)
-        
-        for log_row in logs_rows:
-            log_id = log_row[0]
-            worker_id = log_row[1]
-            
-            # Match worker_id with worker info
-            if worker_id not in workers_dict:
-                continue
-            
-            worker_info = workers_dict[worker_id]
-            role = worker_info["role"].lower() if worker_info["role"] else ""
-            
-            # Handle start_time and end_time
-            start_time = None
-            hour_key = None
-            
-            if log_row[3]:
-                if isinstance(log_row[3], str):
-                    start_time = log_row[3]
-                    # Extract hour from datetime string (format: "2025-09-22 10:08:00")
-                    hour_key = start_time.split(' ')[1].split(':')[0] if ' ' in start_time else None
-                else:
-                    start_time = log_row[3].strftime('%Y-%m-%d %H:%M:%S')
-                    hour_key = log_row[3].strftime('%H')
-            
-            end_time = None
-            if log_row[4]:
-                if isinstance(log_row[4], str):
-                    end_time = log_row[4]
-                else:
-                    end_time = log_row[4].strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Skip if we can't determine the hour
-            if not hour_key:
-                continue
-            
-            # Create log entry
-            log_entry = {
-                "log_id": log_id,
-                "worker_id": worker_info["id"],
-                "name": worker_info["name"],
-                "mobile": worker_info["mobile"],
-                "epf_id": worker_info["epf_id"],
-                "warehouse_id": worker_info["warehouse_id"],
-                "role": worker_info["role"],
-                "start_time": start_time,
-                "end_time": end_time,
-                "camera_id": log_row[5]
-            }
-            
-            # Add presigned_url if crop_s3_url exists
-            if log_row[6]:
-                log_entry["presigned_url"] = log_row[6]
-            
-            # Group by role and hour
-            if role in ["hamali", "worker", "labour"]:
-                hamali_hourly_dict[hour_key].append(log_entry)
-            elif role in ["supervisor", "incharge"]:
-                supervisor_hourly_dict[hour_key].append(log_entry)
-        
-        # Format the response with hourly summaries
-        hamali_logs = []
-        for hour in sorted(hamali_hourly_dict.keys()):
-            hamali_logs.append({
-                "start_time": f"{hour}:00",
-                "end_time": f"{hour}:59",
-                "hourly_summery": hamali_hourly_dict[hour]
-            })
-        
-        supervisor_logs = []
-        for hour in sorted(supervisor_hourly_dict.keys()):
-            supervisor_logs.append({
-                "start_time": f"{hour}:00",
-                "end_time": f"{hour}:59",
-                "hourly_summery": supervisor_hourly_dict[hour]
-            })
-        
-        cur.close()
-        conn.close()
-        
-        return {
+        return DecimalORJSONResponse(content={
             "date": date,
             "warehouse_id": warehouse_id,
             "hamali_logs": hamali_logs,
             "supervisor_logs": supervisor_logs
-        }
+        })
         
     except HTTPException:
         raise
@@ -770,247 +842,178 @@ def get_hamali_logs(
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
-@app.get("/warehouses/details")
+@records_router.get("/warehouses/details")
 def get_all_warehouses_with_staff():
     """
     Get all warehouse details along with staff members and cameras for each warehouse
     """
+    cached = _cached_response(_details_cache, None, DETAILS_HEADERS)
+    if cached is not None:
+        return cached
+    
+    # Staff and cameras are filtered by warehouse in SQL rather than by the ids
+    # from the first query, so all three can run at the same time
+    warehouse_query = """
+        SELECT id, name, location, latitude, longitude, capacity
+        FROM warehouse."wh-warehouses"
+        ORDER BY id
+    """
+    staff_query = """
+        SELECT role, id, name, mobile, epf_id, warehouse_id
+        FROM warehouse."wh-workers"
+        WHERE warehouse_id IN (SELECT id FROM warehouse."wh-warehouses")
+        ORDER BY warehouse_id, role, name
+    """
+    # Camera columns already match the response keys
+    camera_query = """
+        SELECT camera_id, camera_name, warehouse_id, latitude, longitude, 
+               region_name, s3_bucket_url, stream_arn, status, transcript_s3_bucket_uri
+        FROM warehouse."wh-cameras"
+        WHERE warehouse_id IN (SELECT id FROM warehouse."wh-warehouses")
+        ORDER BY warehouse_id, camera_id
+    """
+    
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        
-        # Fetch all warehouses
-        warehouse_query = """
-            SELECT id, name, location, latitude, longitude, capacity
-            FROM warehouse."wh-warehouses"
-            ORDER BY id
-        """
-        cur.execute(warehouse_query)
-        warehouse_rows = cur.fetchall()
-        
-        if not warehouse_rows:
-            cur.close()
-            conn.close()
-            return {"warehouses": []}
-        
-        warehouses_list = []
-        
-        # For each warehouse, fetch its staff and cameras
-        for warehouse_row in warehouse_rows:
-            warehouse_id = warehouse_row[0]
-            
-            # Fetch staff details for this warehouse
-            staff_query = """
-                SELECT id, name, mobile, role, epf_id, warehouse_id
-                FROM warehouse."wh-workers"
-                WHERE warehouse_id = %s
-                ORDER BY role, name
-            """
-            cur.execute(staff_query, (warehouse_id,))
-            staff_rows = cur.fetchall()
-            
-            # Fetch camera details for this warehouse
-            camera_query = """
-                SELECT camera_id, camera_name, warehouse_id, latitude, longitude, 
-                       region_name, s3_bucket_url, stream_arn, status, transcript_s3_bucket_uri
-                FROM warehouse."wh-cameras"
-                WHERE warehouse_id = %s
-                ORDER BY camera_id
-            """
-            cur.execute(camera_query, (warehouse_id,))
-            camera_rows = cur.fetchall()
-            
-            # Build warehouse object
-            warehouse_data = {
-                "id": warehouse_row[0],
-                "name": warehouse_row[1],
-                "location": warehouse_row[2],
-                "latitude": warehouse_row[3],
-                "longitude": warehouse_row[4],
-                "capacity": warehouse_row[5],
-                "staff": [],
-                "cameras": [],
-                "total_cameras": len(camera_rows)
-            }
-            
-            # Add staff members
-            for staff_row in staff_rows:
-                staff_member = {
-                    "role": staff_row[3],
-                    "id": staff_row[0],
-                    "name": staff_row[1],
-                    "mobile": staff_row[2],
-                    "epf_id": staff_row[4]
-                }
-                warehouse_data["staff"].append(staff_member)
-            
-            # Add cameras
-            for camera_row in camera_rows:
-                camera_data = {
-                    "camera_id": camera_row[0],
-                    "camera_name": camera_row[1],
-                    "warehouse_id": camera_row[2],
-                    "latitude": camera_row[3],
-                    "longitude": camera_row[4],
-                    "region_name": camera_row[5],
-                    "s3_bucket_url": camera_row[6],
-                    "stream_arn": camera_row[7],
-                    "status": camera_row[8],
-                    "transcript_s3_bucket_uri": camera_row[9]
-                }
-                warehouse_data["cameras"].append(camera_data)
-            
-            warehouses_list.append(warehouse_data)
-        
-        cur.close()
-        conn.close()
-        
-        return {"warehouses": warehouses_list}
-        
+        warehouse_rows, staff_rows, camera_rows = fetch_concurrently(
+            ('all_warehouses', warehouse_query, ()),
+            ('all_staff', staff_query, ()),
+            ('all_cameras', camera_query, ())
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    staff_by_wh = defaultdict(list)
+    for staff_row in staff_rows:
+        staff_member = dict(staff_row)
+        staff_by_wh[staff_member.pop('warehouse_id')].append(staff_member)
+    
+    cams_by_wh = defaultdict(list)
+    for camera_row in camera_rows:
+        cams_by_wh[camera_row['warehouse_id']].append({**camera_row})
+    
+    warehouses_list = []
+    for warehouse_row in warehouse_rows:
+        cameras = cams_by_wh.get(warehouse_row['id'], [])
+        warehouses_list.append({
+            **warehouse_row,
+            "staff": staff_by_wh.get(warehouse_row['id'], []),
+            "cameras": cameras,
+            "total_cameras": len(cameras)
+        })
+    
+    return _cache_response(_details_cache, None, {"warehouses": warehouses_list}, DETAILS_HEADERS)
 
 
-@app.get("/warehouses/{warehouse_id}/details")
+@records_router.get("/warehouses/{warehouse_id}/details")
 def get_warehouse_with_staff(warehouse_id: str):
     """
     Get specific warehouse details along with staff members and cameras
     """
+    cached = _cached_response(_details_cache, warehouse_id, DETAILS_HEADERS)
+    if cached is not None:
+        return cached
+    
+    warehouse_query = """
+        SELECT id, name, location, latitude, longitude, capacity
+        FROM warehouse."wh-warehouses"
+        WHERE id = $1
+    """
+    staff_query = """
+        SELECT role, id, name, mobile, epf_id
+        FROM warehouse."wh-workers"
+        WHERE warehouse_id = $1
+        ORDER BY role, name
+    """
+    camera_query = """
+        SELECT camera_id, camera_name, warehouse_id, latitude, longitude, 
+               region_name, s3_bucket_url, stream_arn, status, transcript_s3_bucket_uri
+        FROM warehouse."wh-cameras"
+        WHERE warehouse_id = $1
+        ORDER BY camera_id
+    """
+    
+    # All three lookups only need the warehouse id, so run them side by side
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        
-        # Fetch warehouse details
-        warehouse_query = """
-            SELECT id, name, location, latitude, longitude, capacity
-            FROM warehouse."wh-warehouses"
-            WHERE id = %s
-        """
-        cur.execute(warehouse_query, (warehouse_id,))
-        warehouse_row = cur.fetchone()
-        
-        if not warehouse_row:
-            cur.close()
-            conn.close()
-            raise HTTPException(status_code=404, detail=f"Warehouse not found: {warehouse_id}")
-        
-        # Fetch staff details for this warehouse
-        staff_query = """
-            SELECT id, name, mobile, role, epf_id, warehouse_id
-            FROM warehouse."wh-workers"
-            WHERE warehouse_id = %s
-            ORDER BY role, name
-        """
-        cur.execute(staff_query, (warehouse_id,))
-        staff_rows = cur.fetchall()
-        
-        # Fetch camera details for this warehouse
-        camera_query = """
-            SELECT camera_id, camera_name, warehouse_id, latitude, longitude, 
-                   region_name, s3_bucket_url, stream_arn, status, transcript_s3_bucket_uri
-            FROM warehouse."wh-cameras"
-            WHERE warehouse_id = %s
-            ORDER BY camera_id
-        """
-        cur.execute(camera_query, (warehouse_id,))
-        camera_rows = cur.fetchall()
-        
-        # Build warehouse object
-        warehouse_data = {
-            "id": warehouse_row[0],
-            "name": warehouse_row[1],
-            "location": warehouse_row[2],
-            "latitude": warehouse_row[3],
-            "longitude": warehouse_row[4],
-            "capacity": warehouse_row[5],
-            "staff": [],
-            "cameras": [],
-            "total_cameras": len(camera_rows)
-        }
-        
-        # Add staff members
-        for staff_row in staff_rows:
-            staff_member = {
-                "role": staff_row[3],
-                "id": staff_row[0],
-                "name": staff_row[1],
-                "mobile": staff_row[2],
-                "epf_id": staff_row[4]
-            }
-            warehouse_data["staff"].append(staff_member)
-        
-        # Add cameras
-        for camera_row in camera_rows:
-            camera_data = {
-                "camera_id": camera_row[0],
-                "camera_name": camera_row[1],
-                "warehouse_id": camera_row[2],
-                "latitude": camera_row[3],
-                "longitude": camera_row[4],
-                "region_name": camera_row[5],
-                "s3_bucket_url": camera_row[6],
-                "stream_arn": camera_row[7],
-                "status": camera_row[8],
-                "transcript_s3_bucket_uri": camera_row[9]
-            }
-            warehouse_data["cameras"].append(camera_data)
-        
-        cur.close()
-        conn.close()
-        
-        return warehouse_data
-        
-    except HTTPException:
-        raise
+        warehouse_rows, staff_rows, camera_rows = fetch_concurrently(
+            ('warehouse_by_id', warehouse_query, (warehouse_id,)),
+            ('warehouse_staff', staff_query, (warehouse_id,)),
+            ('warehouse_cameras', camera_query, (warehouse_id,))
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    if not warehouse_rows:
+        raise HTTPException(status_code=404, detail=f"Warehouse not found: {warehouse_id}")
+    
+    cameras = [{**row} for row in camera_rows]
+    
+    # Build warehouse object
+    warehouse_data = {
+        **warehouse_rows[0],
+        "staff": [{**row} for row in staff_rows],
+        "cameras": cameras,
+        "total_cameras": len(cameras)
+    }
+    
+    return _cache_response(_details_cache, warehouse_id, warehouse_data, DETAILS_HEADERS)
+
+
+def _stream_camera_videos(resources, cur, camera_id):
+    """Yield the /Camera_Chunks JSON body one server-side cursor batch at a time"""
+    try:
+        yield b'{"camera_id":' + orjson.dumps(camera_id) + b',"videos":['
+        total_videos = 0
+        while True:
+            rows = cur.fetchmany(VIDEOS_STREAM_ITERSIZE)
+            if not rows:
+                break
+            batch = b','.join(orjson.dumps(row, default=orjson_default) for row in rows)
+            yield b',' + batch if total_videos else batch
+            total_videos += len(rows)
+        yield b'],"total_videos":' + orjson.dumps(total_videos) + b'}'
+    finally:
+        resources.close()
 
 
-@app.get("/Camera_Chunks")
+@records_router.get("/Camera_Chunks")
 def get_gunny_bag_videos(
     camera_id: str = Query(..., description="Camera ID to filter videos")
 ):
     """
     Get all video S3 URLs from gunny-bag-logs table for a specific camera
     
+    Cameras can have very long histories, so rows are read through a named
+    cursor and streamed out as they arrive; total_videos follows the list.
+    
     Example: /Camera_Chunks?camera_id=1
     """
+    resources = ExitStack()
     try:
-        conn = get_connection()
-        cur = conn.cursor()
+        conn = resources.enter_context(db_connection())
+        cur = conn.cursor(name=f"videos_{secrets.token_hex(8)}", cursor_factory=RealDictCursor)
+        resources.callback(cur.close)
         
         # Fetch all video URLs for the given camera_id
         query = """
-            SELECT id, camera_id, video_s3_url, created_at
-            FROM warehouse."wh-gunny-bag-logs"
-            WHERE camera_id = %s AND video_s3_url IS NOT NULL
-            ORDER BY created_at DESC
+            SELECT g.id AS log_id, g.camera_id, g.video_s3_url,
+                   to_char(g.created_at, 'YYYY-MM-DD HH24:MI:SS') AS created_at
+            FROM warehouse."wh-gunny-bag-logs" g
+            WHERE g.camera_id = %s AND g.video_s3_url IS NOT NULL
+            ORDER BY g.created_at DESC
         """
         cur.execute(query, (camera_id,))
-        rows = cur.fetchall()
-        
-        # Format the response
-        videos = []
-        for row in rows:
-            video_entry = {
-                "log_id": row[0],
-                "camera_id": row[1],
-                "video_s3_url": row[2],
-                "created_at": row[3].strftime('%Y-%m-%d %H:%M:%S') if row[3] else None
-            }
-            videos.append(video_entry)
-        
-        cur.close()
-        conn.close()
-        
-        return {
-            "camera_id": camera_id,
-            "total_videos": len(videos),
-            "videos": videos
-        }
-        
     except Exception as e:
+        resources.close()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    return StreamingResponse(
+        _stream_camera_videos(resources, cur, camera_id),
+        media_type="application/json",
+        # Also releases the connection if the client leaves before the body starts
+        background=BackgroundTask(resources.close)
+    )
+
+app.include_router(records_router)
 
 
 # ==========================================
@@ -1030,7 +1033,11 @@ if __name__ == "__main__":
         host = "20.46.250.11"
         logger.info(f"Starting FastAPI server on {host}:{port}")
         logger.info(f"API available at http://{host}:{port}/")
-        uvicorn.run(app, host=host, port=port, reload=True, log_level=LOG_LEVEL.lower())
+        if os.getenv("ENV", "dev") == "dev":
+            uvicorn.run(app, host=host, port=port, reload=True, log_level=LOG_LEVEL.lower())
+        else:
+            # Served from an app object, so a single worker; run the app/ package for multi-worker
+            uvicorn.run(app, host=host, port=port, loop="uvloop", http="httptools", log_level=LOG_LEVEL.lower())
     else:
         # Run as CLI script (original behavior)
         # Example payload - CHANGE THESE VALUES
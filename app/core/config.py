@@ -4,7 +4,7 @@ Reads environment variables from .env file
 """
 
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -16,11 +16,27 @@ class Settings(BaseSettings):
     PG_USER: str
     PG_PASSWORD: str
     PG_DATABASE: str
+    PG_POOL_MIN: int = 5
+    PG_POOL_MAX: int = 20
+    PG_POOL_TIMEOUT: float = 2.0
+    THREADPOOL_SIZE: int = 100
+    DB_STREAM_ITERSIZE: int = 2000
+    DB_FANOUT_WORKERS: int = 6
+    STREAM_URL_CACHE_TTL: int = 45
+    CAMERA_ROW_CACHE_TTL: int = 300
+    TRANSCRIPT_CACHE_TTL: int = 3600
+    TRANSCRIPT_LISTING_TTL: int = 60
+    TRANSCRIPT_NAME_PREFIX: str = ""
+    TRANSCRIPT_DOWNLOAD_WORKERS: Optional[int] = None
     
     # AWS Configuration
     AWS_ACCESS_KEY: str
     AWS_SECRET_KEY: str
     AWS_REGION: str = "us-east-1"
+    BEDROCK_WORKERS: int = 32
+    CHAT_HISTORY_WINDOW: int = 20
+    CHAT_HISTORY_KEEP: int = 10
+    CHAT_SUMMARY_CACHE_TTL: int = 3600
     
     # Azure Configuration
     AZURE_TENANT_ID: str
@@ -33,6 +49,9 @@ class Settings(BaseSettings):
     APP_TITLE: str = "Warehouse API - RESTful"
     APP_VERSION: str = "1.0.0"
     LOG_LEVEL: str = "INFO"
+    ENV: str = "dev"
+    WORKERS: Optional[int] = None
+    CORS_ORIGINS: List[str] = ["*"]
     
     class Config:
         env_file = ".env"
@@ -2,30 +2,125 @@
 Database connection management
 """
 
-import psycopg2
-from psycopg2.extensions import connection
+from psycopg2.extensions import connection, cursor
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
 from app.core.config import settings
+from app.core.pool import LeasedPool, PreparingConnection, execute_prepared, run_concurrently
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
+_pool = LeasedPool(
+    settings.PG_POOL_MIN,
+    settings.PG_POOL_MAX,
+    settings.PG_POOL_TIMEOUT,
+    host=settings.PG_HOST,
+    port=settings.PG_PORT,
+    user=settings.PG_USER,
+    password=settings.PG_PASSWORD,
+    database=settings.PG_DATABASE
+)
+
+
+def init_pool() -> None:
+    """Create the process-wide PostgreSQL connection pool if it does not exist yet"""
+    try:
+        _pool.open()
+    except Exception as e:
+        logger.error(f"Database connection error: {e}")
+        raise
+
+
+def close_pool() -> None:
+    """Close every pooled connection"""
+    _pool.close()
+
 
 def get_connection() -> connection:
     """
-    Create and return a PostgreSQL database connection
+    Lease a PostgreSQL database connection from the pool
+    
+    Waits up to PG_POOL_TIMEOUT seconds when every connection is in use.
     
     Returns:
         connection: PostgreSQL database connection
     """
+    return _pool.getconn()
+
+
+def release_connection(conn: connection) -> None:
+    """Return a leased connection to the pool"""
+    _pool.putconn(conn)
+
+
+def server_cursor(conn: connection):
+    """
+    Open a named (server-side) cursor on a leased connection
+    
+    Iterating it pulls rows from PostgreSQL DB_STREAM_ITERSIZE at a time
+    instead of materializing the whole result like fetchall().
+    """
+    cur = conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+    cur.itersize = settings.DB_STREAM_ITERSIZE
+    return cur
+
+
+@contextmanager
+def get_conn() -> Iterator[connection]:
+    """
+    Lease a pooled connection for the duration of a with-block
+    
+    The connection goes back to the pool even when the block raises.
+    """
+    conn = get_connection()
     try:
-        conn = psycopg2.connect(
-            host=settings.PG_HOST,
-            port=settings.PG_PORT,
-            user=settings.PG_USER,
-            password=settings.PG_PASSWORD,
-            database=settings.PG_DATABASE
-        )
-        return conn
-    except Exception as e:
-        logger.error(f"Database connection error: {e}")
-        raise
+        yield conn
+    finally:
+        release_connection(conn)
+
+
+@contextmanager
+def db_cursor() -> Iterator[Tuple[connection, cursor]]:
+    """
+    Lease a pooled connection and open a cursor on it for a with-block
+    
+    The transaction commits when the block exits normally and rolls back when
+    it raises; either way the cursor is closed and the connection returned.
+    """
+    with get_conn() as conn:
+        cur = conn.cursor()
+        try:
+            yield conn, cur
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+# Runs independent read queries of one request side by side, each on its own
+# pooled connection, so their round trips overlap instead of adding up
+_fanout_executor = ThreadPoolExecutor(
+    max_workers=settings.DB_FANOUT_WORKERS,
+    thread_name_prefix="db-fanout"
+)
+
+
+def _fetch_rows(name: str, sql: str, params: tuple = ()) -> list:
+    """Run one prepared read query on its own pooled connection and return its rows"""
+    with db_cursor() as (conn, cur):
+        execute_prepared(cur, name, sql, params)
+        return cur.fetchall()
+
+
+def fetch_concurrently(*queries: Tuple[str, str, tuple]) -> List[list]:
+    """
+    Run independent (name, sql, params) prepared statements in parallel
+    
+    Returns each query's rows in the order the queries were given.
+    """
+    return run_concurrently(_fanout_executor, _fetch_rows, queries)
@@ -0,0 +1,125 @@
+"""
+PostgreSQL connection pooling shared by the API and the legacy app.py service
+
+Nothing here reads application settings, so app.py can use it with its own
+environment-based configuration.
+"""
+
+from psycopg2.extensions import connection
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+from concurrent.futures import Executor
+from typing import Callable, Iterable, List, Optional
+import threading
+
+
+class PreparingConnection(connection):
+    """Connection that remembers which statements have been PREPAREd on it"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+def execute_prepared(cur, name: str, sql: str, params: tuple = ()) -> None:
+    """
+    Execute a server-side prepared statement, preparing it on first use per connection
+
+    sql uses $1, $2, ... placeholders. The name is recorded on the connection
+    only once its PREPARE has succeeded, so a failed PREPARE is retried on the
+    next use rather than leaving an EXECUTE of a statement that doesn't exist.
+    """
+    conn = cur.connection
+    if name not in conn.prepared:
+        cur.execute(f"PREPARE {name} AS {sql}")
+        conn.prepared.add(name)
+    if not params:
+        cur.execute(f"EXECUTE {name}")
+        return
+    placeholders = ", ".join(["%s"] * len(params))
+    cur.execute(f"EXECUTE {name} ({placeholders})", params)
+
+
+class LeasedPool:
+    """
+    Process-wide ThreadedConnectionPool, opened on first use
+
+    ThreadedConnectionPool raises as soon as it is exhausted; leases here queue
+    for a free connection instead, up to `timeout` seconds. Creation holds a
+    lock, so requests racing a failed startup open build one pool between them.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, timeout: float, **connect_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.connect_kwargs = connect_kwargs
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._lock = threading.Lock()
+        self._leases = threading.BoundedSemaphore(maxconn)
+
+    def _warm(self, pool: ThreadedConnectionPool) -> None:
+        """Run a trivial query on each of the pool's idle connections so the first requests skip backend startup"""
+        conns = [pool.getconn() for _ in range(self.minconn)]
+        try:
+            for conn in conns:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+        finally:
+            for conn in conns:
+                pool.putconn(conn)
+
+    def open(self) -> ThreadedConnectionPool:
+        """Create and warm the pool if it does not exist yet"""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    pool = ThreadedConnectionPool(
+                        self.minconn,
+                        self.maxconn,
+                        connection_factory=PreparingConnection,
+                        **self.connect_kwargs
+                    )
+                    try:
+                        self._warm(pool)
+                    except Exception:
+                        pool.closeall()
+                        raise
+                    self._pool = pool
+        return self._pool
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+
+    def getconn(self) -> connection:
+        """Lease a connection, waiting up to `timeout` seconds when every one is in use"""
+        if not self._leases.acquire(timeout=self.timeout):
+            raise PoolError("timed out waiting for a pooled connection")
+        try:
+            return self.open().getconn()
+        except Exception:
+            self._leases.release()
+            raise
+
+    def putconn(self, conn: connection) -> None:
+        """Return a leased connection"""
+        try:
+            if self._pool is not None:
+                self._pool.putconn(conn)
+        finally:
+            # The lease is given back even if putconn raises, so the limit never shrinks
+            self._leases.release()
+
+
+def run_concurrently(executor: Executor, fetch: Callable[..., list], queries: Iterable[tuple]) -> List[list]:
+    """
+    Run fetch(*query) for each query on the executor so their round trips overlap
+
+    Returns each query's result in the order the queries were given.
+    """
+    futures = [executor.submit(fetch, *query) for query in queries]
+    return [future.result() for future in futures]
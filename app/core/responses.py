@@ -0,0 +1,32 @@
+"""
+JSON response classes
+"""
+
+from decimal import Decimal
+from typing import Any
+from fastapi.responses import ORJSONResponse
+import orjson
+
+
+def orjson_default(obj: Any) -> Any:
+    """Serialize values orjson does not handle natively (NUMERIC columns arrive as Decimal)"""
+    if isinstance(obj, Decimal):
+        # As FastAPI's jsonable_encoder does: whole numbers (SUMs, counts) stay integers
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def json_dumps(content: Any) -> bytes:
+    """Encode raw DB values to JSON bytes the way DecimalORJSONResponse does"""
+    return orjson.dumps(content, default=orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class DecimalORJSONResponse(ORJSONResponse):
+    """
+    ORJSONResponse that can be returned straight from a handler holding raw DB values
+    
+    Returning it directly skips FastAPI's jsonable_encoder pass over the content.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
@@ -4,9 +4,14 @@ Main FastAPI application entry point
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from anyio import to_thread
 from app.core.config import settings
+from app.core.database import init_pool, close_pool
 from app.routers import warehouse, camera, chat
+from app.services.azure_service import get_blob_service_client
 import logging
+import os
 
 # Configure logging
 logging.basicConfig(
@@ -19,13 +24,14 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title=settings.APP_TITLE,
     version=settings.APP_VERSION,
-    description="RESTful API for warehouse management with AI-powered video analytics"
+    description="RESTful API for warehouse management with AI-powered video analytics",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -37,6 +43,38 @@ app.include_router(camera.router)
 app.include_router(chat.router)
 
 
+@app.on_event("startup")
+def open_db_pool():
+    """Open the PostgreSQL connection pool before the first request"""
+    try:
+        init_pool()
+    except Exception:
+        # The pool is created lazily on the first request if the database is not reachable yet
+        logger.warning("Database pool could not be opened at startup")
+
+
+@app.on_event("startup")
+def open_blob_client():
+    """Create the Azure Blob client up front so the first chat does not pay for it"""
+    try:
+        get_blob_service_client()
+    except Exception:
+        # Transcript calls create it on first use once Azure is reachable
+        logger.warning("Azure Blob client could not be created at startup")
+
+
+@app.on_event("startup")
+async def size_threadpool():
+    """Let more sync handlers run at once than AnyIO's default of 40 threads"""
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+
+
+@app.on_event("shutdown")
+def close_db_pool():
+    """Close pooled PostgreSQL connections"""
+    close_pool()
+
+
 @app.get("/")
 @app.get("/health")
 def health_check():
@@ -64,10 +102,22 @@ if __name__ == "__main__":
     import uvicorn
     
     logger.info(f"Starting {settings.APP_TITLE} v{settings.APP_VERSION}")
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8081,
-        reload=True,
-        log_level=settings.LOG_LEVEL.lower()
-    )
+    if settings.ENV == "dev":
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8081,
+            reload=True,
+            log_level=settings.LOG_LEVEL.lower()
+        )
+    else:
+        # One worker per core; uvloop and httptools ship with uvicorn[standard]
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8081,
+            workers=settings.WORKERS or os.cpu_count(),
+            loop="uvloop",
+            http="httptools",
+            log_level=settings.LOG_LEVEL.lower()
+        )
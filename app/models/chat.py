@@ -2,7 +2,7 @@
 Pydantic models for Chat API requests and responses
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
 
 
@@ -16,16 +16,22 @@ class ConversationMessage(BaseModel):
 
 
 class InferenceConfig(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     maxTokens: Optional[int] = Field(1000, description="Maximum tokens in response")
     temperature: Optional[float] = Field(0.7, description="Temperature for response randomness")
     topP: Optional[float] = Field(0.9, description="Top P sampling parameter")
 
 
+# Frozen, so every request without an inferenceConfig can share one instance
+_DEFAULT_INFERENCE_CONFIG = InferenceConfig()
+
+
 class ChatRequest(BaseModel):
     UserQuery: str = Field(..., description="User's question about the video")
     modelId: str = Field("anthropic.claude-3-5-haiku-20241022-v1:0", description="Bedrock model ID")
-    conversation: Optional[List[ConversationMessage]] = Field([], description="Previous conversation history")
-    inferenceConfig: Optional[InferenceConfig] = Field(default_factory=InferenceConfig)
+    conversation: Optional[List[ConversationMessage]] = Field(default_factory=list, description="Previous conversation history")
+    inferenceConfig: Optional[InferenceConfig] = Field(_DEFAULT_INFERENCE_CONFIG)
     chatTransactionId: Optional[str] = Field(None, description="Transaction ID for tracking")
 
 
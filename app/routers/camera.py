@@ -1,17 +1,127 @@
 """Camera router - Endpoints for camera streams, chunks, and logs
 """
 
-from fastapi import APIRouter, HTTPException, Path, Query
-from app.core.database import get_connection
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.core.config import settings
+from app.core.database import (
+    db_cursor,
+    execute_prepared,
+    fetch_concurrently,
+    get_conn,
+    server_cursor
+)
+from app.core.responses import DecimalORJSONResponse, json_dumps
 from app.services.aws_service import get_hls_streaming_url
 from botocore.exceptions import ClientError
-from datetime import datetime
-from collections import defaultdict
+from cachetools import TTLCache
+from contextlib import ExitStack
+from datetime import date as dt_date, datetime
+from itertools import groupby
+from operator import itemgetter
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1", tags=["cameras"])
 
+# Successful stream-url responses by (warehouse_id, cam_id). HLS session URLs stay
+# valid far longer than the TTL, so polling clients can share one Kinesis lookup.
+_stream_url_cache = TTLCache(maxsize=1024, ttl=settings.STREAM_URL_CACHE_TTL)
+_stream_url_cache_lock = threading.Lock()
+
+# public.cameras rows by (warehouse_id, cam_id) for the stream-url route
+_camera_row_cache = TTLCache(maxsize=1024, ttl=settings.CAMERA_ROW_CACHE_TTL)
+_camera_row_cache_lock = threading.Lock()
+
+
+def query_date(
+    date: str = Query(..., description="Date in YYYY-MM-DD format")
+) -> dt_date:
+    """
+    Parse the ?date= query parameter once for a route
+    
+    The date object binds to psycopg2 as a SQL date, and serializes back to the
+    same YYYY-MM-DD string in responses.
+    """
+    try:
+        return datetime.strptime(date, '%Y-%m-%d').date()
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid date format. Use YYYY-MM-DD"
+        )
+
+
+# isoformat() is much cheaper per row than strftime(); slicing keeps the old
+# output exactly (no fractional seconds or UTC offset, date part of a datetime)
+def _iso_date(value):
+    """Format a date (or datetime) as YYYY-MM-DD"""
+    return value.isoformat()[:10]
+
+
+def _iso_datetime(value):
+    """Format a datetime as YYYY-MM-DD HH:MM:SS"""
+    return value.isoformat(' ', 'seconds')[:19]
+
+
+def _iso_time(value):
+    """Format a datetime's time of day as HH:MM:SS"""
+    return value.time().isoformat('seconds')
+
+
+def _time_range(first, last):
+    """Format a first/last sighting pair as "HH:MM:SS-HH:MM:SS", or None without a first"""
+    if not first:
+        return None
+    return f"{_iso_time(first)}-{_iso_time(last or first)}"
+
+
+def _log_hour(row):
+    """Hour of an employee log row's timestamp (the time column, eighth selected)"""
+    return row[7].hour
+
+
+def _camera_row(warehouse_id, cam_id):
+    """
+    Look up a camera's row, serving it from the in-process cache when possible
+    
+    The stream ARN and direction rarely change. Missing cameras are not cached,
+    so a newly registered camera is picked up on the next request.
+    """
+    cache_key = (warehouse_id, cam_id)
+    with _camera_row_cache_lock:
+        camera_row = _camera_row_cache.get(cache_key)
+    if camera_row is not None:
+        return camera_row
+    
+    camera_query = """
+        SELECT 
+            cam_id,
+            warehouse_id,
+            stream_arn,
+            hls_url,
+            cam_direction,
+            camera_status
+        FROM public.cameras
+        WHERE warehouse_id = $1 AND cam_id = $2
+    """
+    with db_cursor() as (conn, cur):
+        execute_prepared(cur, "cam_stream", camera_query, (warehouse_id, cam_id))
+        camera_row = cur.fetchone()
+    
+    if camera_row:
+        with _camera_row_cache_lock:
+            _camera_row_cache[cache_key] = camera_row
+    return camera_row
+
+
+def _forget_camera_row(warehouse_id, cam_id):
+    """Drop a camera's cached row so the next request reads it again"""
+    with _camera_row_cache_lock:
+        _camera_row_cache.pop((warehouse_id, cam_id), None)
+
 
 @router.get("/cameras/stream-url")
 def get_camera_stream_url(
@@ -19,104 +129,71 @@ def get_camera_stream_url(
     cam_id: str = Query(..., description="Camera ID")
 ):
     """Get HLS streaming URL for a specific camera"""
-    conn = None
+    cache_key = (warehouse_id, cam_id)
+    with _stream_url_cache_lock:
+        cached = _stream_url_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        
-        camera_query = """
-            SELECT 
-                cam_id,
-                warehouse_id,
-                stream_arn,
-                hls_url,
-                cam_direction,
-                camera_status
-            FROM public.cameras
-            WHERE warehouse_id = %s AND cam_id = %s
-        """
-        cur.execute(camera_query, (warehouse_id, cam_id))
-        camera_row = cur.fetchone()
-        
+        camera_row = _camera_row(warehouse_id, cam_id)
         if not camera_row:
-            cur.close()
-            conn.close()
             raise HTTPException(
                 status_code=404,
                 detail=f"Camera not found: cam_id={cam_id}, warehouse_id={warehouse_id}"
             )
         
         stream_arn = camera_row[2]
-
-        print("---------stream_arn",stream_arn)
+        logger.debug("stream_arn=%s", stream_arn)
         
         if not stream_arn:
-            cur.close()
-            conn.close()
             raise HTTPException(
                 status_code=400,
                 detail=f"Stream ARN not configured for camera: {cam_id}"
             )
         
-        # Get HLS streaming URL using service
+        # Get HLS streaming URL using service; no pooled connection is held meanwhile
         hls_data = get_hls_streaming_url(stream_arn)
-
-        print("---------hls_data",hls_data)
-
-   
-        # Check if HLS URL is missing or None
-        if ( hls_data["hls_url"] is None
-            or hls_data["hls_url"] == ""
-        ):
-            update_inactive_query = """
-                UPDATE public.cameras
-                SET camera_status = 'inactive', hls_url = NULL,last_updated_at = DATE_TRUNC('second', NOW())
-                WHERE warehouse_id = %s AND cam_id = %s
-            """
-            cur.execute(update_inactive_query, (warehouse_id, cam_id))
-            conn.commit()
-            cur.close()
-            conn.close()
-
-            raise HTTPException(
-                status_code=400,
-                detail=f"No HLS URL found for camera {cam_id}. Marked camera_status = 'inactive'."
-            )
-
-        # If no HLS data found → Mark camera inactive
-        if not hls_data or not hls_data.get("hls_url"):
-            update_inactive_query = """
-                UPDATE public.cameras
-                SET camera_status = 'inactive', hls_url = NULL,last_updated_at = DATE_TRUNC('second', NOW())
-                WHERE warehouse_id = %s AND cam_id = %s
-            """
-            cur.execute(update_inactive_query, (warehouse_id, cam_id))
-            conn.commit()
-            cur.close()
-            conn.close()
+        logger.debug("hls_data=%s", hls_data)
+
+        with db_cursor() as (conn, cur):
+            # The status UPDATEs only apply while the row still has the ARN the URL
+            # was fetched for, so a camera re-pointed at another stream mid-request
+            # keeps its new configuration
+            if not hls_data or not hls_data.get("hls_url"):
+                update_inactive_query = """
+                    UPDATE public.cameras
+                    SET camera_status = 'inactive', hls_url = NULL,last_updated_at = DATE_TRUNC('second', NOW())
+                    WHERE warehouse_id = $1 AND cam_id = $2 AND stream_arn = $3
+                """
+                execute_prepared(cur, "cam_mark_inactive", update_inactive_query, (warehouse_id, cam_id, stream_arn))
+                if cur.rowcount == 0:
+                    _forget_camera_row(warehouse_id, cam_id)
+                # Committed here since db_cursor() rolls back when the block raises
+                conn.commit()
             
-            raise HTTPException(
-                status_code=400,
-                detail=f"No HLS URL found for camera {cam_id}. Marked camera_status = 'inactive'."
-            )
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"No HLS URL found for camera {cam_id}. Marked camera_status = 'inactive'."
+                )
 
         
-        # Update database with new HLS URL
-        update_query = """
-            UPDATE public.cameras
-            SET camera_status = 'active', hls_url = %s,last_updated_at = DATE_TRUNC('second', NOW())
-            WHERE warehouse_id = %s AND cam_id = %s
-        """
-        cur.execute(update_query, (hls_data["hls_url"], warehouse_id, cam_id))
-        conn.commit()
+            # Update database with new HLS URL
+            update_query = """
+                UPDATE public.cameras
+                SET camera_status = 'active', hls_url = $1,last_updated_at = DATE_TRUNC('second', NOW())
+                WHERE warehouse_id = $2 AND cam_id = $3 AND stream_arn = $4
+            """
+            execute_prepared(cur, "cam_mark_active", update_query, (hls_data["hls_url"], warehouse_id, cam_id, stream_arn))
+            rows_updated = cur.rowcount
         
-        rows_updated = cur.rowcount
-        cur.close()
-        conn.close()
+        if rows_updated == 0:
+            # The cached row is stale: the camera was removed or re-pointed
+            _forget_camera_row(warehouse_id, cam_id)
         
         update_status = "Camera status updated to 'active' and HLS URL saved" if rows_updated > 0 else "Camera update failed"
         
-        return {
+        response = {
             "status": "success",
             "stream_arn": stream_arn,
             "stream_name": hls_data["stream_name"],
@@ -127,12 +204,14 @@ def get_camera_stream_url(
             "data_endpoint": hls_data["data_endpoint"],
             "database_update": update_status
         }
+        if rows_updated > 0:
+            with _stream_url_cache_lock:
+                _stream_url_cache[cache_key] = response
+        return response
         
     except HTTPException:
         raise
     except ClientError as e:
-        if conn:
-            conn.close()
         error_code = e.response['Error']['Code']
         error_message = e.response['Error']['Message']
         logger.error(f"AWS Error: {error_code} - {error_message}")
@@ -141,8 +220,6 @@ def get_camera_stream_url(
             detail=f"AWS Kinesis Error: {error_code} - {error_message}"
         )
     except Exception as e:
-        if conn:
-            conn.close()
         logger.error(f"Error getting HLS URL: {e}")
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -151,74 +228,63 @@ def get_camera_stream_url(
 def get_camera_chunks(
     warehouse_id: str = Path(..., description="Warehouse ID (e.g., WH001)"),
     cam_id: str = Path(..., description="Camera ID"),
-    date: str = Query(..., description="Date in YYYY-MM-DD format")
+    date: dt_date = Depends(query_date)
 ):
     """Get video chunks for a specific camera and date"""
     try:
-        try:
-            datetime.strptime(date, '%Y-%m-%d')
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid date format. Use YYYY-MM-DD"
-            )
-        
-        conn = get_connection()
-        cur = conn.cursor()
+        with db_cursor() as (conn, cur):
         
-        chunks_query = """
-            SELECT 
-                chunk_id,
-                warehouse_id,
-                cam_id,
-                chunk_blob_url,
-                transcripts_url,
-                date,
-                time
-            FROM public.wh_chunks
-            WHERE warehouse_id = %s AND cam_id = %s AND date = %s
-            ORDER BY time
-        """
-        cur.execute(chunks_query, (warehouse_id, cam_id, date))
-        chunk_rows = cur.fetchall()
-        
-        if not chunk_rows:
-            cur.close()
-            conn.close()
-            return {
-                "status": "success",
-                "message": "No chunks found for the given criteria",
-                "warehouse_id": warehouse_id,
-                "cam_id": cam_id,
-                "date": date,
-                "total_chunks": 0,
-                "chunks": []
-            }
-        
-        chunks = []
-        for chunk_row in chunk_rows:
-            chunk = {
-                "chunk_id": chunk_row[0],
-                "warehouse_id": chunk_row[1],
-                "cam_id": chunk_row[2],
-                "chunk_blob_url": chunk_row[3],
-                "transcripts_url": chunk_row[4],
-                "date": chunk_row[5].strftime('%Y-%m-%d') if chunk_row[5] else None,
-                "time": chunk_row[6].strftime('%Y-%m-%d %H:%M:%S') if chunk_row[6] else None
-            }
-            chunks.append(chunk)
+            chunks_query = """
+                SELECT 
+                    chunk_id,
+                    warehouse_id,
+                    cam_id,
+                    chunk_blob_url,
+                    transcripts_url,
+                    date,
+                    time
+                FROM public.wh_chunks
+                WHERE warehouse_id = $1 AND cam_id = $2 AND date = $3
+                ORDER BY time
+            """
+            execute_prepared(cur, "cam_chunks", chunks_query, (warehouse_id, cam_id, date))
+            chunk_rows = cur.fetchall()
+        
+            if not chunk_rows:
+                return DecimalORJSONResponse({
+                    "status": "success",
+                    "message": "No chunks found for the given criteria",
+                    "warehouse_id": warehouse_id,
+                    "cam_id": cam_id,
+                    "date": date,
+                    "total_chunks": 0,
+                    "chunks": []
+                })
         
-        cur.close()
-        conn.close()
+            chunks = [
+                {
+                    "chunk_id": row_chunk_id,
+                    "warehouse_id": row_warehouse_id,
+                    "cam_id": row_cam_id,
+                    "chunk_blob_url": chunk_blob_url,
+                    "transcripts_url": transcripts_url,
+                    "date": _iso_date(chunk_date) if chunk_date else None,
+                    "time": _iso_datetime(chunk_time) if chunk_time else None
+                }
+                for (
+                    row_chunk_id, row_warehouse_id, row_cam_id, chunk_blob_url,
+                    transcripts_url, chunk_date, chunk_time
+                ) in chunk_rows
+            ]
         
-        return {
+        return DecimalORJSONResponse({
             "status": "success",
             "warehouse_id": warehouse_id,
             "cam_id": cam_id,
             "date": date,
             "total_chunks": len(chunks),
             "chunks": chunks
-        }
+        })
         
     except HTTPException:
         raise
@@ -231,48 +297,45 @@ def get_chunk_by_id(
     chunk_id: str = Path(..., description="Chunk ID")
 ):
     """Get chunk blob URL and metadata by chunk_id"""
-    conn = None
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-
-        chunk_query = """
-            SELECT
-                chunk_id,
-                warehouse_id,
-                cam_id,
-                chunk_blob_url,
-                transcripts_url,
-                date,
-                time
-            FROM public.wh_chunks
-            WHERE chunk_id = %s
-            LIMIT 1
-        """
-        cur.execute(chunk_query, (chunk_id,))
-        row = cur.fetchone()
+        with db_cursor() as (conn, cur):
+
+            chunk_query = """
+                SELECT
+                    chunk_id,
+                    warehouse_id,
+                    cam_id,
+                    chunk_blob_url,
+                    transcripts_url,
+                    date,
+                    time
+                FROM public.wh_chunks
+                WHERE chunk_id = $1
+                LIMIT 1
+            """
+            execute_prepared(cur, "chunk_by_id", chunk_query, (chunk_id,))
+            row = cur.fetchone()
 
         if not row:
-            cur.close()
-            conn.close()
             raise HTTPException(
                 status_code=404,
                 detail=f"Chunk not found: chunk_id={chunk_id}"
             )
 
+        (
+            row_chunk_id, warehouse_id, cam_id, chunk_blob_url,
+            transcripts_url, chunk_date, chunk_time
+        ) = row
         chunk = {
-            "chunk_id": row[0],
-            "warehouse_id": row[1],
-            "cam_id": row[2],
-            "chunk_blob_url": row[3],
-            "transcripts_url": row[4],
-            "date": row[5].strftime('%Y-%m-%d') if row[5] else None,
-            "time": row[6].strftime('%Y-%m-%d %H:%M:%S') if row[6] else None
+            "chunk_id": row_chunk_id,
+            "warehouse_id": warehouse_id,
+            "cam_id": cam_id,
+            "chunk_blob_url": chunk_blob_url,
+            "transcripts_url": transcripts_url,
+            "date": _iso_date(chunk_date) if chunk_date else None,
+            "time": _iso_datetime(chunk_time) if chunk_time else None
         }
 
-        cur.close()
-        conn.close()
-
         return {
             "status": "success",
             "chunk": chunk
@@ -281,8 +344,6 @@ def get_chunk_by_id(
     except HTTPException:
         raise
     except Exception as e:
-        if conn:
-            conn.close()
         logger.error(f"Error fetching chunk by id: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
@@ -291,21 +352,42 @@ def get_chunk_by_id(
 def get_employee_logs(
     warehouse_id: str = Path(..., description="Warehouse ID (e.g., WH001)"),
     cam_id: str = Path(..., description="Camera ID"),
-    date: str = Query(..., description="Date in YYYY-MM-DD format")
+    date: dt_date = Depends(query_date)
 ):
-    """Get employee logs for a specific camera and date"""
+    """
+    Get employee logs for a specific camera and date
+    
+    The body is streamed one hour at a time while rows arrive from a server-side
+    cursor, so busy days neither buffer the whole payload nor delay the first byte.
+    """
+    resources = ExitStack()
     try:
-        try:
-            datetime.strptime(date, '%Y-%m-%d')
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid date format. Use YYYY-MM-DD"
-            )
+        conn = resources.enter_context(get_conn())
+        
+        # Day totals come from one aggregate, so the stream below only has to
+        # build the hourly logs (and is skipped entirely on an empty day)
+        totals_query = """
+            SELECT COUNT(*), COUNT(DISTINCT NULLIF(emp_id, ''))
+            FROM public.wh_emp_logs
+            WHERE warehouse_id = $1 AND cam_id = $2 AND date = $3
+        """
+        with conn.cursor() as cur:
+            execute_prepared(cur, "emp_log_totals", totals_query, (warehouse_id, cam_id, date))
+            total_logs, unique_employees = cur.fetchone()
         
-        conn = get_connection()
-        cur = conn.cursor()
+        if not total_logs:
+            resources.close()
+            return DecimalORJSONResponse({
+                "status": "success",
+                "message": "No employee logs found for the given criteria",
+                "warehouse_id": warehouse_id,
+                "cam_id": cam_id,
+                "date": date,
+                "total_logs": 0,
+                "hourly_ranges": []
+            })
         
+        # Untimed logs count towards the totals above but belong to no hour
         emp_logs_query = """
             SELECT 
                 el.id,
@@ -324,169 +406,165 @@ def get_employee_logs(
             LEFT JOIN public.wh_emp_data e ON el.emp_id = e.emp_id
             LEFT JOIN public.wh_emp_role r ON e.role_id = r.role_id
             WHERE el.warehouse_id = %s AND el.cam_id = %s AND el.date = %s
+                AND el.time IS NOT NULL
             ORDER BY el.time
         """
+        cur = resources.enter_context(server_cursor(conn))
+        # Named cursors DECLARE their query, which cannot wrap an EXECUTE, so
+        # the streamed routes keep plain parameterized SQL
         cur.execute(emp_logs_query, (warehouse_id, cam_id, date))
-        log_rows = cur.fetchall()
         
-        if not log_rows:
-            cur.close()
-            conn.close()
-            return {
-                "status": "success",
-                "message": "No employee logs found for the given criteria",
-                "warehouse_id": warehouse_id,
-                "cam_id": cam_id,
-                "date": date,
-                "total_logs": 0,
-                "hourly_ranges": []
-            }
-        
-        hourly_logs = defaultdict(list)
-        
-        for row in log_rows:
-            log_time = row[7] 
-            if log_time:
-                hour = log_time.hour
-                log_entry = {
-                    "log_id": row[0],
-                    "warehouse_id": row[1],
-                    "emp_id": row[2],
-                    "emp_name": row[3],
-                    "emp_number": row[4],
-                    "role_name": row[5],
-                    "date": row[6].strftime('%Y-%m-%d') if row[6] else None,
-                    "time": log_time.strftime('%Y-%m-%d %H:%M:%S'),
-                    "cam_id": row[8],
-                    "crop_blob_url": row[9],
-                    "chunk_id": row[10],
-                    "emp_access": row[11]
+    except Exception as e:
+        resources.close()
+        logger.error(f"Error fetching employee logs: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    head = {
+        "status": "success",
+        "warehouse_id": warehouse_id,
+        "cam_id": cam_id,
+        "date": date,
+        "total_logs": total_logs,
+        "unique_employees": unique_employees
+    }
+    return StreamingResponse(
+        _stream_employee_logs(resources, cur, head),
+        media_type="application/json",
+        # Also releases the connection if the client leaves before the body starts
+        background=BackgroundTask(resources.close)
+    )
+
+
+def _stream_employee_logs(resources, cur, head):
+    """Yield the employee logs JSON body one hour of rows at a time"""
+    try:
+        # The head object with its closing brace swapped for the hourly list
+        yield json_dumps(head)[:-1] + b',"hourly_ranges":['
+        
+        # Rows stream in ordered by time, so each hour is one consecutive run
+        separator = b''
+        for hour, hour_rows in groupby(cur, key=_log_hour):
+            logs = [
+                {
+                    "log_id": log_id,
+                    "warehouse_id": warehouse_id,
+                    "emp_id": emp_id,
+                    "emp_name": emp_name,
+                    "emp_number": emp_number,
+                    "role_name": role_name,
+                    "date": _iso_date(log_date) if log_date else None,
+                    "time": _iso_datetime(log_time),
+                    "cam_id": cam_id,
+                    "crop_blob_url": crop_blob_url,
+                    "chunk_id": chunk_id,
+                    "emp_access": emp_access
                 }
-                hourly_logs[hour].append(log_entry)
-        
-        hourly_ranges = []
-        for hour in sorted(hourly_logs.keys()):
-            hourly_ranges.append({
+                for (
+                    log_id, warehouse_id, emp_id, emp_name, emp_number, role_name,
+                    log_date, log_time, cam_id, crop_blob_url, chunk_id, emp_access
+                ) in hour_rows
+            ]
+            yield separator + json_dumps({
                 "hour_range": f"{hour:02d}:00 - {hour:02d}:59",
                 "start_time": f"{hour:02d}:00",
                 "end_time": f"{hour:02d}:59",
-                "total_logs": len(hourly_logs[hour]),
-                "unique_employees": len(set(log["emp_id"] for log in hourly_logs[hour] if log["emp_id"])),
-                "logs": hourly_logs[hour]
+                "total_logs": len(logs),
+                "unique_employees": len({log["emp_id"] for log in logs if log["emp_id"]}),
+                "logs": logs
             })
+            separator = b','
         
-        cur.close()
-        conn.close()
-        
-        return {
-            "status": "success",
-            "warehouse_id": warehouse_id,
-            "cam_id": cam_id,
-            "date": date,
-            "total_logs": len(log_rows),
-            "unique_employees": len(set(row[2] for row in log_rows if row[2])),
-            "hourly_ranges": hourly_ranges
-        }
-        
-    except HTTPException:
-        raise
+        yield b']}'
     except Exception as e:
-        logger.error(f"Error fetching employee logs: {e}")
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        # Headers are already sent; all that is left is to cut the body short
+        logger.error(f"Error streaming employee logs: {e}")
+        raise
+    finally:
+        resources.close()
 
 
 @router.get("/warehouses/{warehouse_id}/cameras/{cam_id}/logs/gunny-bags")
 def get_gunny_bag_logs(
     warehouse_id: str = Path(..., description="Warehouse ID (e.g., WH001)"),
     cam_id: str = Path(..., description="Camera ID"),
-    date: str = Query(..., description="Date in YYYY-MM-DD format")
+    date: dt_date = Depends(query_date)
 ):
     """Get gunny bag logs for a specific camera and date"""
     try:
-        try:
-            datetime.strptime(date, '%Y-%m-%d')
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid date format. Use YYYY-MM-DD"
-            )
-        
-        conn = get_connection()
-        cur = conn.cursor()
-        
-        gunny_logs_query = """
-            SELECT 
-                id,
-                warehouse_id,
-                cam_id,
-                count,
-                date,
-                chunk_id,
-                created_at,
-                action
-                
-            FROM public.wh_gunny_logs
-            WHERE warehouse_id = %s AND cam_id = %s AND date = %s
-            ORDER BY created_at
-        """
-        cur.execute(gunny_logs_query, (warehouse_id, cam_id, date))
-        log_rows = cur.fetchall()
-        
-        if not log_rows:
-            cur.close()
-            conn.close()
-            return {
-                "status": "success",
-                "message": "No gunny bag logs found for the given criteria",
-                "warehouse_id": warehouse_id,
-                "cam_id": cam_id,
-                "date": date,
-                "total_logs": 0,
-                "total_bags": 0,
-                "logs": []
-            }
-        
-        logs = []
-        total_bags = 0
-        action_summary = {}
-        
-        for row in log_rows:
-            bag_count = row[3] or 0
-            action = row[7]
-            
-            log_entry = {
-                "log_id": row[0],
-                "warehouse_id": row[1],
-                "cam_id": row[2],
-                "count": bag_count,
-                "date": row[4].strftime('%Y-%m-%d') if row[4] else None,
-                "chunk_id": row[5],
-                "created_at": row[6].strftime('%H:%M:%S') if row[6] else None,
-                "action": action
-            }
-            logs.append(log_entry)
+        with get_conn() as conn:
+            # Totals and the per-action summary come from one aggregate, so the
+            # stream below only has to build the logs (and is skipped on an empty day)
+            summary_query = """
+                SELECT action, COUNT(*), COALESCE(SUM(count), 0)
+                FROM public.wh_gunny_logs
+                WHERE warehouse_id = $1 AND cam_id = $2 AND date = $3
+                GROUP BY action
+                ORDER BY MIN(created_at)
+            """
+            with conn.cursor() as cur:
+                execute_prepared(cur, "gunny_log_summary", summary_query, (warehouse_id, cam_id, date))
+                summary_rows = cur.fetchall()
             
-            total_bags += bag_count
+            if not summary_rows:
+                return DecimalORJSONResponse({
+                    "status": "success",
+                    "message": "No gunny bag logs found for the given criteria",
+                    "warehouse_id": warehouse_id,
+                    "cam_id": cam_id,
+                    "date": date,
+                    "total_logs": 0,
+                    "total_bags": 0,
+                    "logs": []
+                })
             
-            if action:
-                if action not in action_summary:
-                    action_summary[action] = {"count": 0, "total_bags": 0}
-                action_summary[action]["count"] += 1
-                action_summary[action]["total_bags"] += bag_count
-        
-        cur.close()
-        conn.close()
-        
-        return {
+            gunny_logs_query = """
+                SELECT 
+                    id,
+                    warehouse_id,
+                    cam_id,
+                    count,
+                    date,
+                    chunk_id,
+                    created_at,
+                    action
+                
+                FROM public.wh_gunny_logs
+                WHERE warehouse_id = %s AND cam_id = %s AND date = %s
+                ORDER BY created_at
+            """
+            with server_cursor(conn) as cur:
+                cur.execute(gunny_logs_query, (warehouse_id, cam_id, date))
+                logs = [
+                    {
+                        "log_id": log_id,
+                        "warehouse_id": row_warehouse_id,
+                        "cam_id": row_cam_id,
+                        "count": bag_count or 0,
+                        "date": _iso_date(log_date) if log_date else None,
+                        "chunk_id": chunk_id,
+                        "created_at": _iso_time(created_at) if created_at else None,
+                        "action": action
+                    }
+                    for (
+                        log_id, row_warehouse_id, row_cam_id, bag_count,
+                        log_date, chunk_id, created_at, action
+                    ) in cur
+                ]
+        
+        return DecimalORJSONResponse({
             "status": "success",
             "warehouse_id": warehouse_id,
             "cam_id": cam_id,
             "date": date,
-            "total_logs": len(logs),
-            "total_bags": total_bags,
-            "action_summary": action_summary,
+            "total_logs": sum(count for _, count, _ in summary_rows),
+            "total_bags": sum(total_bags for _, _, total_bags in summary_rows),
+            "action_summary": {
+                action: {"count": count, "total_bags": total_bags}
+                for action, count, total_bags in summary_rows
+                if action
+            },
             "logs": logs
-        }
+        })
         
     except HTTPException:
         raise
@@ -499,42 +577,46 @@ def get_gunny_bag_logs(
 def get_vehicle_logs(
     warehouse_id: str = Path(..., description="Warehouse ID (e.g., WH001)"),
     cam_id: str = Path(..., description="Camera ID"),
-    date: str = Query(..., description="Date in YYYY-MM-DD format")
+    date: dt_date = Depends(query_date)
 ):
     """Get vehicle logs for a specific camera and date"""
     try:
-        try:
-            datetime.strptime(date, '%Y-%m-%d')
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid date format. Use YYYY-MM-DD"
-            )
-        
-        conn = get_connection()
-        cur = conn.cursor()
-        
+        # One row per plate: the earliest sighting supplies the ids and access,
+        # MIN/MAX created_at give the range. Plates are listed in order of first sighting.
         vehicle_logs_query = """
             SELECT 
-                id,
+                (ARRAY_AGG(id ORDER BY created_at, id))[1] AS log_id,
                 warehouse_id,
                 cam_id,
                 date,
-                chunk_id,
+                (ARRAY_AGG(chunk_id ORDER BY created_at, id))[1] AS chunk_id,
                 number_plate,
-                vehicle_access,
-                created_at
+                (ARRAY_AGG(vehicle_access ORDER BY created_at, id))[1] AS vehicle_access,
+                MIN(created_at) AS first_seen,
+                MAX(created_at) AS last_seen
             FROM public.wh_vehicle_logs
-            WHERE warehouse_id = %s AND cam_id = %s AND date = %s
-            ORDER BY created_at
+            WHERE warehouse_id = $1 AND cam_id = $2 AND date = $3
+                AND number_plate <> ''
+            GROUP BY number_plate, warehouse_id, cam_id, date
+            ORDER BY MIN(created_at), MIN(id)
         """
-        cur.execute(vehicle_logs_query, (warehouse_id, cam_id, date))
-        log_rows = cur.fetchall()
+        # Every sighting counts towards the access summary, not just the first per plate
+        access_summary_query = """
+            SELECT vehicle_access, COUNT(*)
+            FROM public.wh_vehicle_logs
+            WHERE warehouse_id = $1 AND cam_id = $2 AND date = $3
+                AND number_plate <> '' AND vehicle_access <> ''
+            GROUP BY vehicle_access
+            ORDER BY MIN(created_at)
+        """
+        params = (warehouse_id, cam_id, date)
+        plate_rows, access_rows = fetch_concurrently(
+            ("vehicle_plates", vehicle_logs_query, params),
+            ("vehicle_access_summary", access_summary_query, params)
+        )
         
-        if not log_rows:
-            cur.close()
-            conn.close()
-            return {
+        if not plate_rows:
+            return DecimalORJSONResponse({
                 "status": "success",
                 "message": "No vehicle logs found for the given criteria",
                 "warehouse_id": warehouse_id,
@@ -542,87 +624,35 @@ def get_vehicle_logs(
                 "date": date,
                 "total_logs": 0,
                 "logs": []
-            }
+            })
         
-        logs = []
-        unique_vehicles = set()
-        access_summary = {}
-
-        # group by number_plate; log_rows already ordered by created_at
-        groups = {}  # number_plate -> {"log_id": first_id, "warehouse_id": ..., "cam_id": ..., "date": ..., "chunk_id": first_chunk, "vehicle_access": first_access, "first": datetime, "last": datetime}
-
-        for row in log_rows:
-            number_plate = row[5]
-            vehicle_access = row[6]
-            created_at = row[7]  # expected datetime or None
-
-            # skip rows without number plate
-            if not number_plate:
-                continue
-
-            # update access_summary for all included rows
-            if vehicle_access:
-                access_summary[vehicle_access] = access_summary.get(vehicle_access, 0) + 1
-
-            # initialize group if first time seeing this plate
-            if number_plate not in groups:
-                groups[number_plate] = {
-                    "log_id": row[0],
-                    "warehouse_id": row[1],
-                    "cam_id": row[2],
-                    "date": row[3].strftime('%Y-%m-%d') if row[3] else None,
-                    "chunk_id": row[4],
-                    "vehicle_access": vehicle_access,
-                    "first": created_at,
-                    "last": created_at
-                }
-            else:
-                # update last seen time (rows are ordered so this will move forward)
-                if created_at and (groups[number_plate]["last"] is None or created_at > groups[number_plate]["last"]):
-                    groups[number_plate]["last"] = created_at
-
-        # build final logs list from groups
-        for plate, info in groups.items():
-            first = info["first"]
-            last = info["last"]
-
-            # Format created_at as "HH:MM:SS-HH:MM:SS"
-            if first and last:
-                created_range = f"{first.strftime('%H:%M:%S')}-{last.strftime('%H:%M:%S')}"
-            elif first:
-                created_range = f"{first.strftime('%H:%M:%S')}-{first.strftime('%H:%M:%S')}"
-            else:
-                created_range = None
-
-            log_entry = {
-                "log_id": info["log_id"],
-                "warehouse_id": info["warehouse_id"],
-                "cam_id": info["cam_id"],
-                "date": info["date"],
-                "chunk_id": info["chunk_id"],
-                "number_plate": plate,
-                "vehicle_access": info["vehicle_access"],
-                "created_at": created_range
+        logs = [
+            {
+                "log_id": log_id,
+                "warehouse_id": row_warehouse_id,
+                "cam_id": row_cam_id,
+                "date": _iso_date(log_date) if log_date else None,
+                "chunk_id": chunk_id,
+                "number_plate": number_plate,
+                "vehicle_access": vehicle_access,
+                "created_at": _time_range(first_seen, last_seen)
             }
-            logs.append(log_entry)
-            unique_vehicles.add(plate)
-
-        cur.close()
-        conn.close()
-
-        # you may want to sort logs by the first time (optional)
-        # logs.sort(key=lambda x: x["created_at"] if x["created_at"] else "")
-
-        return {
+            for (
+                log_id, row_warehouse_id, row_cam_id, log_date, chunk_id,
+                number_plate, vehicle_access, first_seen, last_seen
+            ) in plate_rows
+        ]
+        
+        return DecimalORJSONResponse({
             "status": "success",
             "warehouse_id": warehouse_id,
             "cam_id": cam_id,
             "date": date,
             "total_logs": len(logs),
-            "unique_vehicles": len(unique_vehicles),
-            "access_summary": access_summary,
+            "unique_vehicles": len(logs),
+            "access_summary": dict(access_rows),
             "logs": logs
-        }
+        })
         
     except HTTPException:
         raise
@@ -635,110 +665,107 @@ def get_vehicle_logs(
 def get_vehicle_wise_gunny_count(
     warehouse_id: str = Path(..., description="Warehouse ID (e.g., WH001)"),
     cam_id: str = Path(..., description="Camera ID"),
-    date: str = Query(..., description="Date in YYYY-MM-DD format")
+    date: dt_date = Depends(query_date)
 ):
     """Get vehicle-wise gunny bag count analytics"""
     try:
-        try:
-            datetime.strptime(date, '%Y-%m-%d')
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid date format. Use YYYY-MM-DD"
-            )
-        
-        conn = get_connection()
-        cur = conn.cursor()
-        
-        vehicle_logs_query = """
-            SELECT 
-                number_plate,
-                ARRAY_AGG(DISTINCT chunk_id) as chunk_ids
-            FROM public.wh_vehicle_logs
-            WHERE warehouse_id = %s 
-                AND cam_id = %s 
-                AND date = %s 
-                AND number_plate IS NOT NULL
-                AND chunk_id IS NOT NULL
-            GROUP BY number_plate
-            ORDER BY number_plate
-        """
-        cur.execute(vehicle_logs_query, (warehouse_id, cam_id, date))
-        vehicle_rows = cur.fetchall()
-        
-        if not vehicle_rows:
-            cur.close()
-            conn.close()
-            return {
-                "status": "success",
-                "message": "No vehicles found for the given criteria",
-                "warehouse_id": warehouse_id,
-                "cam_id": cam_id,
-                "date": date,
-                "total_vehicles": 0,
-                "grand_total_bags": 0,
-                "vehicles": []
-            }
-        
-        vehicles = []
-        grand_total_bags = 0
-        
-        for row in vehicle_rows:
-            number_plate = row[0]
-            chunk_ids = row[1]
-            
-            gunny_query = """
+        with db_cursor() as (conn, cur):
+        
+            # One statement: each plate's distinct chunks joined to the gunny logs of
+            # those chunks, aggregated per (plate, action). Plates with no gunny logs
+            # come back as a single row whose entry_count is NULL.
+            vehicle_gunny_query = """
+                WITH vc AS (
+                    SELECT DISTINCT number_plate, chunk_id
+                    FROM public.wh_vehicle_logs
+                    WHERE warehouse_id = $1 
+                        AND cam_id = $2 
+                        AND date = $3 
+                        AND number_plate IS NOT NULL
+                        AND chunk_id IS NOT NULL
+                ),
+                v AS (
+                    SELECT number_plate, ARRAY_AGG(chunk_id ORDER BY chunk_id) AS chunk_ids
+                    FROM vc
+                    GROUP BY number_plate
+                ),
+                g AS (
+                    SELECT 
+                        vc.number_plate,
+                        gl.action,
+                        SUM(gl.count) as total_count,
+                        COUNT(*) as entry_count,
+                        MIN(gl.created_at) as first_entry_time,
+                        MAX(gl.created_at) as last_entry_time
+                    FROM vc
+                    JOIN public.wh_gunny_logs gl
+                        ON gl.chunk_id = vc.chunk_id
+                        AND gl.warehouse_id = $1 
+                        AND gl.cam_id = $2 
+                        AND gl.date = $3
+                    GROUP BY vc.number_plate, gl.action
+                )
                 SELECT 
-                    action,
-                    SUM(count) as total_count,
-                    COUNT(*) as entry_count,
-                    MIN(created_at) as first_entry_time,
-                    MAX(created_at) as last_entry_time
-                FROM public.wh_gunny_logs
-                WHERE warehouse_id = %s 
-                    AND cam_id = %s 
-                    AND date = %s 
-                    AND chunk_id = ANY(%s)
-                GROUP BY action
-                ORDER BY action
+                    v.number_plate,
+                    v.chunk_ids,
+                    g.action,
+                    g.total_count,
+                    g.entry_count,
+                    g.first_entry_time,
+                    g.last_entry_time
+                FROM v
+                LEFT JOIN g ON g.number_plate = v.number_plate
+                ORDER BY v.number_plate, g.action
             """
-            cur.execute(gunny_query, (warehouse_id, cam_id, date, chunk_ids))
-            gunny_rows = cur.fetchall()
-            
-            action_breakdown = []
-            total_bags_all_actions = 0
+            execute_prepared(cur, "vehicle_gunny", vehicle_gunny_query, (warehouse_id, cam_id, date))
+            vehicle_rows = cur.fetchall()
+        
+            if not vehicle_rows:
+                return DecimalORJSONResponse({
+                    "status": "success",
+                    "message": "No vehicles found for the given criteria",
+                    "warehouse_id": warehouse_id,
+                    "cam_id": cam_id,
+                    "date": date,
+                    "total_vehicles": 0,
+                    "grand_total_bags": 0,
+                    "vehicles": []
+                })
+        
+            vehicles = []
+            grand_total_bags = 0
+        
+            # Rows are sorted by plate, so each vehicle is one consecutive run
+            for number_plate, plate_rows in groupby(vehicle_rows, key=itemgetter(0)):
+                action_breakdown = []
+                total_bags_all_actions = 0
+                chunk_ids = None
             
-            for gunny_row in gunny_rows:
-                action = gunny_row[0]
-                total_count = gunny_row[1] or 0
-                entry_count = gunny_row[2]
-                first_entry = gunny_row[3]
-                last_entry = gunny_row[4]
+                for _, chunk_ids, action, total_count, entry_count, first_entry, last_entry in plate_rows:
+                    if entry_count is None:
+                        continue
                 
-                action_breakdown.append({
-                    "action": action,
-                    "total_count": total_count,
-                    "number_of_entries": entry_count,
-                    "first_entry_time": first_entry.strftime('%H:%M:%S') if first_entry else None,
-                    "last_entry_time": last_entry.strftime('%H:%M:%S') if last_entry else None
-                })
+                    total_count = total_count or 0
                 
-                total_bags_all_actions += total_count
-            
-            vehicle_entry = {
-                "number_plate": number_plate,
-                "chunk_ids": chunk_ids,
-                "total_bags_all_actions": total_bags_all_actions,
-                "action_breakdown": action_breakdown
-            }
+                    action_breakdown.append({
+                        "action": action,
+                        "total_count": total_count,
+                        "number_of_entries": entry_count,
+                        "first_entry_time": _iso_time(first_entry) if first_entry else None,
+                        "last_entry_time": _iso_time(last_entry) if last_entry else None
+                    })
+                
+                    total_bags_all_actions += total_count
             
-            vehicles.append(vehicle_entry)
-            grand_total_bags += total_bags_all_actions
-        
-        cur.close()
-        conn.close()
+                vehicles.append({
+                    "number_plate": number_plate,
+                    "chunk_ids": chunk_ids,
+                    "total_bags_all_actions": total_bags_all_actions,
+                    "action_breakdown": action_breakdown
+                })
+                grand_total_bags += total_bags_all_actions
         
-        return {
+        return DecimalORJSONResponse({
             "status": "success",
             "warehouse_id": warehouse_id,
             "cam_id": cam_id,
@@ -746,7 +773,7 @@ def get_vehicle_wise_gunny_count(
             "total_vehicles": len(vehicles),
             "grand_total_bags": grand_total_bags,
             "vehicles": vehicles
-        }
+        })
         
     except HTTPException:
         raise
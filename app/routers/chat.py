@@ -3,23 +3,242 @@ Chat router - AI-powered video chat functionality
 """
 
 from fastapi import APIRouter, HTTPException, Path, Body
-from app.core.database import get_connection
-from app.models.chat import ChatRequest, ChatResponse, MessageContent, ConversationMessage
-from app.services.aws_service import bedrock_client
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from cachetools import TTLCache
+from app.core.config import settings
+from app.core.database import db_cursor, execute_prepared
+from app.models.chat import ChatRequest, ChatResponse, ConversationMessage, MessageContent
+from app.services.aws_service import bedrock_client, run_bedrock, run_bedrock_shared
 from app.services.transcript_service import (
     list_transcript_files,
-    merge_transcripts,
-    build_video_context,
+    get_video_context,
     parse_blob_url,
-    SYSTEM_TEMPLATE
+    render_system
 )
 from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import orjson
 import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/warehouses", tags=["chat"])
 
+# Use inference profile ARN
+INFERENCE_PROFILE_ARN = "arn:aws:bedrock:us-east-1::foundation-model/anthropic.claude-3-5-haiku-20241022-v1:0"
+
+SUMMARY_PROMPT = (
+    "Summarize the following conversation between a user and an assistant about a video. "
+    "Keep every fact, number, time and name the assistant stated and every question the user asked, "
+    "so the conversation can continue from the summary alone. Reply with the summary only."
+)
+
+# Summaries of collapsed history prefixes, keyed by a digest of the prefix. The
+# cut point only moves every CHAT_HISTORY_KEEP messages, so a conversation is
+# summarized once per boundary rather than on every turn. Only the event loop
+# touches this cache, so it needs no lock.
+_summary_cache = TTLCache(maxsize=1024, ttl=settings.CHAT_SUMMARY_CACHE_TTL)
+
+
+def _fetch_chunk_row(warehouse_id, cam_id, chunk_id):
+    """Look up a chunk's row on a pooled connection (blocking; run it on the threadpool)"""
+    with db_cursor() as (conn, cur):
+        chunk_query = """
+            SELECT 
+                chunk_id,
+                warehouse_id,
+                cam_id,
+                chunk_blob_url,
+                transcripts_url,
+                date,
+                time
+            FROM public.wh_chunks
+            WHERE warehouse_id = $1 AND cam_id = $2 AND chunk_id = $3
+        """
+        execute_prepared(cur, "chat_chunk", chunk_query, (warehouse_id, cam_id, chunk_id))
+        return cur.fetchone()
+
+
+async def _summarize_history(messages: List[Dict[str, Any]]) -> Optional[str]:
+    """Collapse earlier turns into a short summary, or None if Bedrock fails"""
+    key = hashlib.blake2b(orjson.dumps(messages), digest_size=16).digest()
+    summary = _summary_cache.get(key)
+    if summary is not None:
+        return summary
+    
+    transcript = "\n".join(
+        f"{msg['role']}: " + " ".join(block["text"] for block in msg["content"])
+        for msg in messages
+    )
+    try:
+        response = await run_bedrock_shared(
+            bedrock_client.converse,
+            modelId=INFERENCE_PROFILE_ARN,
+            messages=[{"role": "user", "content": [{"text": transcript}]}],
+            system=[{"text": SUMMARY_PROMPT}],
+            inferenceConfig={"maxTokens": 500, "temperature": 0.0}
+        )
+        summary = response['output']['message']['content'][0]['text']
+    except Exception as e:
+        logger.warning(f"Conversation summary failed, sending full history: {e}")
+        return None
+    
+    _summary_cache[key] = summary
+    return summary
+
+
+async def _compact_history(
+    message_list: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Bound the history sent to Bedrock to a rolling window
+    
+    Past CHAT_HISTORY_WINDOW messages, everything before the last
+    CHAT_HISTORY_KEEP-aligned boundary is replaced by a summary. The kept window
+    always starts on a user turn, as Converse requires.
+    
+    Returns:
+        tuple: (messages to send, summary of the dropped prefix or None)
+    """
+    if len(message_list) <= settings.CHAT_HISTORY_WINDOW:
+        return message_list, None
+    
+    keep = settings.CHAT_HISTORY_KEEP
+    cut = (len(message_list) - keep) // keep * keep
+    while cut < len(message_list) - 1 and message_list[cut]["role"] != "user":
+        cut += 1
+    
+    summary = await _summarize_history(message_list[:cut])
+    if summary is None:
+        return message_list, None
+    return message_list[cut:], summary
+
+
+async def _prepare_conversation(
+    warehouse_id: str,
+    cam_id: str,
+    chunk_id: str,
+    request: ChatRequest
+) -> Dict[str, Any]:
+    """
+    Gather everything a Bedrock converse call about a chunk needs
+    
+    Returns:
+        dict: converse keyword arguments, messages ending with the user's query
+    """
+    # Step 1: Get chunk transcript URL from database
+    # psycopg2 and Azure calls block, so each runs on the threadpool
+    # rather than stalling the event loop (Bedrock calls use their own pool)
+    chunk_row = await run_in_threadpool(_fetch_chunk_row, warehouse_id, cam_id, chunk_id)
+    
+    if not chunk_row:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Chunk not found: warehouse_id={warehouse_id}, cam_id={cam_id}, chunk_id={chunk_id}"
+        )
+    
+    # Use hardcoded URL for testing - replace with chunk_row[4] in production
+    transcript_blob_url = "https://spectradevdev.blob.core.windows.net/cache-0e83775c98f1d6627efbe49f1ca0ba9b-eastus/2025-08-26/loopcam1/10028814-d9e1-4c85-8a7d-74e034381b4d/chunks/ts_10028814-d9e1-4c85-8a7d-74e034381b4d_chunk_start-0-end-30_file.json"
+    
+    if not transcript_blob_url:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No transcript URL configured for chunk {chunk_id}"
+        )
+    
+    # Step 2: Parse Blob URL
+    container_name, blob_prefix = parse_blob_url(transcript_blob_url)
+    logger.info(f"Looking for transcripts in container: {container_name}, prefix: {blob_prefix}")
+    
+    # Step 3: List and merge transcript files
+    transcript_blobs = await run_in_threadpool(list_transcript_files, container_name, blob_prefix)
+    
+    if not transcript_blobs:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No transcript files found for chunk_id={chunk_id}"
+        )
+    
+    # Step 4: Build video context (cached across turns about the same chunk)
+    video_context = await run_in_threadpool(get_video_context, container_name, transcript_blobs)
+    
+    if not video_context:
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to build video context from transcripts"
+        )
+    
+    # Step 5: Prepare system prompt and messages
+    system_list = [{"text": render_system(video_context)}]
+    
+    # Build message list with conversation history
+    message_list = []
+    if request.conversation:
+        message_list = [
+            {
+                "role": msg.role,
+                "content": [{"text": c.text} for c in msg.content]
+            }
+            for msg in request.conversation
+        ]
+    
+    # Add current user query
+    message_list.append({
+        "role": "user",
+        "content": [{"text": request.UserQuery}]
+    })
+    
+    inference_config = {
+        "maxTokens": request.inferenceConfig.maxTokens,
+        "temperature": request.inferenceConfig.temperature,
+        "topP": request.inferenceConfig.topP
+    }
+    
+    # Long chats send a summary plus the recent turns instead of every message
+    window, summary = await _compact_history(message_list)
+    if summary:
+        system_list.append({"text": f"Summary of the earlier conversation:\n{summary}"})
+    
+    converse_kwargs = {
+        "modelId": INFERENCE_PROFILE_ARN,
+        "messages": window,
+        "system": system_list,
+        "inferenceConfig": inference_config
+    }
+    return converse_kwargs
+
+
+def _chat_response(assistant_text: str, request: ChatRequest) -> ChatResponse:
+    """
+    Extend the conversation with this turn and wrap it in a ChatResponse
+    
+    The earlier turns are the request's already-validated models, so they are
+    reused as-is and only the new user/assistant pair is built; model_construct
+    skips validating everything a second time.
+    """
+    conversation = list(request.conversation or [])
+    conversation.append(ConversationMessage.model_construct(
+        role="user",
+        content=[MessageContent.model_construct(text=request.UserQuery)]
+    ))
+    conversation.append(ConversationMessage.model_construct(
+        role="assistant",
+        content=[MessageContent.model_construct(text=assistant_text)]
+    ))
+    
+    chat_transaction_id = request.chatTransactionId or str(uuid.uuid4().hex)
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    return ChatResponse.model_construct(
+        conversation=conversation,
+        chatLastTime=current_time,
+        chatTransactionId=chat_transaction_id,
+        modelId=request.modelId,
+        inferenceConfig=request.inferenceConfig
+    )
+
 
 @router.post(
     "/{warehouse_id}/cameras/{cam_id}/chunks/{chunk_id}/chat",
@@ -47,111 +266,11 @@ async def chat_with_video(
     try:
         logger.info(f"Chat request for warehouse={warehouse_id}, camera={cam_id}, chunk={chunk_id}")
         
-        # Step 1: Get chunk transcript URL from database
-        conn = get_connection()
-        cur = conn.cursor()
-        
-        chunk_query = """
-            SELECT 
-                chunk_id,
-                warehouse_id,
-                cam_id,
-                chunk_blob_url,
-                transcripts_url,
-                date,
-                time
-            FROM public.wh_chunks
-            WHERE warehouse_id = %s AND cam_id = %s AND chunk_id = %s
-        """
-        cur.execute(chunk_query, (warehouse_id, cam_id, chunk_id))
-        chunk_row = cur.fetchone()
-        
-        if not chunk_row:
-            cur.close()
-            conn.close()
-            raise HTTPException(
-                status_code=404,
-                detail=f"Chunk not found: warehouse_id={warehouse_id}, cam_id={cam_id}, chunk_id={chunk_id}"
-            )
-        
-        # Use hardcoded URL for testing - replace with chunk_row[4] in production
-        transcript_blob_url = "https://spectradevdev.blob.core.windows.net/cache-0e83775c98f1d6627efbe49f1ca0ba9b-eastus/2025-08-26/loopcam1/10028814-d9e1-4c85-8a7d-74e034381b4d/chunks/ts_10028814-d9e1-4c85-8a7d-74e034381b4d_chunk_start-0-end-30_file.json"
-        
-        if not transcript_blob_url:
-            cur.close()
-            conn.close()
-            raise HTTPException(
-                status_code=400,
-                detail=f"No transcript URL configured for chunk {chunk_id}"
-            )
-        
-        cur.close()
-        conn.close()
-        
-        # Step 2: Parse Blob URL
-        container_name, blob_prefix = parse_blob_url(transcript_blob_url)
-        logger.info(f"Looking for transcripts in container: {container_name}, prefix: {blob_prefix}")
-        
-        # Step 3: List and merge transcript files
-        transcript_blobs = list_transcript_files(container_name, blob_prefix)
-        
-        if not transcript_blobs:
-            raise HTTPException(
-                status_code=404,
-                detail=f"No transcript files found for chunk_id={chunk_id}"
-            )
-        
-        transcript_data = merge_transcripts(container_name, transcript_blobs)
-        logger.info(f"Merged {len(transcript_blobs)} transcript files")
-        
-        # Step 4: Build video context
-        video_context = build_video_context(transcript_data)
-        
-        if not video_context:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to build video context from transcripts"
-            )
-        
-        # Step 5: Prepare system prompt and messages
-        system_prompt = SYSTEM_TEMPLATE.replace("{video_context}", video_context)
-        system_list = [{"text": system_prompt}]
-        
-        # Build message list with conversation history
-        message_list = []
-        if request.conversation:
-            message_list = [
-                {
-                    "role": msg.role,
-                    "content": [{"text": c.text} for c in msg.content]
-                }
-                for msg in request.conversation
-            ]
-        
-        # Add current user query
-        message_list.append({
-            "role": "user",
-            "content": [{"text": request.UserQuery}]
-        })
+        converse_kwargs = await _prepare_conversation(warehouse_id, cam_id, chunk_id, request)
         
         # Step 6: Call AWS Bedrock
         logger.info(f"Calling Bedrock model: {request.modelId}")
-        
-        inference_config = {
-            "maxTokens": request.inferenceConfig.maxTokens,
-            "temperature": request.inferenceConfig.temperature,
-            "topP": request.inferenceConfig.topP
-        }
-        
-        # Use inference profile ARN
-        inference_profile_arn = "arn:aws:bedrock:us-east-1::foundation-model/anthropic.claude-3-5-haiku-20241022-v1:0"
-        
-        bedrock_response = bedrock_client.converse(
-            modelId=inference_profile_arn,
-            messages=message_list,
-            system=system_list,
-            inferenceConfig=inference_config
-        )
+        bedrock_response = await run_bedrock_shared(bedrock_client.converse, **converse_kwargs)
         
         # Step 7: Extract assistant response
         if not (bedrock_response and 'output' in bedrock_response and 
@@ -164,38 +283,89 @@ async def chat_with_video(
         assistant_text = bedrock_response['output']['message']['content'][0]['text']
         logger.info(f"Assistant response received: {len(assistant_text)} characters")
         
-        # Step 8: Add assistant response to conversation
-        message_list.append({
-            "role": "assistant",
-            "content": [{"text": assistant_text}]
-        })
+        # Step 8: Build response
+        # Serialize straight to JSON, skipping FastAPI's response_model pass
+        chat_response = _chat_response(assistant_text, request)
+        return Response(content=chat_response.model_dump_json(), media_type="application/json")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in chat endpoint: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+async def _stream_chat_events(event_stream, request: ChatRequest):
+    """
+    Relay Bedrock's text deltas as server-sent events as they are generated
+    
+    Each delta goes out as a `data: {"text": ...}` event; once the model is done
+    a final `done` event carries the same ChatResponse the JSON endpoint returns.
+    Reads from the event stream block, so they run on the Bedrock worker pool.
+    The stream is closed however the generator ends, so a client that
+    disconnects mid-answer does not leave Bedrock's response connection open.
+    """
+    parts = []
+    events = iter(event_stream)
+    try:
+        while (event := await run_bedrock(next, events, None)) is not None:
+            delta = event.get("contentBlockDelta")
+            if not delta:
+                continue
+            text = delta["delta"].get("text")
+            if text:
+                parts.append(text)
+                yield b"data: " + orjson.dumps({"text": text}) + b"\n\n"
         
-        # Step 9: Build response
-        chat_transaction_id = request.chatTransactionId or str(uuid.uuid4().hex)
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        assistant_text = "".join(parts)
+        logger.info(f"Assistant response streamed: {len(assistant_text)} characters")
+        chat_response = _chat_response(assistant_text, request)
+        yield b"event: done\ndata: " + chat_response.model_dump_json().encode() + b"\n\n"
+    except Exception as e:
+        # Headers are already sent, so the failure is reported in-band
+        logger.error(f"Error streaming chat response: {e}", exc_info=True)
+        yield b"event: error\ndata: " + orjson.dumps({"detail": f"Internal server error: {str(e)}"}) + b"\n\n"
+    finally:
+        close = getattr(event_stream, "close", None)
+        if close is not None:
+            close()
+
+
+@router.post(
+    "/{warehouse_id}/cameras/{cam_id}/chunks/{chunk_id}/chat/stream",
+    summary="Chat with AI about video chunk (streamed)",
+    description="Same as the chat endpoint, but the answer arrives as server-sent events while it is generated"
+)
+async def chat_with_video_stream(
+    warehouse_id: str = Path(..., description="Warehouse ID (e.g., WH001)"),
+    cam_id: str = Path(..., description="Camera ID"),
+    chunk_id: str = Path(..., description="Chunk ID (e.g., chunk_2025-01-15_10-00-00)"),
+    request: ChatRequest = Body(...)
+):
+    """Chat endpoint streaming the AI response token by token over text/event-stream"""
+    try:
+        logger.info(f"Streamed chat request for warehouse={warehouse_id}, camera={cam_id}, chunk={chunk_id}")
         
-        # Convert back to Pydantic models for response
-        conversation_response = [
-            ConversationMessage(
-                role=msg["role"],
-                content=[MessageContent(text=c["text"]) for c in msg["content"]]
-            )
-            for msg in message_list
-        ]
+        converse_kwargs = await _prepare_conversation(warehouse_id, cam_id, chunk_id, request)
         
-        return ChatResponse(
-            conversation=conversation_response,
-            chatLastTime=current_time,
-            chatTransactionId=chat_transaction_id,
-            modelId=request.modelId,
-            inferenceConfig=request.inferenceConfig
-        )
+        logger.info(f"Calling Bedrock model (streaming): {request.modelId}")
+        bedrock_response = await run_bedrock(bedrock_client.converse_stream, **converse_kwargs)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in chat endpoint: {e}", exc_info=True)
+        logger.error(f"Error in chat stream endpoint: {e}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
         )
+    
+    return StreamingResponse(
+        _stream_chat_events(bedrock_response["stream"], request),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the events into larger batches
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -3,8 +3,20 @@ Warehouse router - Endpoints for warehouse data and analytics
 """
 
 from fastapi import APIRouter, HTTPException, Path, Query
-from app.core.database import get_connection
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.core.database import (
+    db_cursor,
+    execute_prepared,
+    fetch_concurrently,
+    get_conn,
+    server_cursor
+)
+from app.core.responses import DecimalORJSONResponse, json_dumps
+from contextlib import ExitStack
 from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,80 +24,114 @@ router = APIRouter(prefix="/api/v1/warehouses", tags=["warehouses"])
 
 
 @router.get("")
-def get_all_warehouses():
-    """Get all warehouses with their employees"""
+def get_all_warehouses(
+    limit: int = Query(50, ge=1, le=500, description="Warehouses per page"),
+    offset: int = Query(0, ge=0, description="Warehouses to skip, from a previous page's next_offset")
+):
+    """
+    Get a page of warehouses with their employees
+    
+    Warehouses are streamed out one at a time while rows arrive from a
+    server-side cursor; the page counts follow the list, once they are known.
+    """
+    resources = ExitStack()
     try:
-        conn = get_connection()
-        cur = conn.cursor()
+        conn = resources.enter_context(get_conn())
         
+        # One round trip for a page of warehouses and their staff: warehouses
+        # without matching employees still come back once, with NULL employee
+        # columns. One warehouse past the page is fetched to tell whether
+        # another page follows.
         warehouse_query = """
             SELECT 
-                warehouse_id, 
-                warehouse_name, 
-                warehouse_capacity,
-                warehouse_longitude,
-                warehouse_latitude,
-                warehouse_location
-            FROM public.warehouse
-            ORDER BY warehouse_id
+                w.warehouse_id, 
+                w.warehouse_name, 
+                w.warehouse_capacity,
+                w.warehouse_longitude,
+                w.warehouse_latitude,
+                w.warehouse_location,
+                e.emp_id,
+                e.emp_name,
+                e.emp_number,
+                e.role_id,
+                e.emp_facecrop,
+                r.role_name
+            FROM (
+                SELECT 
+                    warehouse_id, 
+                    warehouse_name, 
+                    warehouse_capacity,
+                    warehouse_longitude,
+                    warehouse_latitude,
+                    warehouse_location
+                FROM public.warehouse
+                ORDER BY warehouse_id
+                LIMIT %s OFFSET %s
+            ) w
+            LEFT JOIN public.wh_emp_data e
+                ON e.warehouse_id = w.warehouse_id
+                AND e.role_id IN ('ROLE_SUP', 'ROLE_INC', 'ROLE_DEO')
+            LEFT JOIN public.wh_emp_role r ON e.role_id = r.role_id
+            ORDER BY 
+                w.warehouse_id,
+                CASE e.role_id
+                    WHEN 'ROLE_SUP' THEN 1
+                    WHEN 'ROLE_INC' THEN 2
+                    WHEN 'ROLE_DEO' THEN 3
+                    ELSE 4
+                END,
+                e.emp_name
         """
-        cur.execute(warehouse_query)
-        warehouse_rows = cur.fetchall()
+        cur = resources.enter_context(server_cursor(conn))
+        cur.execute(warehouse_query, (limit + 1, offset))
         
-        if not warehouse_rows:
-            cur.close()
-            conn.close()
-            return {
-                "status": "success",
-                "total_warehouses": 0,
-                "warehouses": []
-            }
+    except Exception as e:
+        resources.close()
+        logger.error(f"Error fetching all warehouses: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    return StreamingResponse(
+        _stream_warehouses(resources, cur, limit, offset),
+        media_type="application/json",
+        # Also releases the connection if the client leaves before the body starts
+        background=BackgroundTask(resources.close)
+    )
+
+
+def _stream_warehouses(resources, cur, limit, offset):
+    """Yield the warehouse list JSON body one warehouse at a time"""
+    try:
+        yield b'{"status":"success","warehouses":['
         
-        warehouses_list = []
+        total_warehouses = 0
+        next_offset = None
         
-        for warehouse_row in warehouse_rows:
-            warehouse_id = warehouse_row[0]
+        # Rows are sorted by warehouse, so each warehouse is one consecutive run
+        for warehouse_id, warehouse_rows in groupby(cur, key=itemgetter(0)):
+            if total_warehouses == limit:
+                # The look-ahead warehouse: there is another page
+                next_offset = offset + limit
+                break
             
-            emp_query = """
-                SELECT 
-                    e.emp_id,
-                    e.warehouse_id,
-                    e.emp_name,
-                    e.emp_number,
-                    e.role_id,
-                    e.emp_facecrop,
-                    r.role_name
-                FROM public.wh_emp_data e
-                LEFT JOIN public.wh_emp_role r ON e.role_id = r.role_id
-                WHERE e.warehouse_id = %s 
-                    AND e.role_id IN ('ROLE_SUP', 'ROLE_INC', 'ROLE_DEO')
-                ORDER BY 
-                    CASE e.role_id
-                        WHEN 'ROLE_SUP' THEN 1
-                        WHEN 'ROLE_INC' THEN 2
-                        WHEN 'ROLE_DEO' THEN 3
-                        ELSE 4
-                    END,
-                    e.emp_name
-            """
-            cur.execute(emp_query, (warehouse_id,))
-            emp_rows = cur.fetchall()
+            warehouse_rows = list(warehouse_rows)
+            warehouse_row = warehouse_rows[0]
             
-            employees = []
-            for emp_row in emp_rows:
-                employee = {
-                    "emp_id": emp_row[0],
-                    "warehouse_id": emp_row[1],
-                    "emp_name": emp_row[2],
-                    "emp_number": emp_row[3],
-                    "role_id": emp_row[4],
-                    "emp_facecrop": emp_row[5],
-                    "role_name": emp_row[6]
+            employees = [
+                {
+                    "emp_id": row[6],
+                    "warehouse_id": warehouse_id,
+                    "emp_name": row[7],
+                    "emp_number": row[8],
+                    "role_id": row[9],
+                    "emp_facecrop": row[10],
+                    "role_name": row[11]
                 }
-                employees.append(employee)
+                for row in warehouse_rows
+                if row[6] is not None
+            ]
             
-            warehouse_data = {
-                "warehouse_id": warehouse_row[0],
+            yield (b',' if total_warehouses else b'') + json_dumps({
+                "warehouse_id": warehouse_id,
                 "warehouse_name": warehouse_row[1],
                 "warehouse_capacity": warehouse_row[2],
                 "warehouse_longitude": float(warehouse_row[3]) if warehouse_row[3] else None,
@@ -93,22 +139,22 @@ def get_all_warehouses():
                 "warehouse_location": warehouse_row[5],
                 "employees": employees,
                 "total_employees": len(employees)
-            }
-            
-            warehouses_list.append(warehouse_data)
-        
-        cur.close()
-        conn.close()
-        
-        return {
-            "status": "success",
-            "total_warehouses": len(warehouses_list),
-            "warehouses": warehouses_list
-        }
+            })
+            total_warehouses += 1
         
+        # The page summary with its opening brace swapped for the list's end
+        yield b'],' + json_dumps({
+            "total_warehouses": total_warehouses,
+            "limit": limit,
+            "offset": offset,
+            "next_offset": next_offset
+        })[1:]
     except Exception as e:
-        logger.error(f"Error fetching all warehouses: {e}")
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        # Headers are already sent; all that is left is to cut the body short
+        logger.error(f"Error streaming warehouses: {e}")
+        raise
+    finally:
+        resources.close()
 
 
 @router.get("/{warehouse_id}")
@@ -117,9 +163,6 @@ def get_warehouse_by_id(
 ):
     """Get specific warehouse details with cameras, vehicles, and employees"""
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        
         warehouse_query = """
             SELECT 
                 warehouse_id, 
@@ -129,19 +172,8 @@ def get_warehouse_by_id(
                 warehouse_latitude,
                 warehouse_location
             FROM public.warehouse
-            WHERE warehouse_id = %s
+            WHERE warehouse_id = $1
         """
-        cur.execute(warehouse_query, (warehouse_id,))
-        warehouse_row = cur.fetchone()
-        
-        if not warehouse_row:
-            cur.close()
-            conn.close()
-            raise HTTPException(
-                status_code=404, 
-                detail=f"Warehouse not found: {warehouse_id}"
-            )
-        
         camera_query = """
             SELECT 
                 cam_id,
@@ -154,27 +186,9 @@ def get_warehouse_by_id(
                 camera_latitude,
                 services
             FROM public.cameras
-            WHERE warehouse_id = %s
+            WHERE warehouse_id = $1
             ORDER BY cam_id
         """
-        cur.execute(camera_query, (warehouse_id,))
-        camera_rows = cur.fetchall()
-        
-        cameras = []
-        for cam_row in camera_rows:
-            camera = {
-                "cam_id": cam_row[0],
-                "cam_direction": cam_row[1],
-                "camera_status": cam_row[2],
-                "warehouse_id": cam_row[3],
-                "stream_arn": cam_row[4],
-                "hls_url": cam_row[5],
-                "camera_longitude": float(cam_row[6]) if cam_row[6] else None,
-                "camera_latitude": float(cam_row[7]) if cam_row[7] else None,
-                "services": cam_row[8]
-            }
-            cameras.append(camera)
-        
         vehicle_query = """
             SELECT 
                 v.id,
@@ -189,11 +203,54 @@ def get_warehouse_by_id(
                 d.driver_crop
             FROM public.wh_vehicles v
             LEFT JOIN public.wh_drivers d ON v.driver_id = d.driver_id
-            WHERE v.warehouse_id = %s
+            WHERE v.warehouse_id = $1
             ORDER BY v.id
         """
-        cur.execute(vehicle_query, (warehouse_id,))
-        vehicle_rows = cur.fetchall()
+        emp_query = """
+            SELECT 
+                e.emp_id,
+                e.warehouse_id,
+                e.emp_name,
+                e.emp_number,
+                e.role_id,
+                e.emp_facecrop,
+                r.role_name
+            FROM public.wh_emp_data e
+            LEFT JOIN public.wh_emp_role r ON e.role_id = r.role_id
+            WHERE e.warehouse_id = $1
+            ORDER BY e.role_id, e.emp_name
+        """
+        # None of the four depends on another, so they run side by side; an
+        # unknown warehouse just costs three empty lookups before the 404
+        params = (warehouse_id,)
+        warehouse_rows, camera_rows, vehicle_rows, emp_rows = fetch_concurrently(
+            ("warehouse_by_id", warehouse_query, params),
+            ("warehouse_cameras", camera_query, params),
+            ("warehouse_vehicles", vehicle_query, params),
+            ("warehouse_employees", emp_query, params)
+        )
+        
+        if not warehouse_rows:
+            raise HTTPException(
+                status_code=404, 
+                detail=f"Warehouse not found: {warehouse_id}"
+            )
+        warehouse_row = warehouse_rows[0]
+        
+        cameras = []
+        for cam_row in camera_rows:
+            camera = {
+                "cam_id": cam_row[0],
+                "cam_direction": cam_row[1],
+                "camera_status": cam_row[2],
+                "warehouse_id": cam_row[3],
+                "stream_arn": cam_row[4],
+                "hls_url": cam_row[5],
+                "camera_longitude": float(cam_row[6]) if cam_row[6] else None,
+                "camera_latitude": float(cam_row[7]) if cam_row[7] else None,
+                "services": cam_row[8]
+            }
+            cameras.append(camera)
         
         vehicles = []
         for veh_row in vehicle_rows:
@@ -211,23 +268,6 @@ def get_warehouse_by_id(
             }
             vehicles.append(vehicle)
         
-        emp_query = """
-            SELECT 
-                e.emp_id,
-                e.warehouse_id,
-                e.emp_name,
-                e.emp_number,
-                e.role_id,
-                e.emp_facecrop,
-                r.role_name
-            FROM public.wh_emp_data e
-            LEFT JOIN public.wh_emp_role r ON e.role_id = r.role_id
-            WHERE e.warehouse_id = %s
-            ORDER BY e.role_id, e.emp_name
-        """
-        cur.execute(emp_query, (warehouse_id,))
-        emp_rows = cur.fetchall()
-        
         employees = []
         for emp_row in emp_rows:
             employee = {
@@ -250,10 +290,8 @@ def get_warehouse_by_id(
             "warehouse_location": warehouse_row[5]
         }
         
-        cur.close()
-        conn.close()
-        
-        return {
+        # Returned as a response so FastAPI skips its jsonable_encoder pass
+        return DecimalORJSONResponse({
             "status": "success",
             "warehouse": warehouse_data,
             "cameras": {
@@ -268,7 +306,7 @@ def get_warehouse_by_id(
                 "total_employees": len(employees),
                 "data": employees
             }
-        }
+        })
         
     except HTTPException:
         raise
@@ -293,100 +331,79 @@ def get_warehouse_dashboard(
                 detail="Invalid date format. Use YYYY-MM-DD"
             )
 
-        conn = get_connection()
-        cur = conn.cursor()
-
-        # ------------------------------------------
-        # 1) FETCH WAREHOUSE DETAILS (NEW)
-        # ------------------------------------------
-        warehouse_query = """
-            SELECT 
-                warehouse_id, 
-                warehouse_name, 
-                warehouse_capacity,
-                warehouse_longitude,
-                warehouse_latitude,
-                warehouse_location
-            FROM public.warehouse
-            WHERE warehouse_id = %s
+        # One statement for every counter: the aggregate CTEs always yield exactly
+        # one row, so the cross join returns a row only when the warehouse exists
+        dashboard_query = """
+            WITH w AS (
+                SELECT warehouse_capacity
+                FROM public.warehouse
+                WHERE warehouse_id = $1
+            ),
+            b AS (
+                SELECT 
+                    COALESCE(SUM(CASE WHEN LOWER(action) = 'loading' THEN count ELSE 0 END), 0) as loaded_bags,
+                    COALESCE(SUM(CASE WHEN LOWER(action) = 'unloading' THEN count ELSE 0 END), 0) as unloaded_bags
+                FROM public.wh_gunny_logs
+                WHERE warehouse_id = $1 AND date = $2
+            ),
+            v AS (
+                SELECT 
+                    COUNT(DISTINCT CASE 
+                        WHEN LOWER(vehicle_access) IN ('authorized', 'authorised') 
+                        THEN number_plate 
+                    END) as authorised_vehicles,
+                    COUNT(DISTINCT CASE 
+                        WHEN LOWER(vehicle_access) IN ('unauthorized', 'unauthorised') 
+                        THEN number_plate 
+                    END) as unauthorised_vehicles
+                FROM public.wh_vehicle_logs
+                WHERE warehouse_id = $1 AND date = $2
+            ),
+            e AS (
+                SELECT
+                    COUNT(*) AS total_employee_logs,
+                    COUNT(DISTINCT emp_id) FILTER (WHERE emp_id IS NOT NULL) AS total_unique_authorised_employees,
+                    COUNT(*) FILTER (WHERE emp_id IS NULL) AS total_unauthorised_entries
+                FROM public.wh_emp_logs
+                WHERE warehouse_id = $1 AND date = $2
+            )
+            SELECT
+                w.warehouse_capacity,
+                b.loaded_bags,
+                b.unloaded_bags,
+                v.authorised_vehicles,
+                v.unauthorised_vehicles,
+                e.total_employee_logs,
+                e.total_unique_authorised_employees,
+                e.total_unauthorised_entries
+            FROM w, b, v, e
         """
-        cur.execute(warehouse_query, (warehouse_id,))
-        warehouse_row = cur.fetchone()
+        with db_cursor() as (conn, cur):
+            execute_prepared(cur, "warehouse_dashboard", dashboard_query, (warehouse_id, date))
+            dashboard_row = cur.fetchone()
 
-        if not warehouse_row:
-            cur.close()
-            conn.close()
+        if not dashboard_row:
             raise HTTPException(
                 status_code=404,
                 detail=f"Warehouse not found: {warehouse_id}"
             )
 
-        # Extract warehouse_capacity safely
-        warehouse_capacity = warehouse_row[2] if warehouse_row[2] is not None else 0
-
-        # ------------------------------------------
-        # 2) BAGS
-        # ------------------------------------------
-        bags_query = """
-            SELECT 
-                COALESCE(SUM(CASE WHEN LOWER(action) = 'loading' THEN count ELSE 0 END), 0) as loaded_bags,
-                COALESCE(SUM(CASE WHEN LOWER(action) = 'unloading' THEN count ELSE 0 END), 0) as unloaded_bags
-            FROM public.wh_gunny_logs
-            WHERE warehouse_id = %s AND date = %s
-        """
-        cur.execute(bags_query, (warehouse_id, date))
-        bags_result = cur.fetchone()
-
-        # ------------------------------------------
-        # 3) VEHICLES
-        # ------------------------------------------
-        vehicles_query = """
-            SELECT 
-                COUNT(DISTINCT CASE 
-                    WHEN LOWER(vehicle_access) IN ('authorized', 'authorised') 
-                    THEN number_plate 
-                END) as authorised_vehicles,
-                COUNT(DISTINCT CASE 
-                    WHEN LOWER(vehicle_access) IN ('unauthorized', 'unauthorised') 
-                    THEN number_plate 
-                END) as unauthorised_vehicles
-            FROM public.wh_vehicle_logs
-            WHERE warehouse_id = %s AND date = %s
-        """
-        cur.execute(vehicles_query, (warehouse_id, date))
-        vehicles_result = cur.fetchone()
-
-        # ------------------------------------------
-        # 4) EMPLOYEE SUMMARY
-        # ------------------------------------------
-        emp_summary_query = """
-            SELECT
-                COUNT(*) AS total_employee_logs,
-                COUNT(DISTINCT emp_id) FILTER (WHERE emp_id IS NOT NULL) AS total_unique_authorised_employees,
-                COUNT(*) FILTER (WHERE emp_id IS NULL) AS total_unauthorised_entries
-            FROM public.wh_emp_logs
-            WHERE warehouse_id = %s AND date = %s
-        """
-        cur.execute(emp_summary_query, (warehouse_id, date))
-        emp_summary = cur.fetchone()
-
-        cur.close()
-        conn.close()
-
         # Safe defaults
-        total_loaded_bags = bags_result[0] if bags_result else 0
-        total_unloaded_bags = bags_result[1] if bags_result else 0
-        total_authorised_vehicles = vehicles_result[0] if vehicles_result else 0
-        total_unauthorised_vehicles = vehicles_result[1] if vehicles_result else 0
-
-        total_employee_logs = emp_summary[0] if emp_summary else 0
-        total_unique_authorised_employees = emp_summary[1] if emp_summary else 0
-        total_unauthorised_entries = emp_summary[2] if emp_summary else 0
+        (
+            warehouse_capacity,
+            total_loaded_bags,
+            total_unloaded_bags,
+            total_authorised_vehicles,
+            total_unauthorised_vehicles,
+            total_employee_logs,
+            total_unique_authorised_employees,
+            total_unauthorised_entries
+        ) = (value or 0 for value in dashboard_row)
 
         # ------------------------------------------
         # FINAL RESPONSE
         # ------------------------------------------
-        return {
+        return DecimalORJSONResponse({
             "status": "success",
             "warehouse_id": warehouse_id,
             "date": date,
@@ -398,7 +415,7 @@ def get_warehouse_dashboard(
             "total_employee_logs": total_employee_logs,
             "total_unique_authorised_employees": total_unique_authorised_employees,
             "total_unauthorised_entries": total_unauthorised_entries
-        }
+        })
 
     except HTTPException:
         raise
@@ -2,32 +2,111 @@
 AWS Services integration (Bedrock and Kinesis Video Streams)
 """
 
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from cachetools.func import ttl_cache
 from app.core.config import settings
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# One session for every client: credentials, region and the botocore service
+# models are resolved once instead of on each client construction.
+_session = boto3.session.Session(
+    aws_access_key_id=settings.AWS_ACCESS_KEY,
+    aws_secret_access_key=settings.AWS_SECRET_KEY,
+    region_name=settings.AWS_REGION
+)
+# A Session is not thread-safe while it builds clients, so every
+# _session.client() call holds this lock; the clients themselves are once built.
+_session_lock = threading.Lock()
+
+# Archived-media clients are bound to a stream's data endpoint, so keep one
+# per endpoint
+_archived_media_clients = {}
+
+# Bedrock calls hold a thread for the whole generation, so they get their own
+# pool rather than starving the request threadpool the DB routes run on.
+_bedrock_executor = ThreadPoolExecutor(settings.BEDROCK_WORKERS, "bedrock")
+
+# Bedrock calls currently in flight, keyed by method and request body
+_inflight_bedrock = {}
+
 
 def get_bedrock_client():
     """Get AWS Bedrock client"""
-    return boto3.client(
-        "bedrock-runtime",
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_KEY,
-        region_name=settings.AWS_REGION
-    )
+    # botocore keeps only 10 connections per client by default; match the
+    # worker count so concurrent chats do not queue for a connection
+    with _session_lock:
+        return _session.client(
+            "bedrock-runtime",
+            config=Config(max_pool_connections=settings.BEDROCK_WORKERS)
+        )
+
+
+async def run_bedrock(func, *args, **kwargs):
+    """Run a blocking Bedrock call (or stream read) on the Bedrock worker pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bedrock_executor, partial(func, *args, **kwargs))
+
+
+async def run_bedrock_shared(func, **kwargs):
+    """
+    Run a Bedrock call, sharing one invocation between identical concurrent requests
+    
+    Callers that send the same request body while it is still in flight await
+    the first call's result instead of paying for another model invocation.
+    """
+    key = (func, orjson.dumps(kwargs, option=orjson.OPT_SORT_KEYS))
+    task = _inflight_bedrock.get(key)
+    if task is None:
+        task = asyncio.ensure_future(run_bedrock(func, **kwargs))
+        _inflight_bedrock[key] = task
+        task.add_done_callback(lambda _: _inflight_bedrock.pop(key, None))
+    # One caller disconnecting must not cancel the call for the others
+    return await asyncio.shield(task)
 
 
 def get_kvs_client():
     """Get AWS Kinesis Video Streams client"""
-    return boto3.client(
-        'kinesisvideo',
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_KEY,
-        region_name=settings.AWS_REGION
+    return kvs_client
+
+
+def get_archived_media_client(data_endpoint: str):
+    """Get the Kinesis Video archived media client for a data endpoint"""
+    client = _archived_media_clients.get(data_endpoint)
+    if client is None:
+        with _session_lock:
+            client = _archived_media_clients.get(data_endpoint)
+            if client is None:
+                client = _session.client(
+                    'kinesis-video-archived-media',
+                    endpoint_url=data_endpoint
+                )
+                _archived_media_clients[data_endpoint] = client
+    return client
+
+
+@ttl_cache(maxsize=512, ttl=3600)
+def get_data_endpoint(stream_arn: str) -> str:
+    """
+    Get the HLS data endpoint for a Kinesis Video Stream
+    
+    A stream's endpoint is stable for hours, so lookups are memoized per ARN
+    and only the session URL call goes to AWS on every request.
+    """
+    endpoint_response = get_kvs_client().get_data_endpoint(
+        StreamARN=stream_arn,
+        APIName='GET_HLS_STREAMING_SESSION_URL'
     )
+    return endpoint_response['DataEndpoint']
 
 
 def get_hls_streaming_url(stream_arn: str, expires: int = 3600) -> dict:
@@ -51,23 +130,11 @@ def get_hls_streaming_url(stream_arn: str, expires: int = 3600) -> dict:
         except IndexError:
             raise ValueError("Invalid stream ARN format")
         
-        kvs_client = get_kvs_client()
-        
         # Get data endpoint
-        endpoint_response = kvs_client.get_data_endpoint(
-            StreamARN=stream_arn,
-            APIName='GET_HLS_STREAMING_SESSION_URL'
-        )
-        data_endpoint = endpoint_response['DataEndpoint']
+        data_endpoint = get_data_endpoint(stream_arn)
         
-        # Create archived media client with data endpoint
-        kvs_archived_media_client = boto3.client(
-            'kinesis-video-archived-media',
-            aws_access_key_id=settings.AWS_ACCESS_KEY,
-            aws_secret_access_key=settings.AWS_SECRET_KEY,
-            region_name=settings.AWS_REGION,
-            endpoint_url=data_endpoint
-        )
+        # Reuse the archived media client bound to this data endpoint
+        kvs_archived_media_client = get_archived_media_client(data_endpoint)
         
         # Get HLS streaming session URL
         hls_response = kvs_archived_media_client.get_hls_streaming_session_url(
@@ -108,5 +175,7 @@ def get_hls_streaming_url(stream_arn: str, expires: int = 3600) -> dict:
         raise
 
 
-# Initialize global Bedrock client
+# Initialize global clients
 bedrock_client = get_bedrock_client()
+with _session_lock:
+    kvs_client = _session.client('kinesisvideo')
@@ -6,11 +6,18 @@ from azure.identity import ClientSecretCredential
 from azure.storage.blob import BlobServiceClient
 from app.core.config import settings
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Created on first use rather than at import, so a bad Azure setup fails the
+# transcript calls instead of the whole app; a failed attempt is retried on
+# the next call.
+_blob_service_client = None
+_blob_service_client_lock = threading.Lock()
 
-def get_blob_service_client() -> BlobServiceClient:
+
+def create_blob_service_client() -> BlobServiceClient:
     """
     Initialize and return Azure Blob Service Client
     
@@ -36,5 +43,11 @@ def get_blob_service_client() -> BlobServiceClient:
         raise
 
 
-# Global blob service client instance
-blob_service_client = get_blob_service_client()
+def get_blob_service_client() -> BlobServiceClient:
+    """Return the shared Azure Blob Service Client, creating it on first use"""
+    global _blob_service_client
+    if _blob_service_client is None:
+        with _blob_service_client_lock:
+            if _blob_service_client is None:
+                _blob_service_client = create_blob_service_client()
+    return _blob_service_client
@@ -2,14 +2,88 @@
 Transcript processing utilities for video chat functionality
 """
 
+import os
 import re
-import json
-from typing import List, Dict, Any
-from app.services.azure_service import blob_service_client
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import List, Dict, Any, Tuple
+from urllib.parse import urlsplit
+from cachetools import TTLCache
+from app.core.config import settings
+from app.services.azure_service import get_blob_service_client
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+_CHUNK_START_RE = re.compile(r'chunk_start-(\d+)')
+
+# Transcript blob names by (container, prefix), and the ETag each blob had
+# when it was last listed; both are guarded by the same lock
+_listing_cache = TTLCache(maxsize=1024, ttl=settings.TRANSCRIPT_LISTING_TTL)
+_blob_etags = TTLCache(maxsize=65536, ttl=settings.TRANSCRIPT_CACHE_TTL)
+_listing_cache_lock = threading.Lock()
+
+# Rendered video contexts by (container, blob names and ETags); contexts can be large
+_context_cache = TTLCache(maxsize=256, ttl=settings.TRANSCRIPT_CACHE_TTL)
+_context_cache_lock = threading.Lock()
+
+# Each blob's own slice of the context by (container, blob name, ETag), so a
+# chunk that gains a transcript file only downloads that one file
+_blob_context_cache = TTLCache(maxsize=8192, ttl=settings.TRANSCRIPT_CACHE_TTL)
+_blob_context_cache_lock = threading.Lock()
+
+# A chunk's transcript is split over many small blobs; fetching them side by
+# side makes the read take about as long as the slowest blob, not their sum.
+# Downloads only wait on the network, so the pool is sized well past the CPUs.
+_download_executor = ThreadPoolExecutor(
+    settings.TRANSCRIPT_DOWNLOAD_WORKERS or min(32, (os.cpu_count() or 1) * 4),
+    "transcript-download"
+)
+
+# Transcripts over BLOB_SINGLE_GET_SIZE bytes are fetched as parallel range
+# GETs by the SDK; smaller ones (the usual case) still take a single request
+BLOB_DOWNLOAD_CONCURRENCY = 8
+BLOB_SINGLE_GET_SIZE = 4 * 1024 * 1024
+
+
+def _list_transcript_blobs(container_name: str, prefix: str) -> Tuple[str, ...]:
+    """
+    List a prefix's transcript blob names, memoized per (container, prefix)
+    
+    Listings are cheap next to downloads, so they are kept only briefly
+    (TRANSCRIPT_LISTING_TTL): each refresh picks up new blobs and updated ETags,
+    while the downloaded context stays cached until one of them changes. Empty
+    listings are not kept (the transcripts may still be on their way), and
+    errors propagate, so they are never cached either.
+    """
+    cache_key = (container_name, prefix)
+    with _listing_cache_lock:
+        blob_names = _listing_cache.get(cache_key)
+    if blob_names is not None:
+        return blob_names
+    
+    container_client = get_blob_service_client().get_container_client(container_name)
+    # Where transcript files share a leading name (TRANSCRIPT_NAME_PREFIX, e.g.
+    # "chunk_start"), the service skips everything else in the folder itself;
+    # the name check below still applies either way
+    blob_list = container_client.list_blobs(name_starts_with=prefix + settings.TRANSCRIPT_NAME_PREFIX)
+    blobs = [
+        blob for blob in blob_list
+        if blob.name.endswith('.json') and 'chunk_start' in blob.name
+    ]
+    blob_names = tuple(blob.name for blob in blobs)
+    
+    with _listing_cache_lock:
+        # A listing always refreshes the ETags, so rewritten blobs are noticed
+        # once the cached listing expires
+        for blob in blobs:
+            _blob_etags[(container_name, blob.name)] = blob.etag
+        if blob_names:
+            _listing_cache[cache_key] = blob_names
+    return blob_names
+
 
 def list_transcript_files(container_name: str, prefix: str) -> List[str]:
     """
@@ -23,13 +97,7 @@ def list_transcript_files(container_name: str, prefix: str) -> List[str]:
         List[str]: List of blob names matching criteria
     """
     try:
-        container_client = blob_service_client.get_container_client(container_name)
-        blob_list = container_client.list_blobs(name_starts_with=prefix)
-        
-        return [
-            blob.name for blob in blob_list
-            if blob.name.endswith('.json') and 'chunk_start' in blob.name
-        ]
+        return list(_list_transcript_blobs(container_name, prefix))
     except Exception as e:
         logger.error(f"Error listing transcript files: {e}")
         return []
@@ -45,50 +113,125 @@ def extract_chunk_start(blob_name: str) -> int:
     Returns:
         int: Chunk start number, or infinity if not found
     """
-    match = re.search(r'chunk_start-(\d+)', blob_name)
+    match = _CHUNK_START_RE.search(blob_name)
     return int(match.group(1)) if match else float('inf')
 
 
-def merge_transcripts(container_name: str, blob_names: List[str]) -> Dict[str, Any]:
+def _download_transcript(container_client, blob_name: str) -> Tuple[Any, bool]:
     """
-    Merge multiple transcript JSON files into single result
-    
-    Args:
-        container_name: Azure blob container name
-        blob_names: List of blob file names to merge
+    Download and decode one transcript blob
     
     Returns:
-        Dict[str, Any]: Merged transcript data
+        Tuple[Any, bool]: The decoded JSON (None if unusable), and whether the
+        download itself failed
     """
-    results = []
-    sorted_names = sorted(blob_names, key=extract_chunk_start)
-    container_client = blob_service_client.get_container_client(container_name)
-    
-    for blob_name in sorted_names:
-        try:
-            blob_client = container_client.get_blob_client(blob_name)
-            blob_data = blob_client.download_blob()
-            content = blob_data.readall().decode('utf-8')
-            data = json.loads(content)
-            
-            if isinstance(data, list):
-                results.extend(data)
-            else:
-                results.append(data)
-        except json.JSONDecodeError as e:
-            logger.warning(f"Skipping invalid JSON in {blob_name}: {e}")
-        except Exception as e:
-            logger.error(f"Error reading {blob_name}: {e}")
-    
+    try:
+        blob_client = container_client.get_blob_client(blob_name)
+        blob_data = blob_client.download_blob(
+            max_concurrency=BLOB_DOWNLOAD_CONCURRENCY,
+            max_single_get_size=BLOB_SINGLE_GET_SIZE
+        )
+        # readinto() fills our buffer directly, and orjson parses the UTF-8 in
+        # place through a view of it: no str decode, and none of the full copy
+        # readall() makes when handing the bytes back
+        buffer = BytesIO()
+        blob_data.readinto(buffer)
+        with buffer.getbuffer() as view:
+            return orjson.loads(view), False
+    except orjson.JSONDecodeError as e:
+        logger.warning(f"Skipping invalid JSON in {blob_name}: {e}")
+        return None, False
+    except Exception as e:
+        logger.error(f"Error reading {blob_name}: {e}")
+        return None, True
+
+
+def _transcript_data(results: List[Any]) -> Dict[str, Any]:
+    """Wrap decoded transcript entries in the merged transcript envelope"""
     return {
         "statusCode": 200,
         "videoTranscript": {
-            "results": json.dumps(results),
+            "results": results,
             "count_results": []
         }
     }
 
 
+def _blob_context(data: Any) -> str:
+    """Render one transcript blob's decoded JSON as its slice of the video context"""
+    if data is None:
+        return ""
+    return build_video_context(_transcript_data(data if isinstance(data, list) else [data]))
+
+
+def get_video_context(container_name: str, blob_names: List[str]) -> str:
+    """
+    Build the video context for a set of transcript blobs, reusing earlier builds
+    
+    The context is keyed on the container, the exact blob names and the ETags
+    they were last listed with: a newly written transcript file or a rewritten
+    one changes the key, anything else reuses the earlier build without
+    downloading again. A context is only kept when every blob was read
+    successfully.
+    
+    Each blob's slice of the context is cached on its own as well, so when a
+    key does change only the new or rewritten blobs are downloaded; the slices
+    are joined in chunk_start order, exactly as a full rebuild would render them.
+    
+    Args:
+        container_name: Azure blob container name
+        blob_names: Transcript blob names from list_transcript_files
+    
+    Returns:
+        str: Formatted video context for AI prompt
+    """
+    sorted_names = sorted(blob_names, key=extract_chunk_start)
+    with _listing_cache_lock:
+        blobs = [
+            (container_name, blob_name, _blob_etags.get((container_name, blob_name)))
+            for blob_name in sorted_names
+        ]
+    cache_key = (container_name, tuple(sorted(blob[1:] for blob in blobs)))
+    with _context_cache_lock:
+        video_context = _context_cache.get(cache_key)
+    if video_context is not None:
+        return video_context
+    
+    with _blob_context_cache_lock:
+        sections = [_blob_context_cache.get(blob) for blob in blobs]
+    missing = [blob for blob, section in zip(blobs, sections) if section is None]
+    
+    failed = 0
+    if missing:
+        container_client = get_blob_service_client().get_container_client(container_name)
+        # Downloads run concurrently, but map() hands them back in chunk_start order
+        downloads = _download_executor.map(
+            lambda blob: _download_transcript(container_client, blob[1]),
+            missing
+        )
+        fresh = {}
+        for blob, (data, download_failed) in zip(missing, downloads):
+            if download_failed:
+                failed += 1
+            else:
+                fresh[blob] = _blob_context(data)
+        
+        with _blob_context_cache_lock:
+            _blob_context_cache.update(fresh)
+        sections = [
+            section if section is not None else fresh.get(blob, "")
+            for blob, section in zip(blobs, sections)
+        ]
+    
+    video_context = "".join(sections)
+    logger.info(f"Merged {len(blob_names)} transcript files ({len(missing)} downloaded)")
+    
+    if video_context and not failed:
+        with _context_cache_lock:
+            _context_cache[cache_key] = video_context
+    return video_context
+
+
 def build_video_context(transcript_data: Dict[str, Any]) -> str:
     """
     Build video context string from transcript data
@@ -99,25 +242,27 @@ def build_video_context(transcript_data: Dict[str, Any]) -> str:
     Returns:
         str: Formatted video context for AI prompt
     """
-    video_context = ""
+    parts = []
     
     try:
         if "videoTranscript" in transcript_data and "results" in transcript_data["videoTranscript"]:
             results = transcript_data["videoTranscript"]["results"]
             
+            # Older envelopes carried the results as a JSON string
             if isinstance(results, str):
-                results = json.loads(results)
+                results = orjson.loads(results)
             
             for item in results:
                 if isinstance(item, dict):
-                    for key in sorted(item):
-                        video_context += f"**************{key}**************\n"
-                        video_context += f"{item[key]}\n\n"
+                    parts.extend(
+                        f"**************{key}**************\n{item[key]}\n\n"
+                        for key in sorted(item)
+                    )
     except Exception as e:
         logger.error(f"Error parsing transcript: {e}")
         raise
     
-    return video_context
+    return "".join(parts)
 
 
 def parse_blob_url(transcript_blob_url: str) -> tuple:
@@ -133,22 +278,21 @@ def parse_blob_url(transcript_blob_url: str) -> tuple:
     Raises:
         ValueError: If URL format is unsupported
     """
-    if transcript_blob_url.startswith("https://"):
-        url_parts = transcript_blob_url.replace("https://", "").split("/")
-        container_name = url_parts[1]
-        
-        # Remove file name if present and get only the folder as prefix
-        last_part = url_parts[-1]
-        if last_part.endswith('.json'):
-            blob_prefix = "/".join(url_parts[2:-1]) + "/"  # Get only containing folder
-        else:
-            blob_prefix = "/".join(url_parts[2:]) + "/"    # already a folder
-    else:
+    url = urlsplit(transcript_blob_url)
+    if url.scheme != "https":
         raise ValueError(f"Unsupported blob URL format: {transcript_blob_url}")
     
+    # Path is /<container>/<folders...>[/<file>.json]; a query string (SAS token)
+    # or a trailing slash no longer leaks into the prefix
+    container_name, _, blob_path = url.path.lstrip("/").partition("/")
+    folders = [segment for segment in blob_path.split("/") if segment]
+    
+    # Remove file name if present and get only the folder as prefix
+    if folders and folders[-1].endswith('.json'):
+        folders.pop()
+    
     # Ensure prefix ends with / for proper folder listing
-    if not blob_prefix.endswith("/"):
-        blob_prefix += "/"
+    blob_prefix = "/".join(folders) + "/"
     
     return container_name, blob_prefix
 
@@ -172,3 +316,11 @@ SYSTEM_TEMPLATE = """The following is a friendly conversation between a Human (H
 {video_context}
 </video_context>
 """
+
+# Split once so rendering is a single join instead of a scan of the template
+_SYSTEM_PREFIX, _SYSTEM_SUFFIX = SYSTEM_TEMPLATE.split("{video_context}", 1)
+
+
+def render_system(video_context: str) -> str:
+    """Fill the video context into the chat system prompt"""
+    return "".join((_SYSTEM_PREFIX, video_context, _SYSTEM_SUFFIX))
@@ -0,0 +1,11 @@
+-- Composite indexes for the per-camera, per-day log lookups in app.py
+-- (get_warehouse_data_with_sessions and get_warehouse_status_summary).
+-- The queries compare camera_id and date against plain bound parameters,
+-- so a B-tree on the raw columns is usable by the planner.
+-- CONCURRENTLY cannot run inside a transaction block; apply with psql directly.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_gunny_cam_date
+    ON warehouse."wh-gunny-bag-logs" (camera_id, date);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vl_cam_date
+    ON warehouse."wh-vehicle-logs" (camera_id, date);
@@ -0,0 +1,8 @@
+-- Supports the worker/log join in app.py's /hamali-logs, which filters
+-- wh-worker-logs by worker_id and date. INCLUDE carries every log column the
+-- query reads, so the log side of the join is answered by an index-only scan.
+-- CONCURRENTLY cannot run inside a transaction block; apply with psql directly.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_worker_logs_worker_date
+    ON warehouse."wh-worker-logs" (worker_id, date)
+    INCLUDE (id, start_time, end_time, camera_id, crop_s3_url);
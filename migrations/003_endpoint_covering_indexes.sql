@@ -0,0 +1,16 @@
+-- Composite indexes matching the filter/sort shapes of the app.py endpoints.
+-- CONCURRENTLY cannot run inside a transaction block; apply with psql directly.
+
+-- /hamali-logs and the /warehouses details endpoints look staff up by warehouse.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ww_warehouse
+    ON warehouse."wh-workers" (warehouse_id);
+
+-- Camera map load, session data and the details endpoints.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_wc_warehouse_cam
+    ON warehouse."wh-cameras" (warehouse_id, camera_id);
+
+-- /Camera_Chunks: partial index matching its WHERE video_s3_url IS NOT NULL
+-- filter and ORDER BY created_at DESC.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_wgbl_cam_created
+    ON warehouse."wh-gunny-bag-logs" (camera_id, created_at DESC)
+    WHERE video_s3_url IS NOT NULL;
@@ -0,0 +1,22 @@
+-- Composite indexes for the app/routers/camera.py log and chunk endpoints, which
+-- filter on (warehouse_id, cam_id, date) and order by time/created_at. The
+-- trailing sort column lets rows come back already ordered. On the three log
+-- tables INCLUDE carries every other column the log queries select (id
+-- included), so they can be answered by index-only scans; wh_chunks rows also
+-- need the blob URLs and are read from the heap in index order.
+-- CONCURRENTLY cannot run inside a transaction block; apply with psql directly.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS wh_emp_logs_whcamdate_time_idx
+    ON public.wh_emp_logs (warehouse_id, cam_id, date, time)
+    INCLUDE (id, emp_id, crop_blob_url, chunk_id, emp_access);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS wh_gunny_logs_whcamdate_created_idx
+    ON public.wh_gunny_logs (warehouse_id, cam_id, date, created_at)
+    INCLUDE (id, count, action, chunk_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS wh_vehicle_logs_whcamdate_created_idx
+    ON public.wh_vehicle_logs (warehouse_id, cam_id, date, created_at)
+    INCLUDE (id, number_plate, vehicle_access, chunk_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS wh_chunks_whcamdate_time_idx
+    ON public.wh_chunks (warehouse_id, cam_id, date, time);
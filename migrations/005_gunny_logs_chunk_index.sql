@@ -0,0 +1,9 @@
+-- The vehicle-wise gunny count in app/routers/camera.py joins each plate's
+-- distinct chunks to wh_gunny_logs on chunk_id within one (warehouse_id, cam_id,
+-- date). Ending the key in chunk_id lets the planner drive a nested loop of
+-- parameterized index-only probes instead of scanning the whole day per plate.
+-- CONCURRENTLY cannot run inside a transaction block; apply with psql directly.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS wh_gunny_logs_whcamdate_chunk_idx
+    ON public.wh_gunny_logs (warehouse_id, cam_id, date, chunk_id)
+    INCLUDE (count, action, created_at);
@@ -0,0 +1,18 @@
+-- Covering indexes for the app/routers/warehouse.py dashboard, whose aggregates
+-- filter each log table on (warehouse_id, date) across all cameras. The 004
+-- indexes lead with (warehouse_id, cam_id, date) and cannot seek on date
+-- without a camera. The INCLUDE columns are everything the aggregates read, so
+-- the LOWER(...) CASE expressions are evaluated during an index-only scan.
+-- CONCURRENTLY cannot run inside a transaction block; apply with psql directly.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS wh_gunny_logs_whdate_idx
+    ON public.wh_gunny_logs (warehouse_id, date)
+    INCLUDE (action, count);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS wh_vehicle_logs_whdate_idx
+    ON public.wh_vehicle_logs (warehouse_id, date)
+    INCLUDE (vehicle_access, number_plate);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS wh_emp_logs_whdate_idx
+    ON public.wh_emp_logs (warehouse_id, date)
+    INCLUDE (emp_id);
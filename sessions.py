@@ -0,0 +1,155 @@
+"""
+Vehicle session detection for the warehouse sessions API.
+
+Pure functions over log rows so the CPU-heavy grouping can run off the event
+loop (see the run_in_threadpool call in app.py) and be compiled with mypyc
+when needed.
+"""
+import heapq
+from datetime import datetime
+from itertools import chain
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+Row = Dict[str, Any]
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def parse_timestamp(value: str) -> Optional[datetime]:
+    """Parse a 'YYYY-MM-DD HH:MM:SS' string, returning None when it is not a valid timestamp"""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(value, TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+def _timed_logs(logs: Iterable[Row]) -> Iterator[Tuple[datetime, Row]]:
+    """Yield (timestamp, log) for logs with a usable start_time, parsing string timestamps once"""
+    for log in logs:
+        timestamp = log['start_time']
+        if not timestamp:
+            continue
+        if isinstance(timestamp, str):
+            timestamp = parse_timestamp(timestamp)
+            if timestamp is None:
+                continue
+            log['start_time'] = timestamp
+        yield timestamp, log
+
+
+def detect_vehicle_sessions(
+    gunny_logs: Iterable[Row], vehicle_logs: Sequence[Row]
+) -> List[Dict[str, Any]]:
+    """Group gunny bag logs into per-vehicle sessions using the vehicle entry logs"""
+    # gunny_logs may be a streaming cursor, so peek for a first row instead of len()
+    gunny_logs = iter(gunny_logs)
+    first_gunny = next(gunny_logs, None)
+    if first_gunny is None and not vehicle_logs:
+        return []
+    if first_gunny is not None:
+        gunny_logs = chain((first_gunny,), gunny_logs)
+    
+    sessions: Dict[str, Dict[str, Any]] = {}  # Sessions by vehicle number, in order of first appearance
+    current_vehicle: Optional[str] = None
+    
+    # Both inputs arrive ordered by start_time, so a single merge pass yields
+    # every event in time order (gunny events first on equal timestamps)
+    events = heapq.merge(
+        ((timestamp, glog, False) for timestamp, glog in _timed_logs(gunny_logs)),
+        ((timestamp, vlog, True) for timestamp, vlog in _timed_logs(vehicle_logs)),
+        key=itemgetter(0)
+    )
+    
+    # FALLBACK: If no vehicle logs, create a default session with "XXXX"
+    if not vehicle_logs:
+        fallback_vehicle = "XXXX"
+        
+        first_event = next(events, None)
+        first_timestamp = first_event[0] if first_event else datetime.now()
+        if first_event:
+            events = chain((first_event,), events)
+        
+        sessions[fallback_vehicle] = {
+            'session_id': None,
+            'vehicle_number': fallback_vehicle,
+            'start_time': first_timestamp,
+            'end_time': first_timestamp,
+            'start_log': first_event[1] if first_event else None,
+            'end_log': first_event[1] if first_event else None,
+            'chunks': [],
+            'total_bags_loaded': 0,
+            'total_bags_unloaded': 0,
+            'vehicle_data': None,
+            'authorized_bags': 0,
+            'status': 'Unknown',
+            'authorization': 'Unknown'
+        }
+        current_vehicle = fallback_vehicle
+    
+    for timestamp, log, is_vehicle in events:
+        if is_vehicle:
+            vehicle_num = log['vehicle_number']
+            
+            # Check if this is a new vehicle
+            if vehicle_num != current_vehicle:
+                current_vehicle = vehicle_num
+                
+                # Check if we already have a session for this vehicle
+                if vehicle_num not in sessions:
+                    # Create new session for this vehicle
+                    sessions[vehicle_num] = {
+                        'session_id': None,
+                        'vehicle_number': vehicle_num,
+                        'start_time': timestamp,
+                        'end_time': timestamp,
+                        'start_log': log,
+                        'end_log': log,
+                        'chunks': [],
+                        'total_bags_loaded': 0,
+                        'total_bags_unloaded': 0,
+                        'vehicle_data': log,
+                        'authorized_bags': log['bags_capacity'],
+                        'status': log.get('status', 'Unknown'),
+                        'authorization': log.get('vehicle_access', 'Unknown')
+                    }
+                else:
+                    # Update end time
+                    sessions[vehicle_num]['end_time'] = timestamp
+                    sessions[vehicle_num]['end_log'] = log
+            else:
+                # Same vehicle continuing, just update end time
+                if current_vehicle in sessions:
+                    sessions[current_vehicle]['end_time'] = timestamp
+                    sessions[current_vehicle]['end_log'] = log
+        
+        elif current_vehicle and current_vehicle in sessions:
+            # Add gunny bag data to current vehicle's session
+            count = log['count']
+            status = log.get('status', '')
+            
+            chunk_info = {
+                'chunk_id': str(log['id']),
+                'video_url': log.get('video_s3_url', ''),
+                'timestamp': timestamp,
+                'time': log.get('t_hms'),
+                'status': status,
+                'bags_count': count
+            }
+            
+            session = sessions[current_vehicle]
+            session['chunks'].append(chunk_info)
+            session['end_time'] = timestamp
+            session['end_log'] = log
+            
+            if status == 'LOADING':
+                session['total_bags_loaded'] += count
+            elif status == 'UNLOADING':
+                session['total_bags_unloaded'] += count
+    
+    # Sessions were created in event order, so they are already sorted by start time
+    return list(sessions.values())
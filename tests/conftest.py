@@ -19,6 +19,21 @@ def test_app():
     return app
 
 
+@pytest.fixture(autouse=True)
+def clear_response_caches():
+    """Keep cached responses from one test out of the next"""
+    from app.routers import camera, chat
+    from app.services import transcript_service
+    camera._stream_url_cache.clear()
+    camera._camera_row_cache.clear()
+    chat._summary_cache.clear()
+    transcript_service._listing_cache.clear()
+    transcript_service._blob_etags.clear()
+    transcript_service._context_cache.clear()
+    transcript_service._blob_context_cache.clear()
+    yield
+
+
 @pytest.fixture(scope="function")
 def test_client(test_app):
     """Fixture providing a test client for making API requests"""
@@ -37,22 +52,49 @@ def mock_db_connection():
     mock_cursor.__enter__ = MagicMock(return_value=mock_cursor)
     mock_cursor.__exit__ = MagicMock(return_value=False)
     
+    # Iterating the cursor (server-side cursors) yields whatever fetchall() is mocked to return
+    mock_cursor.__iter__.side_effect = lambda: iter(mock_cursor.fetchall())
+    
     return mock_conn, mock_cursor
 
 
 @pytest.fixture(scope="function")
 def mock_get_connection(mock_db_connection):
-    """Fixture that patches the database get_connection function"""
+    """Fixture that patches the pooled connection lease/release functions"""
     mock_conn, mock_cursor = mock_db_connection
     
-    # Patch at all router levels where get_connection is imported
+    # Routers lease connections through get_conn(), which looks these up at call time
     with patch('app.core.database.get_connection', return_value=mock_conn), \
-         patch('app.routers.warehouse.get_connection', return_value=mock_conn), \
-         patch('app.routers.camera.get_connection', return_value=mock_conn), \
-         patch('app.routers.chat.get_connection', return_value=mock_conn):
+         patch('app.core.database.release_connection'):
         yield mock_conn, mock_cursor
 
 
+@pytest.fixture(scope="function")
+def mock_statement_rows(mock_get_connection):
+    """
+    Fixture answering fetches by prepared statement name
+    
+    Queries run concurrently each get their own cursor, so call order can't be
+    relied on; fill the returned dict with {statement name: rows} instead.
+    """
+    mock_conn, _ = mock_get_connection
+    rows_by_statement = {}
+    
+    def make_cursor(*args, **kwargs):
+        cursor = MagicMock()
+        
+        def rows():
+            sql = cursor.execute.call_args[0][0]
+            return rows_by_statement[sql.rsplit("EXECUTE ", 1)[1].split(" ")[0]]
+        
+        cursor.fetchall.side_effect = rows
+        cursor.fetchone.side_effect = lambda: next(iter(rows()), None)
+        return cursor
+    
+    mock_conn.cursor.side_effect = make_cursor
+    return rows_by_statement
+
+
 # Sample Test Data Fixtures
 
 @pytest.fixture
@@ -234,14 +276,14 @@ def sample_gunny_log_rows():
 
 @pytest.fixture
 def sample_vehicle_log_rows():
-    """Sample vehicle log database rows"""
+    """Sample per-plate vehicle log rows (first and last sighting per number plate)"""
     return [
         (1, "WH001", "CAM001", date(2025, 11, 19),
          "chunk_2025-11-19_10-00-00", "KA01AB1234", "authorized",
-         datetime(2025, 11, 19, 10, 20, 0)),
+         datetime(2025, 11, 19, 10, 20, 0), datetime(2025, 11, 19, 10, 45, 0)),
         (2, "WH001", "CAM001", date(2025, 11, 19),
          "chunk_2025-11-19_10-00-00", "KA02CD5678", "unauthorized",
-         datetime(2025, 11, 19, 11, 10, 0))
+         datetime(2025, 11, 19, 11, 10, 0), datetime(2025, 11, 19, 11, 10, 0))
     ]
 
 
@@ -13,6 +13,7 @@ Tests for:
 import pytest
 from unittest.mock import patch, MagicMock
 from botocore.exceptions import ClientError
+from datetime import datetime
 
 
 @pytest.mark.unit
@@ -195,6 +196,8 @@ class TestGetEmployeeLogs:
     ):
         """Test successful employee log retrieval with hourly grouping"""
         mock_conn, mock_cursor = mock_get_connection
+        # Day totals (total logs, distinct employees), then the streamed log rows
+        mock_cursor.fetchone.return_value = (2, 2)
         mock_cursor.fetchall.return_value = sample_employee_log_rows
         
         response = test_client.get(
@@ -222,7 +225,7 @@ class TestGetEmployeeLogs:
     def test_get_employee_logs_no_data(self, test_client, mock_get_connection):
         """Test response when no logs exist"""
         mock_conn, mock_cursor = mock_get_connection
-        mock_cursor.fetchall.return_value = []
+        mock_cursor.fetchone.return_value = (0, 0)
         
         response = test_client.get(
             "/api/v1/warehouses/WH001/cameras/CAM001/logs/employees",
@@ -257,7 +260,11 @@ class TestGetGunnyBagLogs:
     ):
         """Test successful gunny bag log retrieval"""
         mock_conn, mock_cursor = mock_get_connection
-        mock_cursor.fetchall.return_value = sample_gunny_log_rows
+        # Per-action summary (action, logs, bags), then the streamed log rows
+        mock_cursor.fetchall.side_effect = [
+            [("loading", 1, 50), ("unloading", 1, 30)],
+            sample_gunny_log_rows
+        ]
         
         response = test_client.get(
             "/api/v1/warehouses/WH001/cameras/CAM001/logs/gunny-bags",
@@ -275,6 +282,7 @@ class TestGetGunnyBagLogs:
         assert "unloading" in data["action_summary"]
         assert data["action_summary"]["loading"]["total_bags"] == 50
         assert data["action_summary"]["unloading"]["total_bags"] == 30
+        assert len(data["logs"]) == 2
     
     def test_get_gunny_logs_no_data(self, test_client, mock_get_connection):
         """Test response when no logs exist"""
@@ -300,12 +308,13 @@ class TestGetVehicleLogs:
     def test_get_vehicle_logs_success(
         self,
         test_client,
-        mock_get_connection,
+        mock_statement_rows,
         sample_vehicle_log_rows
     ):
         """Test successful vehicle log retrieval"""
-        mock_conn, mock_cursor = mock_get_connection
-        mock_cursor.fetchall.return_value = sample_vehicle_log_rows
+        # Plates and the access summary are fetched concurrently
+        mock_statement_rows["vehicle_plates"] = sample_vehicle_log_rows
+        mock_statement_rows["vehicle_access_summary"] = [("authorized", 1), ("unauthorized", 1)]
         
         response = test_client.get(
             "/api/v1/warehouses/WH001/cameras/CAM001/logs/vehicles",
@@ -321,6 +330,7 @@ class TestGetVehicleLogs:
         assert "access_summary" in data
         assert data["access_summary"]["authorized"] == 1
         assert data["access_summary"]["unauthorized"] == 1
+        assert data["logs"][0]["created_at"] == "10:20:00-10:45:00"
     
     def test_get_vehicle_logs_no_data(self, test_client, mock_get_connection):
         """Test response when no logs exist"""
@@ -351,26 +361,16 @@ class TestGetVehicleGunnyAnalytics:
         """Test successful vehicle-wise gunny bag analytics"""
         mock_conn, mock_cursor = mock_get_connection
         
-        # Mock vehicle logs query
-        vehicle_data = [
-            ("KA01AB1234", ["chunk1", "chunk2"]),
-            ("KA02CD5678", ["chunk3"])
-        ]
-        
-        # Mock gunny logs query for each vehicle
-        gunny_data_vehicle1 = [
-            ("loading", 100, 2, "10:00:00", "10:30:00"),
-            ("unloading", 50, 1, "11:00:00", "11:00:00")
-        ]
-        
-        gunny_data_vehicle2 = [
-            ("loading", 75, 1, "12:00:00", "12:00:00")
-        ]
-        
-        mock_cursor.fetchall.side_effect = [
-            vehicle_data,
-            gunny_data_vehicle1,
-            gunny_data_vehicle2
+        # One row per (vehicle, action) from the combined vehicle/gunny query;
+        # the last vehicle has no gunny logs
+        mock_cursor.fetchall.return_value = [
+            ("KA01AB1234", ["chunk1", "chunk2"], "loading", 100, 2,
+             datetime(2025, 11, 19, 10, 0, 0), datetime(2025, 11, 19, 10, 30, 0)),
+            ("KA01AB1234", ["chunk1", "chunk2"], "unloading", 50, 1,
+             datetime(2025, 11, 19, 11, 0, 0), datetime(2025, 11, 19, 11, 0, 0)),
+            ("KA02CD5678", ["chunk3"], "loading", 75, 1,
+             datetime(2025, 11, 19, 12, 0, 0), datetime(2025, 11, 19, 12, 0, 0)),
+            ("KA03EF9012", ["chunk4"], None, None, None, None, None)
         ]
         
         response = test_client.get(
@@ -382,15 +382,26 @@ class TestGetVehicleGunnyAnalytics:
         data = response.json()
         
         assert data["status"] == "success"
-        assert data["total_vehicles"] == 2
+        assert data["total_vehicles"] == 3
         assert data["grand_total_bags"] == 225  # 100 + 50 + 75
-        assert len(data["vehicles"]) == 2
+        assert len(data["vehicles"]) == 3
         
         # Check first vehicle
         vehicle1 = data["vehicles"][0]
         assert vehicle1["number_plate"] == "KA01AB1234"
+        assert vehicle1["chunk_ids"] == ["chunk1", "chunk2"]
         assert vehicle1["total_bags_all_actions"] == 150
         assert len(vehicle1["action_breakdown"]) == 2
+        assert vehicle1["action_breakdown"][0]["first_entry_time"] == "10:00:00"
+        
+        # Vehicle without gunny logs is still listed
+        vehicle3 = data["vehicles"][2]
+        assert vehicle3["total_bags_all_actions"] == 0
+        assert vehicle3["action_breakdown"] == []
+        
+        # Single query instead of one per vehicle (plus its one-off PREPARE)
+        executed = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        assert [sql for sql in executed if sql.startswith("EXECUTE")] == executed[-1:]
     
     def test_get_vehicle_gunny_analytics_no_vehicles(
         self,
@@ -4,8 +4,12 @@ Unit Tests for Chat Endpoint
 Tests for:
 - POST /api/v1/warehouses/{warehouse_id}/cameras/{cam_id}/chunks/{chunk_id}/chat
   AI-powered video chat with AWS Bedrock integration
+- POST /api/v1/warehouses/{warehouse_id}/cameras/{cam_id}/chunks/{chunk_id}/chat/stream
+  The same chat, streamed as server-sent events
 """
 
+import asyncio
+import json
 import pytest
 from unittest.mock import patch, MagicMock
 import uuid
@@ -28,14 +32,13 @@ class TestChatWithVideo:
         mock_cursor.fetchone.return_value = sample_chunk_rows[0]
         
         # Mock Azure Blob and AWS services
-        with patch('app.services.transcript_service.list_transcript_files', return_value=['transcript1.json']):
-            with patch('app.services.transcript_service.merge_transcripts', return_value=[{"timestamp": "00:00:05", "text": "Vehicle entering"}]):
-                with patch('app.services.transcript_service.build_video_context', return_value="Video context data"):
-                    with patch('app.services.aws_service.bedrock_client.converse', return_value=mock_aws_bedrock_response):
-                        response = test_client.post(
-                            "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
-                            json=sample_chat_request
-                        )
+        with patch('app.routers.chat.list_transcript_files', return_value=['transcript1.json']):
+            with patch('app.routers.chat.get_video_context', return_value="Video context data"):
+                with patch('app.services.aws_service.bedrock_client.converse', return_value=mock_aws_bedrock_response):
+                    response = test_client.post(
+                        "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
+                        json=sample_chat_request
+                    )
         
         assert response.status_code == 200
         data = response.json()
@@ -81,14 +84,13 @@ class TestChatWithVideo:
             "chatTransactionId": "test-transaction-123"
         }
         
-        with patch('app.services.transcript_service.list_transcript_files', return_value=['transcript1.json']):
-            with patch('app.services.transcript_service.merge_transcripts', return_value=[{"timestamp": "00:00:05"}]):
-                with patch('app.services.transcript_service.build_video_context', return_value="Video context"):
-                    with patch('app.services.aws_service.bedrock_client.converse', return_value=mock_aws_bedrock_response):
-                        response = test_client.post(
-                            "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
-                            json=request_with_history
-                        )
+        with patch('app.routers.chat.list_transcript_files', return_value=['transcript1.json']):
+            with patch('app.routers.chat.get_video_context', return_value="Video context"):
+                with patch('app.services.aws_service.bedrock_client.converse', return_value=mock_aws_bedrock_response):
+                    response = test_client.post(
+                        "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
+                        json=request_with_history
+                    )
         
         assert response.status_code == 200
         data = response.json()
@@ -152,7 +154,7 @@ class TestChatWithVideo:
         mock_conn, mock_cursor = mock_get_connection
         mock_cursor.fetchone.return_value = sample_chunk_rows[0]
         
-        with patch('app.services.transcript_service.list_transcript_files', return_value=[]):
+        with patch('app.routers.chat.list_transcript_files', return_value=[]):
             response = test_client.post(
                 "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
                 json=sample_chat_request
@@ -172,8 +174,8 @@ class TestChatWithVideo:
         mock_conn, mock_cursor = mock_get_connection
         mock_cursor.fetchone.return_value = sample_chunk_rows[0]
         
-        with patch('app.services.transcript_service.list_transcript_files', return_value=['transcript1.json']):
-            with patch('app.services.transcript_service.merge_transcripts', side_effect=Exception("Blob storage error")):
+        with patch('app.routers.chat.list_transcript_files', return_value=['transcript1.json']):
+            with patch('app.routers.chat.get_video_context', side_effect=Exception("Blob storage error")):
                 response = test_client.post(
                     "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
                     json=sample_chat_request
@@ -192,13 +194,12 @@ class TestChatWithVideo:
         mock_conn, mock_cursor = mock_get_connection
         mock_cursor.fetchone.return_value = sample_chunk_rows[0]
         
-        with patch('app.services.transcript_service.list_transcript_files', return_value=['transcript1.json']):
-            with patch('app.services.transcript_service.merge_transcripts', return_value=[{"data": "test"}]):
-                with patch('app.services.transcript_service.build_video_context', return_value=None):
-                    response = test_client.post(
-                        "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
-                        json=sample_chat_request
-                    )
+        with patch('app.routers.chat.list_transcript_files', return_value=['transcript1.json']):
+            with patch('app.routers.chat.get_video_context', return_value=None):
+                response = test_client.post(
+                    "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
+                    json=sample_chat_request
+                )
         
         assert response.status_code == 500
         assert "Failed to build video context" in response.json()["detail"]
@@ -214,14 +215,13 @@ class TestChatWithVideo:
         mock_conn, mock_cursor = mock_get_connection
         mock_cursor.fetchone.return_value = sample_chunk_rows[0]
         
-        with patch('app.services.transcript_service.list_transcript_files', return_value=['transcript1.json']):
-            with patch('app.services.transcript_service.merge_transcripts', return_value=[{"data": "test"}]):
-                with patch('app.services.transcript_service.build_video_context', return_value="Context"):
-                    with patch('app.services.aws_service.bedrock_client.converse', side_effect=Exception("Bedrock API error")):
-                        response = test_client.post(
-                            "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
-                            json=sample_chat_request
-                        )
+        with patch('app.routers.chat.list_transcript_files', return_value=['transcript1.json']):
+            with patch('app.routers.chat.get_video_context', return_value="Context"):
+                with patch('app.services.aws_service.bedrock_client.converse', side_effect=Exception("Bedrock API error")):
+                    response = test_client.post(
+                        "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
+                        json=sample_chat_request
+                    )
         
         assert response.status_code == 500
     
@@ -239,14 +239,13 @@ class TestChatWithVideo:
         # Empty response from Bedrock
         empty_response = {}
         
-        with patch('app.services.transcript_service.list_transcript_files', return_value=['transcript1.json']):
-            with patch('app.services.transcript_service.merge_transcripts', return_value=[{"data": "test"}]):
-                with patch('app.services.transcript_service.build_video_context', return_value="Context"):
-                    with patch('app.services.aws_service.bedrock_client.converse', return_value=empty_response):
-                        response = test_client.post(
-                            "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
-                            json=sample_chat_request
-                        )
+        with patch('app.routers.chat.list_transcript_files', return_value=['transcript1.json']):
+            with patch('app.routers.chat.get_video_context', return_value="Context"):
+                with patch('app.services.aws_service.bedrock_client.converse', return_value=empty_response):
+                    response = test_client.post(
+                        "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
+                        json=sample_chat_request
+                    )
         
         assert response.status_code == 500
         assert "No response from AI model" in response.json()["detail"]
@@ -289,20 +288,19 @@ class TestChatWithVideo:
             "chatTransactionId": None
         }
         
-        with patch('app.services.transcript_service.list_transcript_files', return_value=['transcript1.json']):
-            with patch('app.services.transcript_service.merge_transcripts', return_value=[{"data": "test"}]):
-                with patch('app.services.transcript_service.build_video_context', return_value="Context"):
-                    with patch('app.services.aws_service.bedrock_client.converse', return_value=mock_aws_bedrock_response) as mock_bedrock:
-                        response = test_client.post(
-                            "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
-                            json=custom_config_request
-                        )
+        with patch('app.routers.chat.list_transcript_files', return_value=['transcript1.json']):
+            with patch('app.routers.chat.get_video_context', return_value="Context"):
+                with patch('app.services.aws_service.bedrock_client.converse', return_value=mock_aws_bedrock_response) as mock_bedrock:
+                    response = test_client.post(
+                        "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
+                        json=custom_config_request
+                    )
                         
-                        # Verify custom config was passed to Bedrock
-                        call_args = mock_bedrock.call_args
-                        assert call_args[1]["inferenceConfig"]["maxTokens"] == 4096
-                        assert call_args[1]["inferenceConfig"]["temperature"] == 0.5
-                        assert call_args[1]["inferenceConfig"]["topP"] == 0.8
+                    # Verify custom config was passed to Bedrock
+                    call_args = mock_bedrock.call_args
+                    assert call_args[1]["inferenceConfig"]["maxTokens"] == 4096
+                    assert call_args[1]["inferenceConfig"]["temperature"] == 0.5
+                    assert call_args[1]["inferenceConfig"]["topP"] == 0.8
         
         assert response.status_code == 200
     
@@ -318,14 +316,13 @@ class TestChatWithVideo:
         mock_conn, mock_cursor = mock_get_connection
         mock_cursor.fetchone.return_value = sample_chunk_rows[0]
         
-        with patch('app.services.transcript_service.list_transcript_files', return_value=['transcript1.json']):
-            with patch('app.services.transcript_service.merge_transcripts', return_value=[{"data": "test"}]):
-                with patch('app.services.transcript_service.build_video_context', return_value="Context"):
-                    with patch('app.services.aws_service.bedrock_client.converse', return_value=mock_aws_bedrock_response):
-                        response = test_client.post(
-                            "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
-                            json=sample_chat_request
-                        )
+        with patch('app.routers.chat.list_transcript_files', return_value=['transcript1.json']):
+            with patch('app.routers.chat.get_video_context', return_value="Context"):
+                with patch('app.services.aws_service.bedrock_client.converse', return_value=mock_aws_bedrock_response):
+                    response = test_client.post(
+                        "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
+                        json=sample_chat_request
+                    )
         
         assert response.status_code == 200
         data = response.json()
@@ -333,3 +330,115 @@ class TestChatWithVideo:
         # Should have auto-generated transaction ID
         assert data["chatTransactionId"] is not None
         assert len(data["chatTransactionId"]) > 0
+
+
+@pytest.mark.unit
+class TestChatWithVideoStream:
+    """Test suite for POST /api/v1/warehouses/{warehouse_id}/cameras/{cam_id}/chunks/{chunk_id}/chat/stream endpoint"""
+    
+    def test_chat_stream_success(
+        self,
+        test_client,
+        mock_get_connection,
+        sample_chunk_rows,
+        sample_chat_request
+    ):
+        """Test text deltas are relayed as events, followed by the full conversation"""
+        mock_conn, mock_cursor = mock_get_connection
+        mock_cursor.fetchone.return_value = sample_chunk_rows[0]
+        
+        bedrock_events = [
+            {"messageStart": {"role": "assistant"}},
+            {"contentBlockDelta": {"delta": {"text": "I saw "}, "contentBlockIndex": 0}},
+            {"contentBlockDelta": {"delta": {"text": "3 vehicles."}, "contentBlockIndex": 0}},
+            {"messageStop": {"stopReason": "end_turn"}}
+        ]
+        
+        with patch('app.routers.chat.list_transcript_files', return_value=['transcript1.json']), \
+             patch('app.routers.chat.get_video_context', return_value="Context"), \
+             patch('app.routers.chat.bedrock_client') as mock_bedrock:
+            mock_bedrock.converse_stream.return_value = {"stream": iter(bedrock_events)}
+            response = test_client.post(
+                "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat/stream",
+                json=sample_chat_request
+            )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        
+        events = response.text.strip().split("\n\n")
+        assert events[0] == 'data: {"text":"I saw "}'
+        assert events[1] == 'data: {"text":"3 vehicles."}'
+        assert events[2].startswith("event: done\ndata: ")
+        
+        done = json.loads(events[2].split("data: ", 1)[1])
+        assert done["conversation"][-1] == {
+            "role": "assistant",
+            "content": [{"text": "I saw 3 vehicles."}]
+        }
+    
+    def test_chat_stream_closed_on_disconnect(self):
+        """Test the Bedrock event stream is closed when the client goes away mid-answer"""
+        from app.routers.chat import _stream_chat_events
+        
+        event_stream = MagicMock()
+        event_stream.__iter__.return_value = iter([
+            {"contentBlockDelta": {"delta": {"text": "I saw "}, "contentBlockIndex": 0}},
+            {"contentBlockDelta": {"delta": {"text": "3 vehicles."}, "contentBlockIndex": 0}}
+        ])
+        
+        async def read_one_event_then_disconnect():
+            events = _stream_chat_events(event_stream, None)
+            first = await events.__anext__()
+            # Starlette closes the body iterator when the client disconnects
+            await events.aclose()
+            return first
+        
+        assert asyncio.run(read_one_event_then_disconnect()) == b'data: {"text":"I saw "}\n\n'
+        event_stream.close.assert_called_once()
+
+
+@pytest.mark.unit
+class TestChatHistoryCompaction:
+    """Test suite for the rolling history window sent to Bedrock"""
+    
+    def test_long_conversation_is_summarized(
+        self,
+        test_client,
+        mock_get_connection,
+        sample_chunk_rows,
+        sample_chat_request,
+        mock_aws_bedrock_response
+    ):
+        """Test old turns are replaced by a summary while the response keeps the full history"""
+        mock_conn, mock_cursor = mock_get_connection
+        mock_cursor.fetchone.return_value = sample_chunk_rows[0]
+        
+        sample_chat_request["conversation"] = [
+            {
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": [{"text": f"Message {i}"}]
+            }
+            for i in range(24)
+        ]
+        summary_response = {"output": {"message": {"content": [{"text": "Earlier summary"}]}}}
+        
+        with patch('app.routers.chat.list_transcript_files', return_value=['transcript1.json']), \
+             patch('app.routers.chat.get_video_context', return_value="Context"), \
+             patch('app.routers.chat.bedrock_client') as mock_bedrock:
+            mock_bedrock.converse.side_effect = [summary_response, mock_aws_bedrock_response]
+            response = test_client.post(
+                "/api/v1/warehouses/WH001/cameras/CAM001/chunks/chunk_2025-11-19_10-00-00/chat",
+                json=sample_chat_request
+            )
+        
+        assert response.status_code == 200
+        assert mock_bedrock.converse.call_count == 2
+        
+        chat_kwargs = mock_bedrock.converse.call_args_list[1].kwargs
+        assert len(chat_kwargs["messages"]) == 15
+        assert chat_kwargs["messages"][0]["content"][0]["text"] == "Message 10"
+        assert chat_kwargs["system"][-1]["text"].endswith("Earlier summary")
+        
+        # The client still receives the whole conversation back
+        assert len(response.json()["conversation"]) == 26
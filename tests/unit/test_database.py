@@ -0,0 +1,72 @@
+"""
+Unit Tests for Database Connection Management
+
+Tests for:
+- pool.LeasedPool.open - Lazily create the shared connection pool
+- pool.LeasedPool.getconn - Queue for a connection instead of failing when exhausted
+- pool.LeasedPool.putconn - Return a leased connection to the pool
+"""
+
+import pytest
+import threading
+import time
+from unittest.mock import MagicMock, patch
+from psycopg2.pool import PoolError
+
+from app.core.pool import LeasedPool
+
+
+def leased_pool(maxconn=2, timeout=0.05):
+    return LeasedPool(1, maxconn, timeout, host="localhost")
+
+
+@pytest.mark.unit
+class TestLeasedPool:
+    """Test suite for LeasedPool"""
+
+    def test_concurrent_first_use_builds_one_pool(self):
+        """Test requests racing to create the pool share a single one"""
+        def slow_pool(*args, **kwargs):
+            time.sleep(0.05)  # long enough for every thread to find no pool
+            return MagicMock()
+
+        pool = leased_pool()
+        with patch('app.core.pool.ThreadedConnectionPool', side_effect=slow_pool) as pool_class:
+            opened = []
+            threads = [threading.Thread(target=lambda: opened.append(pool.open())) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert pool_class.call_count == 1
+        assert all(p is opened[0] for p in opened)
+
+    def test_failed_open_is_retried(self):
+        """Test a pool that could not be opened (database down at startup) is created on a later lease"""
+        pool = leased_pool()
+        with patch('app.core.pool.ThreadedConnectionPool', side_effect=[Exception("connection refused"), MagicMock()]):
+            with pytest.raises(Exception, match="refused"):
+                pool.getconn()
+            assert pool.getconn() is not None
+
+    def test_exhausted_pool_times_out(self):
+        """Test a lease beyond maxconn waits and then raises PoolError"""
+        pool = leased_pool(maxconn=1)
+        with patch('app.core.pool.ThreadedConnectionPool'):
+            conn = pool.getconn()
+            with pytest.raises(PoolError):
+                pool.getconn()
+            pool.putconn(conn)
+            assert pool.getconn() is not None
+
+    def test_lease_released_when_putconn_fails(self):
+        """Test a failing putconn still gives the lease back"""
+        pool = leased_pool(maxconn=1)
+        with patch('app.core.pool.ThreadedConnectionPool') as pool_class:
+            conn = pool.getconn()
+            pool_class.return_value.putconn.side_effect = Exception("trying to put unkeyed connection")
+            with pytest.raises(Exception, match="unkeyed"):
+                pool.putconn(conn)
+
+            assert pool.getconn() is not None
@@ -0,0 +1,132 @@
+"""
+Unit Tests for Vehicle Session Detection
+
+Tests for:
+- sessions.detect_vehicle_sessions - Group gunny bag logs into per-vehicle sessions
+"""
+
+import pytest
+from datetime import datetime
+
+from sessions import detect_vehicle_sessions
+
+
+def at(hour, minute=0):
+    return datetime(2025, 1, 15, hour, minute)
+
+
+def gunny_log(log_id, start_time, status="LOADING", count=10):
+    return {
+        "id": log_id,
+        "count": count,
+        "start_time": start_time,
+        "status": status,
+        "video_s3_url": f"https://example.com/{log_id}.mp4",
+        "t_hms": None
+    }
+
+
+def vehicle_log(number, start_time):
+    return {
+        "vehicle_number": number,
+        "start_time": start_time,
+        "status": "IN",
+        "bags_capacity": 100,
+        "vehicle_access": "authorized"
+    }
+
+
+def summarize(sessions):
+    """The fields the original list-and-sort implementation produced, minus its random session ids"""
+    return [
+        (
+            session["vehicle_number"],
+            session["start_time"],
+            session["end_time"],
+            [chunk["chunk_id"] for chunk in session["chunks"]],
+            session["total_bags_loaded"],
+            session["total_bags_unloaded"]
+        )
+        for session in sessions
+    ]
+
+
+@pytest.mark.unit
+class TestDetectVehicleSessions:
+    """Test suite for detect_vehicle_sessions"""
+
+    def test_tie_ordering_matches_sorted_event_list(self):
+        """Test equal timestamps keep the original order: gunny events before vehicle events"""
+        gunny_logs = [
+            gunny_log(1, at(9)),                      # same time as A arrives: before any vehicle
+            gunny_log(2, at(9, 30)),
+            gunny_log(3, at(10), "UNLOADING", 5),     # same time as B and C: still A's
+            gunny_log(4, at(10)),
+            gunny_log(5, None),                       # no start_time: skipped
+            gunny_log(6, at(11))                      # same time as A returns: still C's
+        ]
+        vehicle_logs = [
+            vehicle_log("A", at(9)),
+            vehicle_log("B", at(10)),
+            vehicle_log("C", at(10)),
+            vehicle_log("A", at(11))
+        ]
+
+        sessions = detect_vehicle_sessions(gunny_logs, vehicle_logs)
+
+        # Output of the original implementation on the same logs
+        assert summarize(sessions) == [
+            ("A", at(9), at(11), ["2", "3", "4"], 20, 5),
+            ("B", at(10), at(10), [], 0, 0),
+            ("C", at(10), at(11), ["6"], 10, 0)
+        ]
+        assert sessions[0]["authorized_bags"] == 100
+        assert sessions[0]["authorization"] == "authorized"
+
+    def test_streamed_gunny_logs_match_list_input(self):
+        """Test a one-shot iterator of gunny logs (a streaming cursor) gives the same sessions"""
+        def make_logs():
+            return [gunny_log(1, at(9, 15)), gunny_log(2, at(10, 15), "UNLOADING", 3)]
+        vehicle_logs = [vehicle_log("A", at(9)), vehicle_log("B", at(10))]
+
+        from_list = detect_vehicle_sessions(make_logs(), vehicle_logs)
+        from_stream = detect_vehicle_sessions(iter(make_logs()), vehicle_logs)
+
+        assert summarize(from_stream) == summarize(from_list) == [
+            ("A", at(9), at(9, 15), ["1"], 10, 0),
+            ("B", at(10), at(10, 15), ["2"], 0, 3)
+        ]
+
+    def test_fallback_session_without_vehicle_logs(self):
+        """Test gunny logs with no vehicle logs all go into one XXXX session"""
+        gunny_logs = iter([
+            gunny_log(1, "2025-01-15 09:00:00"),      # string timestamps are parsed
+            gunny_log(2, "not a timestamp"),          # unparseable: skipped
+            gunny_log(3, at(9, 5), "UNLOADING", 4)
+        ])
+
+        sessions = detect_vehicle_sessions(gunny_logs, [])
+
+        assert summarize(sessions) == [("XXXX", at(9), at(9, 5), ["1", "3"], 10, 4)]
+        assert sessions[0]["vehicle_data"] is None
+        assert sessions[0]["authorization"] == "Unknown"
+
+    def test_fallback_session_without_timed_gunny_logs(self):
+        """Test the XXXX session is still created when no gunny log has a start_time"""
+        sessions = detect_vehicle_sessions([gunny_log(1, None)], [])
+
+        assert len(sessions) == 1
+        assert sessions[0]["vehicle_number"] == "XXXX"
+        assert sessions[0]["chunks"] == []
+        assert sessions[0]["start_log"] is None
+
+    def test_vehicles_without_gunny_logs(self):
+        """Test vehicles still get sessions when the gunny stream is empty"""
+        sessions = detect_vehicle_sessions(iter([]), [vehicle_log("A", at(9))])
+
+        assert summarize(sessions) == [("A", at(9), at(9), [], 0, 0)]
+
+    @pytest.mark.parametrize("gunny_logs", [[], iter([])], ids=["list", "iterator"])
+    def test_empty_input(self, gunny_logs):
+        """Test no logs at all gives no sessions"""
+        assert detect_vehicle_sessions(gunny_logs, []) == []
@@ -0,0 +1,116 @@
+"""
+Unit Tests for Transcript Caching
+
+Tests for:
+- transcript_service.get_video_context - Reuse built contexts and per-blob slices across listings
+"""
+
+import pytest
+import orjson
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.services import transcript_service
+
+CONTAINER = "transcripts"
+PREFIX = "WH001/CAM001/"
+
+
+class FakeContainer:
+    """Container client serving transcript blobs from a dict and recording each download"""
+
+    def __init__(self):
+        self.blobs = {}  # name -> (etag, entries)
+        self.failing = set()
+        self.downloads = []
+
+    def put(self, chunk_start, text, etag):
+        name = f"{PREFIX}chunk_start-{chunk_start}.json"
+        self.blobs[name] = (etag, [{"transcript": text}])
+        return name
+
+    def list_blobs(self, name_starts_with=""):
+        return [
+            SimpleNamespace(name=name, etag=etag)
+            for name, (etag, _) in self.blobs.items()
+            if name.startswith(name_starts_with)
+        ]
+
+    def get_blob_client(self, name):
+        def download_blob(**kwargs):
+            self.downloads.append(name)
+            if name in self.failing:
+                raise ConnectionError("download failed")
+            payload = orjson.dumps(self.blobs[name][1])
+            return SimpleNamespace(readinto=lambda stream: stream.write(payload))
+        return SimpleNamespace(download_blob=download_blob)
+
+
+@pytest.fixture
+def container():
+    """Fake blob container patched into the transcript service"""
+    fake = FakeContainer()
+    service_client = MagicMock()
+    service_client.get_container_client.return_value = fake
+    with patch('app.services.transcript_service.get_blob_service_client', return_value=service_client):
+        yield fake
+
+
+def relist_context():
+    """List the prefix afresh (as after the listing TTL) and build its context"""
+    transcript_service._listing_cache.clear()
+    blob_names = transcript_service.list_transcript_files(CONTAINER, PREFIX)
+    return transcript_service.get_video_context(CONTAINER, blob_names)
+
+
+@pytest.mark.unit
+class TestGetVideoContext:
+    """Test suite for get_video_context caching"""
+
+    def test_unchanged_listing_reuses_context(self, container):
+        """Test a listing with the same names and ETags returns the cached context without downloading"""
+        container.put(0, "first chunk", '"etag-1"')
+        container.put(30, "second chunk", '"etag-2"')
+
+        context = relist_context()
+        assert container.downloads == [
+            f"{PREFIX}chunk_start-0.json",
+            f"{PREFIX}chunk_start-30.json"
+        ]
+        assert context.index("first chunk") < context.index("second chunk")
+
+        container.downloads.clear()
+        assert relist_context() == context
+        assert container.downloads == []
+
+    def test_changed_etag_downloads_only_that_blob(self, container):
+        """Test a rewritten blob (new ETag) is the only one downloaded again"""
+        container.put(0, "first chunk", '"etag-1"')
+        rewritten = container.put(30, "second chunk", '"etag-2"')
+        relist_context()
+
+        container.downloads.clear()
+        container.put(30, "second chunk, revised", '"etag-3"')
+        context = relist_context()
+
+        assert container.downloads == [rewritten]
+        assert "first chunk" in context
+        assert "second chunk, revised" in context
+
+    def test_failed_download_is_not_cached(self, container):
+        """Test a context missing a failed blob is not kept, and the retry downloads only that blob"""
+        container.put(0, "first chunk", '"etag-1"')
+        flaky = container.put(30, "second chunk", '"etag-2"')
+        container.failing.add(flaky)
+
+        context = relist_context()
+        assert "first chunk" in context
+        assert "second chunk" not in context
+        assert transcript_service._context_cache.currsize == 0
+
+        container.failing.clear()
+        container.downloads.clear()
+        context = relist_context()
+
+        assert container.downloads == [flaky]
+        assert "second chunk" in context
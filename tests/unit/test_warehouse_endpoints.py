@@ -26,10 +26,10 @@ class TestGetAllWarehouses:
         """Test successful retrieval of all warehouses with employees"""
         mock_conn, mock_cursor = mock_get_connection
         
-        # Mock database responses
-        mock_cursor.fetchall.side_effect = [
-            [sample_warehouse_row],  # warehouse query
-            sample_employee_rows     # employee query
+        # One joined row per (warehouse, employee)
+        mock_cursor.fetchall.return_value = [
+            sample_warehouse_row + emp_row[:1] + emp_row[2:]
+            for emp_row in sample_employee_rows
         ]
         
         response = test_client.get("/api/v1/warehouses")
@@ -75,10 +75,8 @@ class TestGetAllWarehouses:
         """Test warehouse with no employees"""
         mock_conn, mock_cursor = mock_get_connection
         
-        mock_cursor.fetchall.side_effect = [
-            [sample_warehouse_row],  # warehouse query
-            []                       # no employees
-        ]
+        # The LEFT JOIN still returns the warehouse, with NULL employee columns
+        mock_cursor.fetchall.return_value = [sample_warehouse_row + (None,) * 6]
         
         response = test_client.get("/api/v1/warehouses")
         
@@ -89,6 +87,40 @@ class TestGetAllWarehouses:
         assert warehouse["total_employees"] == 0
         assert warehouse["employees"] == []
     
+    def test_get_all_warehouses_paginated(
+        self,
+        test_client,
+        mock_get_connection,
+        sample_warehouse_row
+    ):
+        """Test a full page reports the offset of the next one"""
+        mock_conn, mock_cursor = mock_get_connection
+        
+        # limit=1 fetches one look-ahead warehouse past the page
+        second_row = ("WH002",) + sample_warehouse_row[1:]
+        mock_cursor.fetchall.return_value = [
+            sample_warehouse_row + (None,) * 6,
+            second_row + (None,) * 6
+        ]
+        
+        response = test_client.get("/api/v1/warehouses?limit=1&offset=3")
+        
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert data["total_warehouses"] == 1
+        assert data["warehouses"][0]["warehouse_id"] == "WH001"
+        assert data["limit"] == 1
+        assert data["offset"] == 3
+        assert data["next_offset"] == 4
+        assert mock_cursor.execute.call_args[0][1] == (2, 3)
+    
+    def test_get_all_warehouses_limit_validation(self, test_client):
+        """Test page size is bounded"""
+        response = test_client.get("/api/v1/warehouses?limit=501")
+        
+        assert response.status_code == 422
+    
     def test_get_all_warehouses_database_error(self, test_client, mock_get_connection):
         """Test handling of database errors"""
         mock_conn, mock_cursor = mock_get_connection
@@ -107,22 +139,18 @@ class TestGetWarehouseById:
     def test_get_warehouse_by_id_success(
         self,
         test_client,
-        mock_get_connection,
+        mock_statement_rows,
         sample_warehouse_row,
         sample_camera_rows,
         sample_vehicle_rows,
         sample_employee_rows
     ):
         """Test successful retrieval of specific warehouse with all related data"""
-        mock_conn, mock_cursor = mock_get_connection
-        
-        # Mock database responses in order
-        mock_cursor.fetchone.return_value = sample_warehouse_row
-        mock_cursor.fetchall.side_effect = [
-            sample_camera_rows,   # cameras
-            sample_vehicle_rows,  # vehicles
-            sample_employee_rows  # employees
-        ]
+        # The four queries are fetched concurrently
+        mock_statement_rows["warehouse_by_id"] = [sample_warehouse_row]
+        mock_statement_rows["warehouse_cameras"] = sample_camera_rows
+        mock_statement_rows["warehouse_vehicles"] = sample_vehicle_rows
+        mock_statement_rows["warehouse_employees"] = sample_employee_rows
         
         response = test_client.get("/api/v1/warehouses/WH001")
         
@@ -143,10 +171,12 @@ class TestGetWarehouseById:
         # Verify employees
         assert data["employees"]["total_employees"] == 2
     
-    def test_get_warehouse_by_id_not_found(self, test_client, mock_get_connection):
+    def test_get_warehouse_by_id_not_found(self, test_client, mock_statement_rows):
         """Test response when warehouse doesn't exist"""
-        mock_conn, mock_cursor = mock_get_connection
-        mock_cursor.fetchone.return_value = None
+        mock_statement_rows["warehouse_by_id"] = []
+        mock_statement_rows["warehouse_cameras"] = []
+        mock_statement_rows["warehouse_vehicles"] = []
+        mock_statement_rows["warehouse_employees"] = []
         
         response = test_client.get("/api/v1/warehouses/INVALID_ID")
         
@@ -156,19 +186,20 @@ class TestGetWarehouseById:
     def test_get_warehouse_by_id_with_null_coordinates(
         self,
         test_client,
-        mock_get_connection
+        mock_statement_rows
     ):
         """Test warehouse with NULL longitude/latitude"""
-        mock_conn, mock_cursor = mock_get_connection
-        
         warehouse_row_with_nulls = (
             "WH001", "Central Warehouse", 10000,
             None, None,  # NULL coordinates
             "Bangalore, Karnataka"
         )
         
-        mock_cursor.fetchone.return_value = warehouse_row_with_nulls
-        mock_cursor.fetchall.side_effect = [[], [], []]  # No cameras, vehicles, employees
+        mock_statement_rows["warehouse_by_id"] = [warehouse_row_with_nulls]
+        # No cameras, vehicles, employees
+        mock_statement_rows["warehouse_cameras"] = []
+        mock_statement_rows["warehouse_vehicles"] = []
+        mock_statement_rows["warehouse_employees"] = []
         
         response = test_client.get("/api/v1/warehouses/WH001")
         
@@ -202,12 +233,13 @@ class TestGetWarehouseDashboard:
         """Test successful dashboard data retrieval"""
         mock_conn, mock_cursor = mock_get_connection
         
-        # Mock database responses
-        mock_cursor.fetchone.side_effect = [
-            sample_dashboard_data["bags"],       # bags query
-            sample_dashboard_data["vehicles"],   # vehicles query
-            sample_dashboard_data["employees"]   # employees query
-        ]
+        # Single dashboard row: capacity, then the bag, vehicle and employee counters
+        mock_cursor.fetchone.return_value = (
+            (10000,)
+            + sample_dashboard_data["bags"]
+            + sample_dashboard_data["vehicles"]
+            + sample_dashboard_data["employees"]
+        )
         
         response = test_client.get(
             "/api/v1/warehouses/WH001/dashboard",
@@ -252,12 +284,8 @@ class TestGetWarehouseDashboard:
         """Test dashboard with NULL database values"""
         mock_conn, mock_cursor = mock_get_connection
         
-        # Mock NULL responses
-        mock_cursor.fetchone.side_effect = [
-            (None, None),      # bags
-            (None, None),      # vehicles
-            (None, None, None) # employees
-        ]
+        # Mock NULL responses (capacity, bags, vehicles, employees)
+        mock_cursor.fetchone.return_value = (None,) * 8
         
         response = test_client.get(
             "/api/v1/warehouses/WH001/dashboard",
@@ -284,11 +312,8 @@ class TestGetWarehouseDashboard:
         """Test dashboard when no data exists for the date"""
         mock_conn, mock_cursor = mock_get_connection
         
-        mock_cursor.fetchone.side_effect = [
-            (0, 0),      # no bags
-            (0, 0),      # no vehicles
-            (0, 0, 0)    # no employees
-        ]
+        # Capacity, then no bags, vehicles or employees
+        mock_cursor.fetchone.return_value = (10000,) + (0,) * 7
         
         response = test_client.get(
             "/api/v1/warehouses/WH001/dashboard",
@@ -323,11 +348,12 @@ class TestGetWarehouseDashboard:
         """Test dashboard with leap year date"""
         mock_conn, mock_cursor = mock_get_connection
         
-        mock_cursor.fetchone.side_effect = [
-            sample_dashboard_data["bags"],
-            sample_dashboard_data["vehicles"],
-            sample_dashboard_data["employees"]
-        ]
+        mock_cursor.fetchone.return_value = (
+            (10000,)
+            + sample_dashboard_data["bags"]
+            + sample_dashboard_data["vehicles"]
+            + sample_dashboard_data["employees"]
+        )
         
         response = test_client.get(
             "/api/v1/warehouses/WH001/dashboard",